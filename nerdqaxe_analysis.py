@@ -0,0 +1,327 @@
+# =============================================================
+#           PARETO FRONT & V/F RESPONSE SURFACE REPORT
+# =============================================================
+# The top-8 lists rank hashrate and J/TH separately. This report looks at
+# all results of one or many devices at once:
+#
+#   pareto    results no other result of the same device beats on hashrate,
+#             J/TH and chip temperature at the same time (a chunked,
+#             vectorized dominance check)
+#   surface   hashrate, J/TH and temperature interpolated across the V/F
+#             grid with a Gaussian kernel; cells farther than one grid
+#             step from any passing result, or closer to a failure than to
+#             a pass, are left empty
+#   boundary  per core voltage, the highest stable frequency and the first
+#             failure above it
+#
+# Output: a JSON report and a self-contained HTML page with one SVG
+# heatmap per metric and device, marking failures, the Pareto front and
+# the stability boundary.
+#
+#   python nerdqaxe_benchmark.py analyze nerdqaxe_benchmark_results_*.json
+#   python nerdqaxe_benchmark.py analyze --store --model "NerdQAxe++"
+import argparse
+import html
+import json
+import sys
+import time
+
+import numpy as np
+
+import nerdqaxe_benchmark as nb
+from nerdqaxe_benchmark import GREEN, YELLOW, RED, RESET
+from nerdqaxe_journal import ResultJournal
+
+analysis_voltage_resolution = 5      # mV between surface cells
+analysis_frequency_resolution = 5    # MHz between surface cells
+analysis_bandwidth = 0.6             # kernel width in grid steps (voltage_step, frequency_step)
+analysis_reach = 1.0                 # grid steps a surface cell may lie from the nearest passing result
+pareto_chunk = 128                   # results compared per vectorized block
+
+# (result field, report label, unit, higher is better)
+SURFACE_METRICS = (("averageHashRate", "Hashrate", "GH/s", True),
+                   ("efficiencyJTH", "Efficiency", "J/TH", False),
+                   ("averageTemperature", "Chip temperature", "°C", False))
+
+def dominated(candidates, block):
+    """[i] True if some candidate is at least as good as block[i] everywhere and better somewhere (minimizing)."""
+    if not len(candidates):
+        return np.zeros(len(block), dtype=bool)
+    no_worse = np.all(candidates[None, :, :] <= block[:, None, :], axis=2)
+    better = np.any(candidates[None, :, :] < block[:, None, :], axis=2)
+    return np.any(no_worse & better, axis=1)
+
+def pareto_mask(hashrate, efficiency, temperature):
+    """Boolean mask of the results not dominated on (max hashrate, min J/TH, min temperature).
+
+    A missing temperature counts as the worst one. Results are processed in
+    lexicographic order in blocks, so each block is only compared with itself
+    and the front found so far.
+    """
+    objectives = np.column_stack([-np.asarray(hashrate, dtype=float), np.asarray(efficiency, dtype=float),
+                                  np.nan_to_num(np.asarray(temperature, dtype=float), nan=np.inf)])
+    # Nothing later in lexicographic order can dominate an earlier result
+    order = np.lexsort(objectives.T[::-1])
+    ordered = objectives[order]
+    mask = np.zeros(len(objectives), dtype=bool)
+    front = ordered[:0]
+    for start in range(0, len(ordered), pareto_chunk):
+        block = ordered[start:start + pareto_chunk]
+        keep = ~(dominated(front, block) | dominated(block, block))
+        mask[order[start:start + len(block)]] = keep
+        front = np.vstack([front, block[keep]])
+    return mask
+
+def pareto_front(results):
+    """The Pareto-optimal results, highest hashrate first."""
+    if not results:
+        return []
+    mask = pareto_mask([r["averageHashRate"] for r in results], [r["efficiencyJTH"] for r in results],
+                       [r.get("averageTemperature", np.nan) for r in results])
+    return sorted((r for r, keep in zip(results, mask) if keep), key=lambda r: r["averageHashRate"], reverse=True)
+
+def stability_boundary(results, failures):
+    """Per core voltage: the highest passing frequency and the first failure above it."""
+    boundary = []
+    for voltage in sorted({r["coreVoltage"] for r in results} | {f["coreVoltage"] for f in failures}):
+        passed = [r["frequency"] for r in results if r["coreVoltage"] == voltage]
+        highest = max(passed) if passed else None
+        above = sorted((f for f in failures if f["coreVoltage"] == voltage
+                        and (highest is None or f["frequency"] > highest)), key=lambda f: f["frequency"])
+        entry = {"coreVoltage": voltage, "maxStableFrequency": highest}
+        if above:
+            entry["firstFailure"] = {"frequency": above[0]["frequency"], "errorReason": above[0]["errorReason"]}
+        boundary.append(entry)
+    return boundary
+
+def interpolate_surface(results, failures, steps):
+    """Kernel-interpolated metrics over a regular V/F grid; None where there is no stable data."""
+    points = np.array([(r["coreVoltage"], r["frequency"]) for r in results], dtype=float)
+    failed = np.array([(f["coreVoltage"], f["frequency"]) for f in failures], dtype=float).reshape(-1, 2)
+    every = np.vstack([points, failed])
+    low, high = every.min(axis=0), every.max(axis=0)
+    voltages = np.arange(low[0], high[0] + 1e-9, analysis_voltage_resolution)
+    frequencies = np.arange(low[1], high[1] + 1e-9, analysis_frequency_resolution)
+    cells = np.stack(np.meshgrid(voltages, frequencies, indexing="ij"), axis=-1).reshape(-1, 2)
+
+    # Squared distances in grid steps, so a voltage step weighs like a frequency step
+    scale = np.array(steps or (nb.voltage_step, nb.frequency_step), dtype=float)
+
+    def squared_distance(to):
+        return (np.subtract.outer(cells[:, 0], to[:, 0]) / scale[0]) ** 2 + \
+               (np.subtract.outer(cells[:, 1], to[:, 1]) / scale[1]) ** 2
+
+    distance = squared_distance(points)
+    nearest_pass = distance.min(axis=1)
+    stable = nearest_pass <= analysis_reach ** 2
+    if len(failed):
+        stable &= nearest_pass <= squared_distance(failed).min(axis=1)
+
+    weights = np.exp(distance * (-0.5 / analysis_bandwidth ** 2), out=distance)
+    values = np.array([[r.get(key, np.nan) for key, _, _, _ in SURFACE_METRICS] for r in results], dtype=float)
+    known = ~np.isnan(values)
+    # All metrics in two matrix products; a missing value adds no weight
+    totals = weights @ known
+    sums = weights @ np.where(known, values, 0.0)
+    grids = np.where(stable[:, None] & (totals > 0), sums / np.maximum(totals, 1e-300), np.nan)
+    surface = {"voltages": voltages.tolist(), "frequencies": frequencies.tolist()}
+    for index, (key, _, _, _) in enumerate(SURFACE_METRICS):
+        grid = np.round(grids[:, index], 3).reshape(len(voltages), len(frequencies))
+        surface[key] = [[None if np.isnan(v) else v for v in row] for row in grid.tolist()]
+    return surface
+
+def analyze_device(name, results, failures, steps=None):
+    """Report section of one device."""
+    # A point that passed in any run is not a failure
+    passed = {(r["coreVoltage"], r["frequency"]) for r in results}
+    failures = [f for f in failures if (f["coreVoltage"], f["frequency"]) not in passed]
+    report = {"device": name, "results": len(results), "failures": len(failures),
+              "pareto": pareto_front(results),
+              "boundary": stability_boundary(results, failures)}
+    if results:
+        report["surface"] = interpolate_surface(results, failures, steps)
+    report["failedPoints"] = [{"coreVoltage": f["coreVoltage"], "frequency": f["frequency"],
+                               "errorReason": f["errorReason"]} for f in failures]
+    return report
+
+# =============================================================
+#                        HTML / SVG
+# =============================================================
+# Dark blue -> teal -> yellow, close to viridis
+COLOR_STOPS = ((0.0, (68, 1, 84)), (0.25, (59, 82, 139)), (0.5, (33, 145, 140)),
+               (0.75, (94, 201, 98)), (1.0, (253, 231, 37)))
+
+def color(fraction):
+    for (a, ca), (b, cb) in zip(COLOR_STOPS, COLOR_STOPS[1:]):
+        if fraction <= b:
+            t = (fraction - a) / (b - a) if b > a else 0
+            return "#%02x%02x%02x" % tuple(round(x + (y - x) * t) for x, y in zip(ca, cb))
+    return "#%02x%02x%02x" % COLOR_STOPS[-1][1]
+
+def heatmap_svg(device, key, label, unit, higher_better, width=360, height=300):
+    """One metric of one device: heatmap, failures (x), Pareto front (rings) and boundary line."""
+    surface = device["surface"]
+    voltages, frequencies = surface["voltages"], surface["frequencies"]
+    grid = np.array([[np.nan if v is None else v for v in row] for row in surface[key]], dtype=float)
+    pad_left, pad_bottom, pad_top, pad_right = 44, 30, 22, 8
+    plot_w, plot_h = width - pad_left - pad_right, height - pad_top - pad_bottom
+    cell_w, cell_h = plot_w / len(voltages), plot_h / len(frequencies)
+
+    def x(v):
+        return pad_left + (v - voltages[0]) / analysis_voltage_resolution * cell_w + cell_w / 2
+
+    def y(f):
+        return pad_top + plot_h - ((f - frequencies[0]) / analysis_frequency_resolution * cell_h + cell_h / 2)
+
+    parts = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" font-size="10">',
+             f'<text x="{pad_left}" y="14" font-weight="bold">{html.escape(label)} ({html.escape(unit)})</text>']
+    if np.isnan(grid).all():
+        parts.append("</svg>")
+        return "".join(parts)
+    low, high = np.nanmin(grid), np.nanmax(grid)
+    span = high - low or 1.0
+    for i, voltage in enumerate(voltages):
+        for j, frequency in enumerate(frequencies):
+            value = grid[i, j]
+            if np.isnan(value):
+                continue
+            fraction = (value - low) / span
+            parts.append(f'<rect x="{x(voltage) - cell_w / 2:.1f}" y="{y(frequency) - cell_h / 2:.1f}" '
+                         f'width="{cell_w + 0.3:.1f}" height="{cell_h + 0.3:.1f}" '
+                         f'fill="{color(fraction if higher_better else 1 - fraction)}">'
+                         f'<title>{voltage:.0f} mV @ {frequency:.0f} MHz: {value:.2f} {html.escape(unit)}</title></rect>')
+    line = [(b["coreVoltage"], (b["maxStableFrequency"] + b["firstFailure"]["frequency"]) / 2)
+            for b in device["boundary"] if b["maxStableFrequency"] is not None and "firstFailure" in b]
+    if len(line) > 1:
+        path = " ".join(f"{x(v):.1f},{y(f):.1f}" for v, f in line)
+        parts.append(f'<polyline points="{path}" fill="none" stroke="#e8453c" stroke-width="2" stroke-dasharray="4 2"/>')
+    for f in device["failedPoints"]:
+        cx, cy = x(f["coreVoltage"]), y(f["frequency"])
+        parts.append(f'<path d="M{cx - 3:.1f},{cy - 3:.1f}L{cx + 3:.1f},{cy + 3:.1f}M{cx - 3:.1f},{cy + 3:.1f}'
+                     f'L{cx + 3:.1f},{cy - 3:.1f}" stroke="#e8453c" stroke-width="1.5">'
+                     f'<title>{html.escape(f["errorReason"])}</title></path>')
+    for r in device["pareto"]:
+        parts.append(f'<circle cx="{x(r["coreVoltage"]):.1f}" cy="{y(r["frequency"]):.1f}" r="4" fill="none" '
+                     f'stroke="white" stroke-width="1.5"><title>Pareto: {r["coreVoltage"]} mV @ {r["frequency"]} MHz, '
+                     f'{r["averageHashRate"]:.0f} GH/s, {r["efficiencyJTH"]:.2f} J/TH</title></circle>')
+    # Axes: min/max ticks are enough to read the grid
+    bottom = pad_top + plot_h
+    parts.append(f'<text x="{pad_left}" y="{bottom + 14}">{voltages[0]:.0f}</text>'
+                 f'<text x="{width - pad_right}" y="{bottom + 14}" text-anchor="end">{voltages[-1]:.0f}</text>'
+                 f'<text x="{pad_left + plot_w / 2}" y="{bottom + 26}" text-anchor="middle">core voltage (mV)</text>'
+                 f'<text x="{pad_left - 4}" y="{bottom}" text-anchor="end">{frequencies[0]:.0f}</text>'
+                 f'<text x="{pad_left - 4}" y="{pad_top + 8}" text-anchor="end">{frequencies[-1]:.0f}</text>'
+                 f'<text transform="translate(12 {pad_top + plot_h / 2}) rotate(-90)" text-anchor="middle">MHz</text>'
+                 f'<text x="{width - pad_right}" y="14" text-anchor="end">{low:.1f} – {high:.1f}</text>')
+    parts.append("</svg>")
+    return "".join(parts)
+
+def format_temperature(result):
+    temp = result.get("averageTemperature")
+    return "-" if temp is None else f"{temp:.1f}"
+
+def render_html(report):
+    sections = []
+    for device in report["devices"]:
+        rows = "".join(
+            f"<tr><td>{r['coreVoltage']}</td><td>{r['frequency']}</td><td>{r['averageHashRate']:.1f}</td>"
+            f"<td>{r['efficiencyJTH']:.2f}</td><td>{format_temperature(r)}</td></tr>"
+            for r in device["pareto"])
+        maps = "".join(heatmap_svg(device, *metric) for metric in SURFACE_METRICS) if "surface" in device else ""
+        sections.append(
+            f"<h2>{html.escape(device['device'])}</h2>"
+            f"<p>{device['results']} results, {device['failures']} failed points, "
+            f"{len(device['pareto'])} on the Pareto front (white rings). Red x: failures; dashed red line: "
+            f"stability boundary.</p><div>{maps}</div>"
+            f"<table><tr><th>mV</th><th>MHz</th><th>GH/s</th><th>J/TH</th><th>°C</th></tr>{rows}</table>")
+    return ("<!DOCTYPE html><html><head><meta charset='utf-8'><title>NerdQAxe benchmark analysis</title>"
+            "<style>body{font-family:sans-serif;margin:20px}svg{margin:0 8px 8px 0}"
+            "table{border-collapse:collapse}td,th{padding:2px 8px;text-align:right;border-bottom:1px solid #ddd}</style>"
+            f"</head><body><h1>NerdQAxe benchmark analysis</h1><p>Generated {time.strftime('%Y-%m-%d %H:%M')}</p>"
+            + "".join(sections) + "</body></html>")
+
+# =============================================================
+#                     LOADING & CLI
+# =============================================================
+def load_results_file(filename):
+    """Results and failures of a results snapshot plus its journal."""
+    snapshot, records = ResultJournal(filename).load()
+    results = list(snapshot.get("all_results", [])) + [r["entry"] for r in records if r["type"] == "result"]
+    failures = list(snapshot.get("failures", [])) + [r["entry"] for r in records if r["type"] == "failure"]
+    return results, failures
+
+def load_devices(args):
+    """{device: (results, failures)} from the store, the fleet's results files or the given files."""
+    if args.store is not None:
+        from nerdqaxe_store import ResultStore, default_store_filename
+        store = ResultStore(args.store or default_store_filename)
+        units = store.unit_results(args.model)
+        failures = store.unit_failures(args.model)
+        store.close()
+        return {unit["ip"] or name: (unit["results"], failures.get(name, [])) for name, unit in units.items()}
+
+    from nerdqaxe_budget import device_name
+    filenames = list(args.results_files)
+    if args.fleet:
+        from nerdqaxe_fleet import load_fleet_ips
+        filenames += [f"nerdqaxe_benchmark_results_{ip}.json" for ip in load_fleet_ips(args.fleet)]
+    devices = {}
+    for filename in filenames:
+        name = device_name(filename)
+        if not ResultJournal(filename).exists():
+            print(RED + f"No results for {name} ({filename} not found)" + RESET)
+            continue
+        devices[name] = load_results_file(filename)
+    return devices
+
+def parse_arguments(argv):
+    parser = argparse.ArgumentParser(prog="nerdqaxe_benchmark.py analyze",
+                                     description='Pareto front, interpolated V/F surfaces and stability boundary per device')
+    parser.add_argument('results_files', nargs='*', help='nerdqaxe_benchmark_results_<ip>.json files')
+    parser.add_argument('--fleet', metavar='IPS_OR_FILE', help='Analyze the results files of these devices')
+    parser.add_argument('--store', nargs='?', const="", metavar='DB',
+                        help='Analyze every unit in the fleet store instead of results files')
+    parser.add_argument('--model', help='With --store: only this device model')
+    parser.add_argument('--output', default='nerdqaxe_analysis.json', help='JSON report (default: nerdqaxe_analysis.json)')
+    parser.add_argument('--html', default='nerdqaxe_analysis.html',
+                        help='HTML report with heatmaps (default: nerdqaxe_analysis.html; "" to skip)')
+    args = parser.parse_args(argv)
+    if not args.results_files and not args.fleet and args.store is None:
+        parser.error("give results files, --fleet or --store")
+    return args
+
+def main(argv):
+    args = parse_arguments(argv)
+    devices = load_devices(args)
+    if not devices:
+        print(RED + "Nothing to analyze." + RESET)
+        sys.exit(1)
+
+    started = time.perf_counter()
+    report = {"generated": round(time.time(), 3),
+              "devices": [analyze_device(name, results, failures) for name, (results, failures) in sorted(devices.items())]}
+    elapsed = time.perf_counter() - started
+
+    for device in report["devices"]:
+        if not device["results"]:
+            print(YELLOW + f"{device['device']}: no results" + RESET)
+            continue
+        front = device["pareto"]
+        print(GREEN + f"{device['device']}: {device['results']} results, {device['failures']} failed points, "
+                      f"{len(front)} on the Pareto front" + RESET)
+        for r in front:
+            print(f"  {r['coreVoltage']:>5} mV @ {r['frequency']:>4} MHz | {r['averageHashRate']:>8.1f} GH/s | "
+                  f"{r['efficiencyJTH']:>6.2f} J/TH | {format_temperature(r):>5}°C")
+    total = sum(d["results"] for d in report["devices"])
+    print(GREEN + f"Analyzed {total} results of {len(report['devices'])} devices in {elapsed * 1000:.0f} ms" + RESET)
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(GREEN + f"Report saved to {args.output}" + RESET)
+    if args.html:
+        with open(args.html, "w", encoding="utf-8") as f:
+            f.write(render_html(report))
+        print(GREEN + f"Heatmaps saved to {args.html}" + RESET)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,305 @@
+# =============================================================
+#              CONTINUOUS AUTOTUNE DAEMON (--daemon)
+# =============================================================
+# The optimum found by a sweep holds for the ambient temperature it was
+# measured at. With --daemon the session keeps watching the device after
+# applying its best settings and re-tunes locally when conditions drift:
+#
+#   monitor   light polling; chip/VR temperature and hashrate are smoothed
+#             (EWMA) and compared with the baseline measured at the applied
+#             point. A drift has to persist before it counts:
+#               LIMIT         smoothed temperature at a guard limit (acts at once)
+#               HOTTER        chip or VR temperature risen beyond the drift band
+#               HASHRATE_LOW  hashrate dropped below the baseline
+#               COOLER        chip temperature fallen beyond the drift band
+#   re-tune   short windows on the current point and its direct grid
+#             neighbours (only cooler ones when it got hotter, only hotter
+#             ones when it got cooler), stepping further while nothing
+#             passes or while climbing still pays off
+#   switch    to the best neighbour only if it beats the current point by
+#             the hysteresis margin, or if the current point fails now
+#
+# A re-tune costs a handful of short windows instead of a full sweep.
+# Events are appended to nerdqaxe_autotune_<ip>.jsonl.
+import json
+import math
+import time
+
+from nerdqaxe_benchmark import GREEN, YELLOW, RED, BenchmarkInterrupted
+from nerdqaxe_schedule import power_proxy
+from nerdqaxe_search import INSTABILITY_REASONS
+from nerdqaxe_telemetry import TelemetryWriter
+
+autotune_poll_interval = 30       # seconds between monitoring polls
+autotune_log_interval = 1800      # seconds between monitoring log lines
+autotune_ewma_time = 300          # seconds; time constant of the smoothed readings
+autotune_drift_time = 600         # seconds a drift must persist before re-tuning
+autotune_cooldown = 3600          # seconds after a re-tune before drift is acted on again (LIMIT excepted)
+autotune_temp_drift = 3.0         # °C chip temperature change vs the baseline
+autotune_vr_temp_drift = 5.0      # °C VR temperature rise vs the baseline
+autotune_hashrate_drop = 0.05     # relative drop of the smoothed hashrate below the baseline
+autotune_measure_time = 300       # seconds per measurement window while re-tuning
+autotune_hysteresis = 0.01        # relative gain (objective, else hashrate) a neighbour needs to replace a passing point
+autotune_max_rounds = 3           # neighbourhoods examined per re-tune
+
+def autotune_filename(ip_address):
+    return f"nerdqaxe_autotune_{ip_address}.jsonl"
+
+class DriftMonitor:
+    """Smoothed chip/VR temperature and hashrate compared with the baseline of the applied point."""
+
+    def __init__(self, baseline, max_temp, max_vr_temp):
+        self.baseline = baseline      # result entry of the applied point
+        self.max_temp = max_temp
+        self.max_vr_temp = max_vr_temp
+        self.smoothed = {}
+        self.last_time = None
+        self.drift = None
+        self.drift_since = None
+
+    def add(self, now, info):
+        """Feed one snapshot; returns a drift reason once it has persisted long enough."""
+        alpha = 1.0 if self.last_time is None else 1 - math.exp(-(now - self.last_time) / autotune_ewma_time)
+        self.last_time = now
+        for key in ("temp", "vrTemp", "hashRate"):
+            value = info.get(key)
+            if value is not None:
+                previous = self.smoothed.get(key, value)
+                self.smoothed[key] = previous + alpha * (value - previous)
+        reason = self.classify()
+        if reason != self.drift:
+            self.drift, self.drift_since = reason, now
+        if reason == "LIMIT" or (reason is not None and now - self.drift_since >= autotune_drift_time):
+            return reason
+        return None
+
+    def classify(self):
+        temp = self.smoothed.get("temp")
+        vr_temp = self.smoothed.get("vrTemp")
+        hashrate = self.smoothed.get("hashRate")
+        base_temp = self.baseline["averageTemperature"]
+        base_vr_temp = self.baseline.get("averageVRTemp")
+        if (temp is not None and temp >= self.max_temp) or (vr_temp is not None and vr_temp >= self.max_vr_temp):
+            return "LIMIT"
+        if temp is not None and temp >= base_temp + autotune_temp_drift:
+            return "HOTTER"
+        if vr_temp is not None and base_vr_temp is not None and vr_temp >= base_vr_temp + autotune_vr_temp_drift:
+            return "HOTTER"
+        if hashrate is not None and hashrate < self.baseline["averageHashRate"] * (1 - autotune_hashrate_drop):
+            return "HASHRATE_LOW"
+        if temp is not None and temp <= base_temp - autotune_temp_drift:
+            return "COOLER"
+        return None
+
+    def describe(self):
+        s, b = self.smoothed, self.baseline
+        text = f"T {s.get('temp', 0):.1f}°C (baseline {b['averageTemperature']:.1f})"
+        if s.get("vrTemp") is not None and b.get("averageVRTemp") is not None:
+            text += f" | VR {s['vrTemp']:.1f}°C (baseline {b['averageVRTemp']:.1f})"
+        return text + f" | H {s.get('hashRate', 0):.0f} GH/s (baseline {b['averageHashRate']:.0f})"
+
+class AutotuneDaemon:
+    """Keeps a finished session's device near its optimum as conditions drift."""
+
+    def __init__(self, session):
+        self.session = session
+        self.point = session.current_settings
+        self.baseline = next((r for r in session.results if (r["coreVoltage"], r["frequency"]) == self.point), None)
+        self.last_retune = None
+
+    def log(self, message, color=""):
+        self.session.log(message, color)
+
+    def record(self, event, **fields):
+        """Append one event to the autotune log."""
+        entry = {"ts": round(time.time(), 3), "event": event, "coreVoltage": self.point[0], "frequency": self.point[1]}
+        entry.update(fields)
+        try:
+            with open(autotune_filename(self.session.ip_address), "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+        except OSError as e:
+            self.log(f"Error writing autotune log: {e}", RED)
+
+    def run(self):
+        """Monitor and re-tune until a stop is requested; the device is left at the current point."""
+        s = self.session
+        if self.baseline is None:
+            self.log("Autotune: no measured baseline for the applied settings, not starting.", RED)
+            return
+        if s.telemetry is not None:
+            s.telemetry = TelemetryWriter(s.telemetry.filename)  # finalize() closed it
+        s.handling_interrupt = False
+        self.log(f"[AUTOTUNE] Watching {self.point[0]} mV @ {self.point[1]} MHz "
+                 f"(baseline {self.baseline['averageHashRate']:.0f} GH/s, {self.baseline['averageTemperature']:.1f}°C). "
+                 f"Press Ctrl+C to stop.", GREEN)
+        self.record("start", baseline=self.baseline)
+        try:
+            while self.baseline is not None:
+                reason = self.watch(DriftMonitor(self.baseline, s.config.max_temp, s.config.max_vr_temp))
+                self.retune(reason)
+        except BenchmarkInterrupted:
+            s.handling_interrupt = True
+            if s.current_settings != self.point:
+                self.log(f"Autotune stopped mid re-tune, restoring {self.point[0]} mV @ {self.point[1]} MHz.", YELLOW)
+                s.set_system_settings(*self.point)
+            self.log("Autotune stopped.", GREEN)
+            self.record("stop")
+        finally:
+            if s.telemetry is not None:
+                s.telemetry.close()
+            s.status["phase"] = "done"
+
+    def watch(self, monitor):
+        """Poll until a drift persists (and the cooldown has passed); returns its reason."""
+        s = self.session
+        s.status.update(phase="monitoring", voltage=self.point[0], frequency=self.point[1], sample=0, total_samples=0,
+                        combo=0, total_combos=0, remaining=0, message="")
+        last_log = s.clock()
+        while True:
+            s.sleep(autotune_poll_interval)
+            info = s.get_system_info()
+            if info is None:
+                continue
+            s.record_telemetry(info, "monitoring", *self.point)
+            s.status.update(hashRate=info.get("hashRate"), temp=info.get("temp"), vrTemp=info.get("vrTemp"),
+                            inputVoltage=info.get("voltage"), power=info.get("power"), lastSampleTime=time.time())
+            now = s.clock()
+            reason = monitor.add(now, info)
+            if now - last_log >= autotune_log_interval:
+                self.log(f"[MONITOR] {monitor.describe()}")
+                last_log = now
+            cooling_down = self.last_retune is not None and now - self.last_retune < autotune_cooldown
+            if reason == "LIMIT" or (reason is not None and not cooling_down):
+                self.log(f"[DRIFT] {reason}: {monitor.describe()}", YELLOW)
+                self.record("drift", reason=reason, smoothed=monitor.smoothed)
+                return reason
+
+    def neighbours(self, center, reason):
+        """Direct grid neighbours of center worth testing for this drift."""
+        s, config = self.session, self.session.config
+        v, f = center
+        known_unstable = {p for p, failure in s.failures.items() if failure["errorReason"] in INSTABILITY_REASONS}
+        points = []
+        for dv in (-config.voltage_step, 0, config.voltage_step):
+            for df in (-s.frequency_step, 0, s.frequency_step):
+                point = (v + dv, f + df)
+                if point == center or point in known_unstable:
+                    continue
+                if not (config.min_allowed_voltage <= point[0] <= config.max_allowed_voltage
+                        and config.min_allowed_frequency <= point[1] <= config.max_allowed_frequency):
+                    continue
+                if reason in ("LIMIT", "HOTTER") and power_proxy(point) >= power_proxy(center):
+                    continue
+                if reason == "COOLER" and power_proxy(point) <= power_proxy(center):
+                    continue
+                points.append(point)
+        # Coolest first when backing off, hottest first when climbing
+        return sorted(points, key=power_proxy, reverse=reason == "COOLER")
+
+    def measure(self, point):
+        """One short window at point; the result entry, or None if it failed."""
+        s = self.session
+        s.set_system_settings(*point)
+        hashrate, temp, efficiency, _, vr_temp, error_reason = s.benchmark_iteration(*point)
+        if hashrate is None or temp is None or efficiency is None:
+            self.log(f"[AUTOTUNE] {point[0]} mV @ {point[1]} MHz failed: {error_reason or 'instability'}", YELLOW)
+            self.record("measured", at=list(point), errorReason=error_reason or "UNKNOWN")
+            return None
+        result = s.build_result(point[0], point[1], hashrate, temp, efficiency, vr_temp)
+        self.record("measured", at=list(point), result=result)
+        return result
+
+    def passing(self, measured):
+        """Measured points that held, and lie inside the session's objective envelope if it has one."""
+        objective = self.session.objective
+        return {p: r for p, r in measured.items()
+                if r is not None and (objective is None or objective.violation(r) is None)}
+
+    def score(self, result):
+        """Higher is better: the session's objective (hashrate without one)."""
+        objective = self.session.objective
+        if objective is None:
+            return result["averageHashRate"]
+        return objective.value(result) if objective.maximize else -objective.value(result)
+
+    def gain(self, result, reference):
+        """Relative improvement on the session's objective (hashrate without one)."""
+        objective = self.session.objective
+        if objective is not None:
+            return objective.gain(result, reference)
+        return result["averageHashRate"] / reference["averageHashRate"] - 1
+
+    def retune(self, reason):
+        """Local search around the current point; switch with hysteresis, or fall back to the defaults."""
+        s = self.session
+        started = s.clock()
+        measure_time, s.measure_time = s.measure_time, autotune_measure_time
+        measure_phase, s.measure_phase = s.measure_phase, "retuning"  # kept apart from sweep windows in the telemetry
+        measured = {}
+        center = self.point
+        try:
+            for _ in range(autotune_max_rounds):
+                points = [p for p in self.neighbours(center, reason) if p not in measured]
+                if center not in measured and reason != "LIMIT":
+                    points.insert(0, center)  # re-measure under today's conditions first
+                if not points:
+                    break
+                s.status.update(combo=0, total_combos=len(points), remaining=len(points))
+                self.log(f"[AUTOTUNE] {reason}: testing {', '.join(f'{v}/{f}' for v, f in points)} "
+                         f"({autotune_measure_time}s windows)", YELLOW)
+                for point in points:
+                    s.status["combo"] += 1
+                    s.status["remaining"] -= 1
+                    measured[point] = self.measure(point)
+
+                passing = self.passing(measured)
+                if reason in ("LIMIT", "HOTTER"):
+                    # Backing off: only points a drift band below the limit count
+                    passing = {p: r for p, r in passing.items()
+                               if r["averageTemperature"] <= s.config.max_temp - autotune_temp_drift}
+                if not passing:
+                    # Nothing holds (with headroom): back off further from the coolest point tried
+                    center = min(points, key=power_proxy)
+                    reason = "LIMIT"
+                    continue
+                best = max(passing, key=lambda p: self.score(passing[p]))
+                center_result = measured.get(center)
+                if center_result is not None and (best == center or self.gain(passing[best], center_result)
+                                                  < autotune_hysteresis):
+                    break
+                center = best
+                if reason in ("LIMIT", "HOTTER"):
+                    break  # a passing cooler point is what was needed
+        finally:
+            s.measure_time = measure_time
+            s.measure_phase = measure_phase
+
+        passing = self.passing(measured)
+        if center not in passing and passing:
+            center = min(passing, key=power_proxy)  # out of rounds: the coolest point that held
+        elapsed = (s.clock() - started) / 60
+        self.last_retune = s.clock()
+        if center not in passing:
+            self.log(f"[AUTOTUNE] No stable point found in {elapsed:.0f} min; applying device defaults "
+                     f"{s.default_voltage} mV @ {s.default_frequency} MHz.", RED)
+            self.record("defaults", reason=reason)
+            self.point = (s.default_voltage, s.default_frequency)
+            s.set_system_settings(*self.point)
+            self.baseline = None  # nothing left to watch against
+            return
+        previous = self.point
+        self.point = center
+        self.baseline = passing[center]
+        if s.current_settings != center:
+            s.set_system_settings(*center)
+        if center == previous:
+            self.log(f"[AUTOTUNE] Keeping {center[0]} mV @ {center[1]} MHz after {len(measured)} windows "
+                     f"({elapsed:.0f} min); new baseline {self.baseline['averageHashRate']:.0f} GH/s, "
+                     f"{self.baseline['averageTemperature']:.1f}°C.", GREEN)
+            self.record("keep", reason=reason, windows=len(measured), minutes=round(elapsed, 1))
+        else:
+            self.log(f"[AUTOTUNE] Switched {previous[0]}/{previous[1]} -> {center[0]} mV @ {center[1]} MHz after "
+                     f"{len(measured)} windows ({elapsed:.0f} min): {self.baseline['averageHashRate']:.0f} GH/s, "
+                     f"{self.baseline['averageTemperature']:.1f}°C.", GREEN)
+            self.record("switch", reason=reason, previous=list(previous), windows=len(measured),
+                        minutes=round(elapsed, 1), result=self.baseline)
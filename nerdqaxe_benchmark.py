@@ -1,84 +1,43 @@
 # =============================================================
 #                      IMPORTS & TERMINAL COLORS
 # =============================================================
-import requests
-import time
-import json
+# requests, numpy and the modules built on them are imported where a running
+# session first needs them: importing this module, parsing arguments and the
+# offline subcommands stay light and never touch the network.
+import argparse
+import copy
+import queue
 import signal
+import sqlite3
 import sys
-import argparse
-import os
+import threading
+import time
+from collections import Counter
+
+from nerdqaxe_journal import ResultJournal
+from nerdqaxe_objective import OBJECTIVES, Objective
+from nerdqaxe_profile import PhaseProfiler, combo_profile, format_duration, phase_breakdown
+from nerdqaxe_stats import P2Quantile, RunningStats, TrimmedStats
+from nerdqaxe_store import ResultStore, default_store_filename, describe_identity, device_identity
+from nerdqaxe_telemetry import TelemetryWriter, telemetry_filename
 
 GREEN = "\033[92m"
 YELLOW = "\033[93m"
 RED = "\033[91m"
 RESET = "\033[0m"
 
-# =============================================================
-#                        ARGUMENT PARSING
-# =============================================================
-def parse_arguments():
-    parser = argparse.ArgumentParser(description='Bitaxe Hashrate Benchmark Tool')
-    parser.add_argument('nerdqaxe_ip', nargs='?', help='IP address of the Bitaxe (e.g., 192.168.2.26)')
-    parser.add_argument('-v', '--voltage', type=int, default=1150,
-                        help='Initial voltage in mV (default: 1150)')
-    parser.add_argument('-f', '--frequency', type=int, default=600,
-                        help='Initial frequency in MHz (default: 600)')
-    parser.add_argument('--resume', action='store_true', help='Resume from previous benchmark results')
-    parser.add_argument('--fine', action='store_true', help='Use fine-grained frequency stepping')
-
-    if len(sys.argv) == 1:
-        parser.print_help()
-        sys.exit(1)
-
-    return parser.parse_args()
-
-# =============================================================
-#                              SETUP
-# =============================================================
-args = parse_arguments()
-
-# Setup file names for results and backups
-from datetime import datetime
-ip_address = args.nerdqaxe_ip
-resume_filename = f"nerdqaxe_benchmark_results_{ip_address}.json"
-timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-backup_filename = f"{resume_filename}.{timestamp}.bak"
-
-# Create backup if existing results file is found
-if os.path.exists(resume_filename):
-    try:
-        import shutil
-        shutil.copy2(resume_filename, backup_filename)
-        print(GREEN + f"Backup created: {backup_filename}" + RESET)
-    except Exception as e:
-        print(RED + f"Failed to create backup file: {e}" + RESET)
-
-# Automatically activate resume if file exists
-if not args.resume and os.path.exists(resume_filename):
-    print(YELLOW + f"Found existing results for {ip_address}, automatically resuming..." + RESET)
-    args.resume = True
-
-# Fine tuning requires resume mode
-if args.fine and not args.resume:
-    print(YELLOW + "--fine mode requires previous results. Automatically enabling --resume." + RESET)
-    args.resume = True
-
-# Define target device and initial parameters
-nerdqaxe_ip = f"http://{ip_address}"
-initial_voltage = args.voltage
-initial_frequency = args.frequency
-
 # =============================================================
 #                    BENCHMARK CONFIGURATION
 # =============================================================
 # Step sizes used for building the full grid
 voltage_step = 10
-frequency_step = 10 if args.fine else 20
+frequency_step = 20
+fine_frequency_step = 10
 
 # Benchmark timing and limits
 benchmark_time = 1200
-sample_interval = 15
+sample_interval = 15              # reference spacing: trims, guards and log lines are defined per 15 s sample
+poll_interval = 5                 # background sampler rate during measurement (--poll-interval)
 max_temp = 68
 max_allowed_voltage = 1200
 max_allowed_frequency = 750
@@ -87,379 +46,1840 @@ min_input_voltage = 11600
 max_input_voltage = 12000
 max_power = 100
 
-# Hardware info (filled from device)
-small_core_count = None
-asic_count = None
+# Outlier trimming per window, in reference samples (scaled to the poll rate)
+hashrate_trim_samples = 3         # lowest and highest hashrate samples dropped
+temperature_warmup_samples = 6    # lowest temperature samples dropped (warm-up)
+
+# Sequential early stopping (--early-stop); the minimum keeps the [3:-3] / [6:] trimming meaningful
+early_stop_min_samples = 20
+
+# Post-restart stabilization detection (settle_max_time is the hard ceiling)
+settle_max_time = 600
+settle_min_time = 90
+settle_poll_interval = 15
+settle_window = 6
+settle_max_temp_slope = 0.3       # °C per minute (chip and VR)
+settle_max_hashrate_slope = 0.01  # relative change per minute
+settle_max_hashrate_cv = 0.10     # coefficient of variation within window
+
+# Predictive early abort (first-order trend projection of temperatures and power)
+predict_min_samples = 8           # snapshots of the current combo before projecting
+predict_history = 40              # most recent snapshots used for the fit
+predict_z = 3.0                   # one-sided z of the lower bound on the projected steady state
+predict_min_tau = 20              # seconds; range of thermal time constants considered
+predict_max_tau = 1200
+predict_tau_count = 40
+hashrate_collapse_fraction = 0.5  # abort once the median hashrate is below this share of expected
+hashrate_collapse_min_samples = 8
+
+# Warm start (--warm-start): fleet points tried first by adaptive search, per objective
+warm_start_seed_points = 4
 
 # Hard bounds for grid
 min_allowed_voltage = 1120
 min_allowed_frequency = 500
 
 # =============================================================
-#                        VALIDATION
+#                        ARGUMENT PARSING
 # =============================================================
-if initial_voltage > max_allowed_voltage:
-    raise ValueError(RED + f"Error: Initial voltage exceeds the maximum allowed value of {max_allowed_voltage}mV." + RESET)
-if initial_frequency > max_allowed_frequency:
-    raise ValueError(RED + f"Error: Initial frequency exceeds the maximum allowed value of {max_allowed_frequency}MHz." + RESET)
-if initial_voltage < min_allowed_voltage:
-    raise ValueError(RED + f"Error: Initial voltage is below the minimum allowed value of {min_allowed_voltage}mV." + RESET)
-if initial_frequency < min_allowed_frequency:
-    raise ValueError(RED + f"Error: Initial frequency is below the minimum allowed value of {min_allowed_frequency}MHz." + RESET)
-if benchmark_time / sample_interval < 7:
-    raise ValueError(RED + "Error: Benchmark time is too short. At least 7 samples are required." + RESET)
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Bitaxe Hashrate Benchmark Tool')
+    parser.add_argument('nerdqaxe_ip', nargs='?', help='IP address of the Bitaxe (e.g., 192.168.2.26)')
+    parser.add_argument('-v', '--voltage', type=int, default=1150,
+                        help='Initial voltage in mV (default: 1150)')
+    parser.add_argument('-f', '--frequency', type=int, default=600,
+                        help='Initial frequency in MHz (default: 600)')
+    parser.add_argument('--resume', action='store_true', help='Resume from previous benchmark results')
+    parser.add_argument('--fine', action='store_true', help='Use fine-grained frequency stepping')
+    parser.add_argument('--early-stop', action='store_true',
+                        help='End a measurement window once hashrate and efficiency estimates have converged')
+    parser.add_argument('--ci-width', type=float, default=0.02,
+                        help='Relative 95%% confidence interval width that ends a window in --early-stop mode (default: 0.02)')
+    parser.add_argument('--search', choices=sorted(SEARCH_STRATEGIES), default='grid',
+                        help='grid: test every V/F combination; adaptive: model-guided search for the top hashrate and J/TH points (default: grid)')
+    parser.add_argument('--reducer', choices=sorted(REDUCERS), default='trimmed',
+                        help='How a window\'s hashrate samples are averaged: trimmed mean or median (default: trimmed)')
+    parser.add_argument('--order', choices=['distance', 'settle'], default='settle',
+                        help='Grid order within each priority tier: distance from the initial pair, or the path with the '
+                             'least expected settle time, learned from recorded settle durations (default: settle)')
+    parser.add_argument('--live-apply', action='store_true',
+                        help='Skip the restart for steps of at most 10 mV / 20 MHz (firmware must apply settings live)')
+    parser.add_argument('--ei-threshold', type=float, default=0.002,
+                        help='Adaptive search stops when the best relative expected improvement falls below this value (default: 0.002)')
+    parser.add_argument('--no-predict', action='store_true',
+                        help='Only abort a combo once a limit is actually reached, not when the trend projects it')
+    parser.add_argument('--ambient', type=float,
+                        help='Current ambient temperature in °C; stored with failures so thermal failures are retried once it drops')
+    parser.add_argument('--retry-failures', action='store_true',
+                        help='On resume, retest every previously failed combo regardless of the retry policy')
+    parser.add_argument('--no-telemetry', action='store_true',
+                        help='Do not record raw telemetry samples to nerdqaxe_telemetry_<ip>.jsonl')
+    parser.add_argument('--poll-interval', type=float, default=poll_interval,
+                        help=f'Seconds between telemetry samples while measuring, at most {sample_interval} '
+                             f'(default: {poll_interval})')
+    parser.add_argument('--store', nargs='?', const=default_store_filename, metavar='DB',
+                        help=f'Also record results in a SQLite fleet store (default file: {default_store_filename})')
+    parser.add_argument('--warm-start', action='store_true',
+                        help='Seed the search from other units of the same model in the store (requires --store)')
+    parser.add_argument('--daemon', action='store_true',
+                        help='After the sweep, keep watching the device and re-tune around the applied settings when '
+                             'temperature or hashrate drift (runs until Ctrl+C)')
+    parser.add_argument('--metrics-port', type=int,
+                        help='Serve Prometheus metrics for all benchmarked devices on this port at /metrics')
+    parser.add_argument('--metrics-host', default='0.0.0.0',
+                        help='Address the metrics endpoint binds to (default: 0.0.0.0)')
+    parser.add_argument('--connect-timeout', type=float, default=3.05,
+                        help='Seconds to wait for the device to accept a connection (default: 3.05)')
+    parser.add_argument('--read-timeout', type=float, default=20.0,
+                        help='Seconds to wait for a device response (default: 20)')
+    parser.add_argument('--time-scale', type=float, default=1.0,
+                        help='Divide all waits by this factor; only for use with nerdqaxe_simulator.py --accel (default: 1)')
+    parser.add_argument('--fleet', metavar='IPS_OR_FILE',
+                        help='Benchmark several devices concurrently: comma-separated IPs or a file with one IP per line')
+    parser.add_argument('--objective', choices=sorted(OBJECTIVES),
+                        help='Optimize one figure instead of mapping the whole grid: max-hashrate or min-jth. The search '
+                             'order, what gets skipped and the applied setting follow it (default with a constraint: max-hashrate)')
+    parser.add_argument('--power-cap', type=float, metavar='W',
+                        help='Objective constraint: average power at most this many watts')
+    parser.add_argument('--temp-margin', type=float, default=0.0, metavar='C',
+                        help='Objective constraint: chip and VR temperature at least this many °C below their limits')
+    parser.add_argument('--min-hashrate', type=float, metavar='GH/s',
+                        help='Objective constraint: average hashrate at least this')
+    parser.add_argument('--shard', action='store_true',
+                        help='With --fleet of identical units: split one V/F grid across them (shared calibration combos, '
+                             'work stealing) and merge a model-level map; with --fine, refine every unit from that map')
+    parser.add_argument('--plan', action='store_true',
+                        help='Only estimate how long the run would take (grid, --fine, resume state and recorded combo '
+                             'timings); no device is contacted')
+
+    if len(sys.argv) == 1:
+        parser.print_help()
+        sys.exit(1)
+
+    args = parser.parse_args()
+    if not args.nerdqaxe_ip and not args.fleet:
+        parser.error("either nerdqaxe_ip or --fleet is required")
+    return args
 
 # =============================================================
-#                      RESUME HANDLING
+#                    ENGINE CONFIGURATION
 # =============================================================
-results = []
-tested_combinations = set()
-default_voltage = None
-default_frequency = None
-handling_interrupt = False
-system_reset_done = False
-
-resume_filename = f"nerdqaxe_benchmark_results_{args.nerdqaxe_ip}.json"
-if args.resume and os.path.exists(resume_filename):
-    with open(resume_filename, "r") as f:
-        try:
-            resume_data = json.load(f)
-            # Support both legacy array and new dict format
-            resume_results = resume_data["all_results"] if isinstance(resume_data, dict) and "all_results" in resume_data else resume_data
-            for entry in resume_results:
-                tested_combinations.add((entry["coreVoltage"], entry["frequency"]))
-            print(GREEN + f"Resuming benchmark. Loaded {len(tested_combinations)} tested combinations." + RESET)
-            results.extend(resume_results)
-        except Exception as e:
-            print(RED + f"Error loading resume data: {e}" + RESET)
+# Tunables a config copies when it is created; each session then runs with
+# its own values, so sessions with different limits or grids can share one
+# interpreter without patching this module.
+CONFIG_LIMITS = ("voltage_step", "frequency_step", "fine_frequency_step", "benchmark_time",
+                 "max_temp", "max_vr_temp", "max_power", "min_input_voltage", "max_input_voltage",
+                 "min_allowed_voltage", "max_allowed_voltage", "min_allowed_frequency", "max_allowed_frequency")
+
+class BenchmarkConfig:
+    """Run options, limits and grid bounds of a benchmark session.
+
+    search and reducer are a name from SEARCH_STRATEGIES / REDUCERS or a
+    factory with the same signature. Limits and grid bounds (CONFIG_LIMITS)
+    default to the module tunables at the time the config is created.
+    """
+
+    def __init__(self, initial_voltage=1150, initial_frequency=600, resume=False, fine=False, early_stop=False,
+                 ci_width=0.02, search="grid", reducer="trimmed", ei_threshold=0.002, telemetry=True, time_scale=1.0,
+                 ambient=None, retry_failures=False, predict=True, order="settle", live_apply=False,
+                 poll_interval=poll_interval, connect_timeout=3.05, read_timeout=20, store=None, warm_start=False,
+                 daemon=False, objective=None, power_cap=None, temp_margin=0.0, min_hashrate=None, **limits):
+        unknown = sorted(set(limits) - set(CONFIG_LIMITS))
+        if unknown:
+            raise TypeError(f"Unknown benchmark option(s): {', '.join(unknown)}")
+        self.initial_voltage = initial_voltage
+        self.initial_frequency = initial_frequency
+        self.resume = resume
+        self.fine = fine
+        self.early_stop = early_stop
+        self.ci_width = ci_width
+        self.search = search
+        self.reducer = reducer
+        self.ei_threshold = ei_threshold
+        self.telemetry = telemetry
+        self.time_scale = time_scale
+        self.ambient = ambient
+        self.retry_failures = retry_failures
+        self.predict = predict
+        self.order = order
+        self.live_apply = live_apply
+        self.poll_interval = poll_interval
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.store = store
+        self.warm_start = warm_start
+        self.daemon = daemon
+        self.objective = objective
+        self.power_cap = power_cap
+        self.temp_margin = temp_margin
+        self.min_hashrate = min_hashrate
+        for name in CONFIG_LIMITS:
+            setattr(self, name, limits.get(name, globals()[name]))
+
+    @classmethod
+    def from_args(cls, args):
+        """Config from parsed command line arguments."""
+        return cls(initial_voltage=args.voltage, initial_frequency=args.frequency, resume=args.resume, fine=args.fine,
+                   early_stop=args.early_stop, ci_width=args.ci_width, search=args.search, reducer=args.reducer,
+                   ei_threshold=args.ei_threshold, telemetry=not args.no_telemetry, time_scale=args.time_scale,
+                   ambient=args.ambient, retry_failures=args.retry_failures, predict=not args.no_predict,
+                   order=args.order, live_apply=args.live_apply, poll_interval=args.poll_interval,
+                   connect_timeout=args.connect_timeout, read_timeout=args.read_timeout, store=args.store,
+                   warm_start=args.warm_start, daemon=args.daemon, objective=args.objective,
+                   power_cap=args.power_cap, temp_margin=args.temp_margin, min_hashrate=args.min_hashrate)
+
+    def replace(self, **changes):
+        """Copy of this config with some options changed."""
+        config = copy.copy(self)
+        for name, value in changes.items():
+            if not hasattr(config, name):
+                raise TypeError(f"Unknown benchmark option: {name}")
+            setattr(config, name, value)
+        return config
+
+    def limits(self):
+        """(max chip temperature, max VR temperature, max power) as used by the guards and the searches."""
+        return self.max_temp, self.max_vr_temp, self.max_power
+
+    def target(self):
+        """The Objective to optimize, or None; a constraint without an objective means max-hashrate."""
+        name = self.objective
+        if name is None and (self.power_cap is not None or self.temp_margin or self.min_hashrate is not None):
+            name = "max-hashrate"
+        if name is None:
+            return None
+        return Objective(name, self.limits(), power_cap=self.power_cap, temp_margin=self.temp_margin,
+                         min_hashrate=self.min_hashrate)
+
+    def grid_frequency_step(self):
+        return self.fine_frequency_step if self.fine else self.frequency_step
+
+    def validate(self):
+        """Reject initial settings and options outside the configured bounds."""
+        if self.initial_voltage > self.max_allowed_voltage:
+            raise ValueError(RED + f"Error: Initial voltage exceeds the maximum allowed value of {self.max_allowed_voltage}mV." + RESET)
+        if self.initial_frequency > self.max_allowed_frequency:
+            raise ValueError(RED + f"Error: Initial frequency exceeds the maximum allowed value of {self.max_allowed_frequency}MHz." + RESET)
+        if self.initial_voltage < self.min_allowed_voltage:
+            raise ValueError(RED + f"Error: Initial voltage is below the minimum allowed value of {self.min_allowed_voltage}mV." + RESET)
+        if self.initial_frequency < self.min_allowed_frequency:
+            raise ValueError(RED + f"Error: Initial frequency is below the minimum allowed value of {self.min_allowed_frequency}MHz." + RESET)
+        if self.benchmark_time / sample_interval < 7:
+            raise ValueError(RED + "Error: Benchmark time is too short. At least 7 samples are required." + RESET)
+        if self.ci_width <= 0:
+            raise ValueError(RED + "Error: --ci-width must be greater than zero." + RESET)
+        if self.time_scale <= 0:
+            raise ValueError(RED + "Error: --time-scale must be greater than zero." + RESET)
+        if self.ei_threshold <= 0:
+            raise ValueError(RED + "Error: --ei-threshold must be greater than zero." + RESET)
+        if not 0 < self.poll_interval <= sample_interval:
+            raise ValueError(RED + f"Error: --poll-interval must be greater than zero and at most {sample_interval}s." + RESET)
+        if self.connect_timeout <= 0 or self.read_timeout <= 0:
+            raise ValueError(RED + "Error: --connect-timeout and --read-timeout must be greater than zero." + RESET)
+        if self.warm_start and not self.store:
+            raise ValueError(RED + "Error: --warm-start requires --store." + RESET)
+        if not callable(self.search) and self.search not in SEARCH_STRATEGIES:
+            raise ValueError(RED + f"Error: Unknown search strategy '{self.search}'." + RESET)
+        if not callable(self.reducer) and self.reducer not in REDUCERS:
+            raise ValueError(RED + f"Error: Unknown reducer '{self.reducer}'." + RESET)
+        if self.objective is not None and self.objective not in OBJECTIVES:
+            raise ValueError(RED + f"Error: Unknown objective '{self.objective}'." + RESET)
+        if self.power_cap is not None and self.power_cap <= 0:
+            raise ValueError(RED + "Error: --power-cap must be greater than zero." + RESET)
+        if not 0 <= self.temp_margin < self.max_temp:
+            raise ValueError(RED + "Error: --temp-margin must be between zero and the chip temperature limit." + RESET)
+        if self.min_hashrate is not None and self.min_hashrate <= 0:
+            raise ValueError(RED + "Error: --min-hashrate must be greater than zero." + RESET)
+
+def validate_arguments(args):
+    """Command line checks beyond the session config."""
+    if args.metrics_port is not None and not 0 < args.metrics_port < 65536:
+        raise ValueError(RED + "Error: --metrics-port must be between 1 and 65535." + RESET)
+    if args.shard:
+        if not args.fleet:
+            raise ValueError(RED + "Error: --shard requires --fleet." + RESET)
+        if args.objective or args.power_cap is not None or args.temp_margin or args.min_hashrate is not None:
+            raise ValueError(RED + "Error: --shard maps the whole grid and cannot be combined with an objective." + RESET)
+        if args.search != "grid" or args.warm_start:
+            raise ValueError(RED + "Error: --shard runs its own grid sweep; drop --search and --warm-start." + RESET)
 
 # =============================================================
-#                    SYSTEM INTERACTION
+#                 STABILIZATION DETECTION
 # =============================================================
-def fetch_default_settings():
-    """Query device for defaults and core configuration."""
-    global default_voltage, default_frequency, small_core_count, asic_count
-    try:
-        response = requests.get(f"{nerdqaxe_ip}/api/system/info", timeout=20)
-        response.raise_for_status()
-        system_info = response.json()
-        default_voltage = system_info.get("coreVoltage", 1150)  # Fallback to 1150 if not found
-        default_frequency = system_info.get("frequency", 600)   # Fallback to 600 if not found
-        small_core_count = system_info.get("smallCoreCount", 0)
-        asic_count = system_info.get("asicCount", 0)
-        print(GREEN + f"Current settings determined:\n"
-                      f"  Core Voltage: {default_voltage}mV\n"
-                      f"  Frequency: {default_frequency}MHz\n"
-                      f"  ASIC Configuration: {small_core_count * asic_count} total cores" + RESET)
-    except requests.exceptions.RequestException as e:
-        print(RED + f"Error fetching default system settings: {e}. Using fallback defaults." + RESET)
-        default_voltage = 1150
-        default_frequency = 600
-        small_core_count = 0
-        asic_count = 0
-
-system_reset_done = False
+def fit_slope(times, values):
+    """Least-squares slope of values over times, plus its standard error."""
+    n = len(values)
+    mean_t = sum(times) / n
+    mean_v = sum(values) / n
+    sxx = sum((t - mean_t) ** 2 for t in times)
+    if n < 3 or sxx == 0:
+        return 0.0, float("inf")
+    slope = sum((t - mean_t) * (v - mean_v) for t, v in zip(times, values)) / sxx
+    residuals = sum((v - mean_v - slope * (t - mean_t)) ** 2 for t, v in zip(times, values))
+    return slope, (residuals / (n - 2) / sxx) ** 0.5
+
+def is_converged(times, values, max_slope):
+    """True if the trend is below max_slope (per minute) or not distinguishable from noise."""
+    slope, slope_err = fit_slope(times, values)
+    return abs(slope) <= max(max_slope, 2 * slope_err)
+
+def is_stabilized(window):
+    """Check a sliding window of (minutes, info) snapshots for hashrate/temperature convergence."""
+    times = [t for t, _ in window]
+    hash_rates = [info.get("hashRate") or 0 for _, info in window]
+    temps = [info.get("temp") for _, info in window]
+    vr_temps = [info.get("vrTemp") for _, info in window]
+
+    if min(hash_rates) <= 0 or None in temps:
+        return False
+
+    mean_hashrate = sum(hash_rates) / len(hash_rates)
+    variance = sum((h - mean_hashrate) ** 2 for h in hash_rates) / (len(hash_rates) - 1)
+    if variance ** 0.5 / mean_hashrate > settle_max_hashrate_cv:
+        return False
+
+    relative_hash_rates = [h / mean_hashrate for h in hash_rates]
+    if not is_converged(times, relative_hash_rates, settle_max_hashrate_slope):
+        return False
+    if not is_converged(times, temps, settle_max_temp_slope):
+        return False
+    if None not in vr_temps and min(vr_temps) > 0 and not is_converged(times, vr_temps, settle_max_temp_slope):
+        return False
+    return True
 
 # =============================================================
-#             FINE-TUNE FUNCTION FOR TOP PERFORMERS
+#                  SEQUENTIAL STATISTICS
 # =============================================================
-def fine_tune_top_performers(top_results):
-    """Local 3x3 grid around each top performer."""
-    print(GREEN + "\n[FINE] Starting fine-tuning phase on top performers..." + RESET)
-    fine_voltage_step = 5
-    fine_frequency_step = 10
-
-    total_tasks = len(top_results) * 9  # 3x3 grid per top result
-    current_task = 1
-
-    for entry in top_results:
-        base_voltage = entry["coreVoltage"]
-        base_frequency = entry["frequency"]
-
-        for dv in [-fine_voltage_step, 0, fine_voltage_step]:
-            for df in [-fine_frequency_step, 0, fine_frequency_step]:
-                new_voltage = base_voltage + dv
-                new_frequency = base_frequency + df
-
-                if (new_voltage, new_frequency) in tested_combinations:
-                    continue
-                if not (min_allowed_voltage <= new_voltage <= max_allowed_voltage):
-                    continue
-                if not (min_allowed_frequency <= new_frequency <= max_allowed_frequency):
-                    continue
-
-                print(YELLOW + f"[{current_task}/{total_tasks}] [FINE] Testing: {new_voltage}mV @ {new_frequency}MHz" + RESET)
-                current_task += 1
-                set_system_settings(new_voltage, new_frequency)
-                avg_hashrate, avg_temp, efficiency_jth, hashrate_within_tolerance, avg_vr_temp, error_reason = benchmark_iteration(new_voltage, new_frequency)
-
-                if avg_hashrate and avg_temp and efficiency_jth:
-                    result = {
-                        "coreVoltage": new_voltage,
-                        "frequency": new_frequency,
-                        "averageHashRate": avg_hashrate,
-                        "averageTemperature": avg_temp,
-                        "efficiencyJTH": efficiency_jth
-                    }
-                    if avg_vr_temp is not None:
-                        result["averageVRTemp"] = avg_vr_temp
-
-                    results.append(result)
-                    tested_combinations.add((new_voltage, new_frequency))
-                else:
-                    print(YELLOW + f"[FINE] Skipping unstable result at {new_voltage}mV @ {new_frequency}MHz" + RESET)
+def t_quantile(df):
+    """Approximate two-sided 95% Student-t quantile for df degrees of freedom."""
+    z = 1.959964
+    return z + (z ** 3 + z) / (4 * df) + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * df ** 2)
+
+def autocorrelation_inflation(stats):
+    """Factor widening an i.i.d. standard error for lag-1 autocorrelated samples."""
+    return (stats.count / stats.effective_count()) ** 0.5 if stats.count else 1.0
+
+def window_confidence(hashrate, hashrate_stats, power_stats, trim):
+    """Trimmed-mean hashrate and the relative 95% CI widths of it and of the derived J/TH efficiency.
+
+    The hashrate CI uses the Tukey-McLaughlin winsorized standard error;
+    both widths account for autocorrelation of closely spaced samples.
+    """
+    n = hashrate.count
+    if n <= 2 * trim + 1:
+        trim = 0
+    kept = n - 2 * trim
+    average_hashrate = hashrate.trimmed_mean(trim, trim)
+    if n < 3 or average_hashrate <= 0:
+        return average_hashrate, float("inf"), float("inf")
+    standard_error = hashrate.winsorized_variance(trim) ** 0.5 / ((kept / n) * n ** 0.5)
+    hashrate_ci = 2 * t_quantile(kept - 1) * standard_error * autocorrelation_inflation(hashrate_stats) / average_hashrate
+    power_ci = (2 * t_quantile(n - 1) * power_stats.std / n ** 0.5 * autocorrelation_inflation(power_stats)
+                / power_stats.mean) if power_stats.mean > 0 else float("inf")
+    efficiency_ci = (hashrate_ci ** 2 + power_ci ** 2) ** 0.5
+    return average_hashrate, hashrate_ci, efficiency_ci
 
 # =============================================================
-#                      SIGNAL HANDLING
+#                     WINDOW REDUCERS
 # =============================================================
-def handle_sigint(signum, frame):
-    """On Ctrl+C, apply best known settings and save."""
-    global system_reset_done, handling_interrupt
+# A reducer turns the samples of one measurement window into the averages a
+# result stores. The session creates one per window with reducer(session),
+# feeds it every sample that passed the guards, and asks it for:
+#
+#   count               samples added so far
+#   median_hashrate()   running median, for the hashrate-collapse guard
+#   confidence()        relative 95% CI widths of hashrate and J/TH (--early-stop)
+#   reduce()            dict with averageHashRate, averageTemperature,
+#                       averageVRTemp (or None), averagePower and "stats"
+#                       (sampleCount, pollInterval, CI widths, hashRateP05,
+#                       maxTemperature, stored with the result); None if
+#                       nothing was collected
+#
+# Custom reducers usually subclass TrimmedMeanReducer and override
+# average_hashrate().
+class TrimmedMeanReducer:
+    """Default reducer: trimmed-mean hashrate, warm-up-trimmed temperatures, mean power.
+
+    Streaming statistics only, so memory per window is constant.
+    """
+
+    def __init__(self, session):
+        self.poll_interval = session.config.poll_interval
+        self.hashrate_trim = session.samples_for(hashrate_trim_samples)
+        self.temperature_warmup = session.samples_for(temperature_warmup_samples)
+        self.hash_rates = TrimmedStats(self.hashrate_trim)
+        self.hashrate_stats = RunningStats()
+        self.hashrate_median = P2Quantile(0.5)
+        self.hashrate_low = P2Quantile(0.05)
+        self.temperatures = TrimmedStats(self.temperature_warmup)
+        self.temperature_stats = RunningStats()
+        self.vr_temps = TrimmedStats(self.temperature_warmup)
+        self.power = RunningStats()
+
+    @property
+    def count(self):
+        return self.hashrate_stats.count
+
+    def add(self, hash_rate, temp, vr_temp, power):
+        self.hash_rates.add(hash_rate)
+        self.hashrate_stats.add(hash_rate)
+        self.hashrate_median.add(hash_rate)
+        self.hashrate_low.add(hash_rate)
+        self.temperatures.add(temp)
+        self.temperature_stats.add(temp)
+        self.power.add(power)
+        if vr_temp is not None and vr_temp > 0:
+            self.vr_temps.add(vr_temp)
 
-    if handling_interrupt or system_reset_done:
-        return
+    def median_hashrate(self):
+        return self.hashrate_median.value()
 
-    handling_interrupt = True
-    print(RED + "Benchmarking interrupted by user." + RESET)
+    def confidence(self):
+        _, hashrate_ci, efficiency_ci = window_confidence(self.hash_rates, self.hashrate_stats, self.power,
+                                                          self.hashrate_trim)
+        return hashrate_ci, efficiency_ci
 
-    try:
-        if results:
-            reset_to_best_setting()
-            save_results()
-            print(GREEN + "Bitaxe reset to best or default settings and results saved." + RESET)
-        else:
-            print(YELLOW + "No valid benchmarking results found. Applying predefined default settings." + RESET)
-            set_system_settings(default_voltage, default_frequency)
-    finally:
-        system_reset_done = True
-        handling_interrupt = False
-        sys.exit(0)
+    def average_hashrate(self):
+        # Trim outliers from hashrate
+        trim = self.hashrate_trim if self.hash_rates.count > 2 * self.hashrate_trim else 0
+        return self.hash_rates.trimmed_mean(trim, trim)
 
-signal.signal(signal.SIGINT, handle_sigint)
+    def reduce(self):
+        if not (self.hash_rates.count and self.temperatures.count and self.power.count):
+            return None
+        # Trim warmup from temps
+        warmup = self.temperature_warmup if self.temperatures.count > self.temperature_warmup else 0
+        average_vr_temp = None
+        if self.vr_temps.count:
+            vr_warmup = self.temperature_warmup if self.vr_temps.count > self.temperature_warmup else 0
+            average_vr_temp = self.vr_temps.trimmed_mean(vr_warmup, 0)
+        hashrate_ci, efficiency_ci = self.confidence()
+        return {
+            "averageHashRate": self.average_hashrate(),
+            "averageTemperature": self.temperatures.trimmed_mean(warmup, 0),
+            "averageVRTemp": average_vr_temp,
+            "averagePower": self.power.mean,
+            "stats": {
+                "sampleCount": self.hash_rates.count,
+                "pollInterval": self.poll_interval,
+                "hashrateCIWidth": hashrate_ci,
+                "efficiencyCIWidth": efficiency_ci,
+                "hashRateP05": self.hashrate_low.value(),
+                "maxTemperature": self.temperature_stats.maximum,
+            },
+        }
 
-def get_system_info():
-    """Fetch one snapshot of telemetry from device, with retries."""
-    retries = 3
-    for attempt in range(retries):
-        try:
-            response = requests.get(f"{nerdqaxe_ip}/api/system/info", timeout=20)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.Timeout:
-            print(YELLOW + f"Timeout while fetching system info. Attempt {attempt + 1} of {retries}." + RESET)
-        except requests.exceptions.ConnectionError:
-            print(RED + f"Connection error while fetching system info. Attempt {attempt + 1} of {retries}." + RESET)
-        except requests.exceptions.RequestException as e:
-            print(RED + f"Error fetching system info: {e}" + RESET)
-            break
-        time.sleep(5)
-    return None
+class MedianReducer(TrimmedMeanReducer):
+    """Median hashrate instead of the trimmed mean: robust to share-luck spikes on short windows.
+
+    The CI widths stay those of the trimmed mean.
+    """
+
+    def average_hashrate(self):
+        return self.hashrate_median.value()
+
+REDUCERS = {"trimmed": TrimmedMeanReducer, "median": MedianReducer}
+
+# =============================================================
+#                    TREND PREDICTION
+# =============================================================
+def fit_first_order(times, values, z):
+    """Fit v(t) = c + d * exp(-t / tau) over a grid of time constants.
+
+    Returns (c, lower bound of c, tau) for the best fit; c is the projected
+    steady state. The lower bound is c - z * standard error, minimized over
+    every tau whose fit is not significantly worse than the best one, so an
+    uncertain time constant widens the bound. None if there is too little data.
+    """
+    import numpy as np
+
+    n = len(values)
+    if n < 4:
+        return None
+    times = np.asarray(times, dtype=float)
+    values = np.asarray(values, dtype=float)
+    taus = np.geomspace(predict_min_tau, predict_max_tau, predict_tau_count)
+
+    # One least-squares line per tau, all at once: rows are taus
+    x = np.exp(-(times - times[0])[None, :] / taus[:, None])
+    mean_x = x.mean(axis=1)
+    centered = x - mean_x[:, None]
+    sxx = (centered ** 2).sum(axis=1)
+    valid = sxx > 1e-12
+    if not valid.any():
+        return None
+    sxx = np.where(valid, sxx, 1.0)
+    d = centered @ (values - values.mean()) / sxx
+    c = values.mean() - d * mean_x
+    sse = np.where(valid, ((values[None, :] - c[:, None] - d[:, None] * x) ** 2).sum(axis=1), np.inf)
+    best = int(np.argmin(sse))
+
+    # Standard error of the intercept, i.e. of the value at x = exp(-inf) = 0
+    standard_error = np.sqrt(sse / (n - 2) * (1 / n + mean_x ** 2 / sxx))
+    plausible = sse <= sse[best] * (1 + z * z / max(n - 3, 1))
+    lower_bound = float(np.min((c - z * standard_error)[plausible]))
+    return float(c[best]), lower_bound, float(taus[best])
+
+class TrendPredictor:
+    """Projects chip/VR temperature and power of the current combo to steady state."""
+
+    def __init__(self, limits=None):
+        self.limits = limits or (max_temp, max_vr_temp, max_power)  # chip temperature, VR temperature, power
+        self.samples = []  # (device seconds, info)
+        self.projection = None  # (field, steady state, lower bound) of the last predicted failure
+
+    def add(self, seconds, info):
+        if not info.get("hashRate"):  # ignore snapshots while the device is still booting
+            return False
+        if self.samples and seconds - self.samples[-1][0] < 0.9 * sample_interval:
+            return False  # fits are tuned for reference spacing; faster polls add cost, not information
+        self.samples.append((seconds, info))
+        del self.samples[:-predict_history]
+        return True
+
+    def check(self):
+        """Reason code if a limit is projected to be crossed with predict_z confidence, else None."""
+        checks = [
+            ("temp", "CHIP_TEMP_EXCEEDED", "PREDICTED_CHIP_TEMP_EXCEEDED"),
+            ("vrTemp", "VR_TEMP_EXCEEDED", "PREDICTED_VR_TEMP_EXCEEDED"),
+            ("power", "POWER_CONSUMPTION_EXCEEDED", "PREDICTED_POWER_EXCEEDED"),
+        ]
+        for (field, observed, reason), limit in zip(checks, self.limits):
+            points = [(t, info[field]) for t, info in self.samples if info.get(field)]
+            if points and points[-1][1] > limit:
+                # Already over the limit while settling, where the measurement guards do not run yet
+                self.projection = (field, points[-1][1], points[-1][1])
+                return observed
+            if len(points) < predict_min_samples:
+                continue
+            fit = fit_first_order([t for t, _ in points], [v for _, v in points], predict_z)
+            if fit is None:
+                continue
+            steady_state, lower_bound, _ = fit
+            if lower_bound >= limit:
+                self.projection = (field, steady_state, lower_bound)
+                return reason
+        return None
+
+def hashrate_collapsed(median, count, min_samples, expected_hashrate):
+    """True once enough samples show a median hashrate far below the expected value."""
+    if count < min_samples or expected_hashrate <= 0:
+        return False
+    return median < hashrate_collapse_fraction * expected_hashrate
 
 # =============================================================
-#                  BENCHMARKING FUNCTION
+#                  RESULT SUMMARY
 # =============================================================
-def set_system_settings(core_voltage, frequency):
-    """Send new V/F settings and reboot to apply."""
-    settings = {
-        "coreVoltage": core_voltage,
-        "frequency": frequency
+def rank_results(results):
+    """Top 8 performers (highest hashrate) and most efficient settings (lowest J/TH)."""
+    top_8_results = sorted(results, key=lambda x: x["averageHashRate"], reverse=True)[:8]
+    top_8_efficient_results = sorted(results, key=lambda x: x["efficiencyJTH"])[:8]
+    return top_8_results, top_8_efficient_results
+
+def summary_entry(rank, result):
+    """Ranked entry of a top list in the results file."""
+    return {
+        "rank": rank,
+        "coreVoltage": result["coreVoltage"],
+        "frequency": result["frequency"],
+        "averageHashRate": result["averageHashRate"],
+        "averageTemperature": result["averageTemperature"],
+        "efficiencyJTH": result["efficiencyJTH"],
+        **({"averageVRTemp": result["averageVRTemp"]} if "averageVRTemp" in result else {})
     }
-    try:
-        response = requests.patch(f"{nerdqaxe_ip}/api/system", json=settings, timeout=20)
-        response.raise_for_status()
-        print(YELLOW + f"Applying settings: Voltage = {core_voltage}mV, Frequency = {frequency}MHz" + RESET)
-        time.sleep(2)
-        restart_system()
-    except requests.exceptions.RequestException as e:
-        print(RED + f"Error setting system settings: {e}" + RESET)
-
-def restart_system():
-    """Restart hashing to apply settings; wait for stabilization unless shutting down."""
-    try:
-        is_interrupt = handling_interrupt
 
-        if not is_interrupt:
-            print(YELLOW + "Applying new settings and waiting 600s for system stabilization..." + RESET)
-            response = requests.post(f"{nerdqaxe_ip}/api/system/restart", timeout=20)
-            response.raise_for_status()
-            time.sleep(600)  # Give time for restart and hashing to stabilize
+def build_final_data(results):
+    """Final results file layout: all results, both top lists and the hashrate/J/TH/temperature Pareto front."""
+    from nerdqaxe_analysis import pareto_front
+
+    top_8_results, top_8_efficient_results = rank_results(results)
+
+    # Create a dictionary containing all results and top performers
+    final_data = {
+        "all_results": results,
+        "top_performers": [summary_entry(i, result) for i, result in enumerate(top_8_results, 1)],
+        "most_efficient": [summary_entry(i, result) for i, result in enumerate(top_8_efficient_results, 1)],
+        "pareto_front": [summary_entry(i, result) for i, result in enumerate(pareto_front(results), 1)],
+    }
+    return final_data
+
+# =============================================================
+#                     SEARCH STRATEGIES
+# =============================================================
+# A strategy decides which combo the session measures next. It is a factory
+# strategy(session, grid, sort_key) returning a search object (see
+# nerdqaxe_search.py) with next_point(), observe(point, result, reason),
+# restore(points), discard(points) and the attributes pending, measured and
+# last_acquisition. observe() gets a reason with the result when a passing
+# combo lies outside the objective's envelope. grid is the full V/F grid in
+# priority order and sort_key the key it was sorted by. An optional total
+# replaces the grid size as the progress total (e.g. one shard of a grid).
+def grid_strategy(session, grid, sort_key):
+    """Every combo; --order settle walks them along the cheapest expected settle path."""
+    from nerdqaxe_schedule import plan_path, transitions_from_results
+    from nerdqaxe_search import GridSearch
+
+    planner = None
+    if session.config.order == "settle" and session.objective is None:  # an objective fixes the order itself
+        session.cost_model.fit(transitions_from_results(session.results))
+        planner = lambda start, points: plan_path(start, points, session.cost_model)
+    search = GridSearch(grid, sort_key, session.tested_combinations | set(session.skipped_failures), session.pruner,
+                        session.config.voltage_step, session.frequency_step, planner=planner,
+                        start=session.current_settings)
+    session.log_plan(search.pending)
+    return search
+
+def adaptive_strategy(session, grid, sort_key):
+    """Model-guided: the combo with the highest expected improvement of hashrate or J/TH next."""
+    from nerdqaxe_search import AdaptiveSearch
+
+    session.log("Adaptive search: combos are chosen by expected improvement; the total is an upper bound.", YELLOW)
+    return AdaptiveSearch(grid, session.results, session.tested_combinations, session.pruner,
+                          (session.initial_voltage, session.initial_frequency), session.config.limits(),
+                          ei_threshold=session.config.ei_threshold, failed=session.skipped_failures,
+                          seed_points=session.fleet_points, objective=session.objective)
+
+SEARCH_STRATEGIES = {"grid": grid_strategy, "adaptive": adaptive_strategy}
+
+def factory_name(factory):
+    """Registry name, or the name of a custom strategy/reducer factory."""
+    return factory if isinstance(factory, str) else getattr(factory, "__name__", repr(factory))
+
+# =============================================================
+#                     BENCHMARK SESSION
+# =============================================================
+# Event hooks, each called as callback(session, ...):
+#
+#   on_sample(session, phase, info)       every polled snapshot, phase "settling" or "measuring"
+#   on_combo_done(session, result)        a combo was measured and saved
+#   on_failure(session, point, reason)    a combo failed or was aborted
+HOOKS = ("on_sample", "on_combo_done", "on_failure")
+
+class BenchmarkInterrupted(Exception):
+    """Raised inside a session when a stop was requested (Ctrl+C)."""
+
+class BackgroundSampler:
+    """Polls fetch() on a fixed-rate schedule in a daemon thread; the caller consumes snapshots in order.
+
+    A slow response delays the next poll instead of causing a burst of
+    catch-up polls. fetch() returning None (device unreachable) is passed on.
+    """
+
+    def __init__(self, fetch, interval, time_scale, stop_event):
+        self.fetch = fetch
+        self.interval = interval / time_scale   # wall-clock seconds
+        self.stop_event = stop_event
+        self.done = threading.Event()
+        self.snapshots = queue.Queue()
+        self.late = 0                           # polls that started behind schedule
+        self.thread = threading.Thread(target=self.run, name="sampler", daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.done.set()
+        self.thread.join(timeout=1)
+
+    def run(self):
+        due = time.monotonic()
+        while not self.done.is_set() and not self.stop_event.is_set():
+            try:
+                info = self.fetch()
+            except BenchmarkInterrupted:
+                return
+            self.snapshots.put(info)
+            due += self.interval
+            delay = due - time.monotonic()
+            if delay < 0:
+                self.late += 1
+                due, delay = time.monotonic(), 0
+            if self.done.wait(delay):
+                return
+
+    def next(self):
+        """Next snapshot; raises BenchmarkInterrupted once a stop is requested."""
+        while True:
+            try:
+                return self.snapshots.get(timeout=0.25)
+            except queue.Empty:
+                if self.stop_event.is_set():
+                    raise BenchmarkInterrupted()
+
+class BenchmarkSession:
+    """Benchmark state and device interaction for a single NerdQAxe.
+
+    Built from a BenchmarkConfig (keyword options override it; without one
+    they make up the whole config) and optionally a device client, e.g. one
+    pointing at a simulator or a test double. Constructing a session opens
+    no files and imports nothing heavy; run() does the work and may be used
+    from any thread. hooks maps names from HOOKS to a callback or a list.
+    """
+
+    def __init__(self, ip_address, config=None, client=None, hooks=None, out=None, **options):
+        self.config = BenchmarkConfig(**options) if config is None else config.replace(**options)
+        self.ip_address = ip_address
+        self.nerdqaxe_ip = f"http://{ip_address}"
+        self.initial_voltage = self.config.initial_voltage  # the warm start may move the start point
+        self.initial_frequency = self.config.initial_frequency
+        self.resume = self.config.resume                    # switched on when results already exist
+        self.measure_time = self.config.benchmark_time      # seconds per measurement window; shorter while auto-tuning
+        self.measure_phase = "measuring"                    # telemetry phase of measurement windows; "retuning" while auto-tuning
+        self.out = out or sys.stdout
+        self.device_client = client                         # built on first use, see client
+        self.client_lock = threading.Lock()
+        self.results_filename = f"nerdqaxe_benchmark_results_{ip_address}.json"
+        self.journal = ResultJournal(self.results_filename)
+        self.telemetry = None           # TelemetryWriter, opened by run()
+        self.window_id = None
+        self.frequency_step = self.config.grid_frequency_step()
+        self.hooks = {name: [] for name in HOOKS}
+        for name, callbacks in (hooks or {}).items():
+            for callback in (callbacks if isinstance(callbacks, (list, tuple)) else [callbacks]):
+                self.add_hook(name, callback)
+
+        self.results = []
+        self.tested_combinations = set()
+        self.failures = {}          # (V, F) -> latest failure entry
+        self.skipped_failures = {}  # (V, F) -> error reason, not retried this run
+        self.default_voltage = None
+        self.default_frequency = None
+        self.small_core_count = None
+        self.asic_count = None
+        self.device_info = None         # /api/system/info at start, for the store identity
+        self.identity = None
+        self.store = None               # ResultStore, opened in the session's own thread
+        self.store_device_id = None
+        self.store_run_id = None
+        self.fleet_boundary = {}        # (V, F) -> reason, fleet failures not yet confirmed on this unit
+        self.fleet_points = []          # the fleet's best stable points, first in the adaptive initial design
+        self.seed_results = []          # model map estimates for this unit, refined from with --fine (see nerdqaxe_shard)
+        self.handling_interrupt = False
+        self.system_reset_done = False
+        self.last_settle_seconds = None
+        self.last_iteration_stats = {}
+        self.predictor = TrendPredictor(self.config.limits())
+        self.predicted_failure = None
+        self.current_settings = None    # (V, F) last applied to the device
+        self.settled_from = None        # (V, F) the device came from for the current combo
+        self.last_live_applied = False
+        self.cost_model = None          # TransitionCostModel and GridPruner, built by prepare()
+        self.pruner = None
+        self.objective = self.config.target()
+        self.stop_event = threading.Event()
+        self.profiler = PhaseProfiler(self.clock, self.http_totals)  # device time per phase; fresh per run, see prepare()
+
+        # Live progress, read by the fleet status table and the metrics exporter
+        self.status = {"phase": "idle", "voltage": None, "frequency": None, "sample": 0, "total_samples": 0,
+                       "hashRate": None, "temp": None, "vrTemp": None, "inputVoltage": None, "power": None,
+                       "combo": 0, "total_combos": 0, "remaining": 0, "pruned": 0, "message": "",
+                       "lastSampleTime": None}
+
+    @property
+    def client(self):
+        """The device client; the default one is built on first use."""
+        with self.client_lock:
+            if self.device_client is None:
+                from nerdqaxe_client import DeviceClient
+                self.device_client = DeviceClient(self.nerdqaxe_ip, connect_timeout=self.config.connect_timeout,
+                                                  read_timeout=self.config.read_timeout, sleep=self.retry_sleep,
+                                                  clock=self.clock, on_retry=self.log_retry)
+            return self.device_client
+
+    def add_hook(self, name, callback):
+        """Register callback(session, ...) for one of HOOKS."""
+        if name not in self.hooks:
+            raise ValueError(f"Unknown hook '{name}', expected one of {', '.join(HOOKS)}")
+        self.hooks[name].append(callback)
+
+    def emit(self, name, *args):
+        """Call the callbacks of a hook; a failing callback is reported, never fatal to the benchmark."""
+        for callback in self.hooks[name]:
+            try:
+                callback(self, *args)
+            except BenchmarkInterrupted:
+                raise
+            except Exception as e:
+                self.log(f"Error in {name} hook {getattr(callback, '__name__', callback)!r}: {e}", RED)
+
+    def prepare(self):
+        """Build what a run or a plan needs: failure pruner, settle-cost model and a fresh phase profiler."""
+        from nerdqaxe_schedule import TransitionCostModel
+        from nerdqaxe_search import GridPruner
+
+        self.pruner = GridPruner()
+        self.cost_model = TransitionCostModel(self.config.live_apply)
+        self.profiler = PhaseProfiler(self.clock, self.http_totals)
+
+    def log(self, message, color=""):
+        """Print one colored line to this session's output."""
+        print(color + message + RESET, file=self.out, flush=True)
+
+    def samples_for(self, reference_samples):
+        """Number of polled samples covering the time of `reference_samples` at sample_interval spacing."""
+        return max(int(round(reference_samples * sample_interval / self.config.poll_interval)), 1)
+
+    def clock(self):
+        """Monotonic time in (device) seconds, accelerated by time_scale."""
+        return time.monotonic() * self.config.time_scale
+
+    def sleep(self, seconds):
+        """Sleep that wakes up early and raises BenchmarkInterrupted once a stop is requested."""
+        seconds /= self.config.time_scale
+        if self.handling_interrupt:
+            time.sleep(seconds)
+            return
+        if self.stop_event.wait(seconds):
+            raise BenchmarkInterrupted()
+
+    def retry_sleep(self, seconds):
+        """Client backoff between attempts, profiled as its own phase on the session's thread.
+
+        The background sampler retries through the same client; its backoff
+        overlaps the measurement window and stays charged to it.
+        """
+        if not self.profiler.owned():
+            self.sleep(seconds)
+            return
+        with self.profiler.phase("retryWait"):
+            self.sleep(seconds)
+
+    def http_totals(self):
+        """(requests, seconds of latency) of the device client so far."""
+        latency = self.client.latency()
+        return latency.count, latency.sum_ms / 1000
+
+    def log_retry(self, method, path, attempt, attempts, error, delay):
+        """Client callback: report a failed attempt before backing off."""
+        import requests
+
+        if isinstance(error, requests.exceptions.Timeout):
+            what, color = "Timeout", YELLOW
+        elif isinstance(error, requests.exceptions.ConnectionError):
+            what, color = "Connection error", RED
+        elif getattr(error, "response", None) is not None:
+            what, color = f"HTTP {error.response.status_code}", RED
         else:
-            print(YELLOW + "Applying final settings..." + RESET)
-            response = requests.post(f"{nerdqaxe_ip}/api/system/restart", timeout=20)
-            response.raise_for_status()
-    except requests.exceptions.RequestException as e:
-        print(RED + f"Error restarting the system: {e}" + RESET)
-
-def benchmark_iteration(core_voltage, frequency):
-    """Run one benchmark window at given V/F, collect and reduce metrics."""
-    current_time = time.strftime("%H:%M:%S")
-    print(GREEN + f"[{current_time}] Starting benchmark for Core Voltage: {core_voltage}mV, Frequency: {frequency}MHz" + RESET)
-    hash_rates = []
-    temperatures = []
-    power_consumptions = []
-    vr_temps = []
-    total_samples = benchmark_time // sample_interval
-    expected_hashrate = frequency * ((small_core_count * asic_count) / 1000)  # simple heuristic
-
-    for sample in range(total_samples):
-        info = get_system_info()
-        if info is None:
-            print(YELLOW + "Skipping this iteration due to failure in fetching system info." + RESET)
-            return None, None, None, False, None, "SYSTEM_INFO_FAILURE"
-
-        temp = info.get("temp")
-        vr_temp = info.get("vrTemp")
-        voltage = info.get("voltage")
-
-        if temp is None:
-            print(YELLOW + "Temperature data not available." + RESET)
-            return None, None, None, False, None, "TEMPERATURE_DATA_FAILURE"
-
-        if temp < 5:
-            print(YELLOW + "Temperature is below 5°C. This is unexpected. Please check the system." + RESET)
-            return None, None, None, False, None, "TEMPERATURE_BELOW_5"
-
-        # Thermal/voltage/power guards
-        if temp >= max_temp:
-            print(RED + f"Chip temperature exceeded {max_temp}°C! Stopping current benchmark." + RESET)
-            return None, None, None, False, None, "CHIP_TEMP_EXCEEDED"
-
-        if vr_temp is not None and vr_temp >= max_vr_temp:
-            print(RED + f"Voltage regulator temperature exceeded {max_vr_temp}°C! Stopping current benchmark." + RESET)
-            return None, None, None, False, None, "VR_TEMP_EXCEEDED"
-
-        if voltage < min_input_voltage:
-            print(RED + f"Input voltage is below the minimum allowed value of {min_input_voltage}mV! Stopping current benchmark." + RESET)
-            return None, None, None, False, None, "INPUT_VOLTAGE_BELOW_MIN"
-
-        if voltage > max_input_voltage:
-            print(RED + f"Input voltage is above the maximum allowed value of {max_input_voltage}mV! Stopping current benchmark." + RESET)
-            return None, None, None, False, None, "INPUT_VOLTAGE_ABOVE_MAX"
-
-        hash_rate = info.get("hashRate")
-        power_consumption = info.get("power")
-
-        if hash_rate is None or power_consumption is None:
-            print(YELLOW + "Hashrate or Watts data not available." + RESET)
-            return None, None, None, False, None, "HASHRATE_POWER_DATA_FAILURE"
-
-        if power_consumption > max_power:
-            print(RED + f"Power consumption exceeded {max_power}W! Stopping current benchmark." + RESET)
-            return None, None, None, False, None, "POWER_CONSUMPTION_EXCEEDED"
-
-        hash_rates.append(hash_rate)
-        temperatures.append(temp)
-        power_consumptions.append(power_consumption)
-        if vr_temp is not None and vr_temp > 0:
-            vr_temps.append(vr_temp)
-
-        # Progress line
-        percentage_progress = ((sample + 1) / total_samples) * 100
-        status_line = (
-            f"[{sample + 1:2d}/{total_samples:2d}] "
-            f"{percentage_progress:5.1f}% | "
-            f"CV: {core_voltage:4d}mV | "
-            f"F: {frequency:4d}MHz | "
-            f"H: {int(hash_rate):4d} GH/s | "
-            f"IV: {int(voltage):4d}mV | "
-            f"T: {int(temp):2d}°C"
-        )
-        if vr_temp is not None and vr_temp > 0:
-            status_line += f" | VR: {int(vr_temp):2d}°C"
-        print(status_line + RESET)
+            what, color = f"Error ({error})", RED
+        self.log(f"{what} on {method} {path}. Attempt {attempt} of {attempts}, retrying in {delay:.1f}s.", color)
+
+    def record_telemetry(self, info, phase, core_voltage, frequency):
+        """Append one raw snapshot to the telemetry stream, tagged with combo and phase."""
+        if self.telemetry is not None:
+            poll = self.config.poll_interval if phase == self.measure_phase else None
+            self.telemetry.write(info, phase, core_voltage, frequency, self.window_id, poll)
+
+    def request_stop(self):
+        """Ask the session to apply its best settings and stop at the next wait."""
+        self.stop_event.set()
+
+    # =============================================================
+    #                      RESUME HANDLING
+    # =============================================================
+    def load_resume(self, repair=False):
+        """Load the results snapshot and replay the journal when resuming; repair before appending to it."""
+        # Automatically activate resume if results exist
+        if not self.resume and self.journal.exists():
+            self.log(f"Found existing results for {self.ip_address}, automatically resuming...", YELLOW)
+            self.resume = True
+
+        # Fine tuning requires resume mode
+        if self.config.fine and not self.resume:
+            self.log("--fine mode requires previous results. Automatically enabling --resume.", YELLOW)
+            self.resume = True
+
+        if self.resume and self.journal.exists():
+            try:
+                # Snapshot (legacy array or final dict format) plus journal records written after it
+                snapshot, records = self.journal.load(repair=repair)
+                if self.journal.corrupt:
+                    self.log(f"Skipped {self.journal.corrupt} corrupt journal lines in {self.journal.filename}.", YELLOW)
+                resume_results = list(snapshot.get("all_results", []))
+                resume_results.extend(r["entry"] for r in records if r["type"] == "result")
+                resume_failures = snapshot.get("failures", []) + [r["entry"] for r in records if r["type"] == "failure"]
+                for entry in resume_results:
+                    self.tested_combinations.add((entry["coreVoltage"], entry["frequency"]))
+                # Combo costs of earlier runs seed the ETA and --plan
+                for entry in resume_results + resume_failures:
+                    if "timing" in entry:
+                        self.profiler.record(entry["timing"])
+                for entry in resume_failures:
+                    point = (entry["coreVoltage"], entry["frequency"])
+                    if point not in self.tested_combinations:
+                        self.failures[point] = entry
+                self.log(f"Resuming benchmark. Loaded {len(self.tested_combinations)} tested combinations and "
+                         f"{len(self.failures)} failures ({len(records)} records from the journal).", GREEN)
+                self.results.extend(resume_results)
+            except Exception as e:
+                self.log(f"Error loading resume data: {e}", RED)
+
+    def apply_failure_policy(self):
+        """Decide which cached failures to retry; skipped ones seed the pruner again."""
+        from nerdqaxe_search import retry_decision
+
+        if not self.failures:
+            return
+        now = time.time()
+        retried = []
+        for point, failure in sorted(self.failures.items()):
+            retry, why = (True, "--retry-failures") if self.config.retry_failures else retry_decision(failure, now, self.config.ambient)
+            if retry:
+                retried.append(f"{point[0]}mV/{point[1]}MHz ({why})")
+            else:
+                self.skipped_failures[point] = failure["errorReason"]
+        candidates = [p for p in self.build_grid() if p not in self.tested_combinations and p not in self.skipped_failures]
+        for point, reason in self.skipped_failures.items():
+            self.pruner.record_failure(point, reason, candidates)
+        self.status["pruned"] = len(self.pruner.pruned)
+        self.log(f"Known failures: skipping {len(self.skipped_failures)} (ruling out {len(self.pruner.pruned)} more combos), "
+                 f"retrying {len(retried)}.", YELLOW)
+        for line in retried:
+            self.log(f"  Retrying {line}", YELLOW)
+
+    def apply_objective(self):
+        """Announce the objective; loaded results outside its envelope rule out what they dominate."""
+        if self.objective is None:
+            return
+        self.log(f"Objective: {self.objective.describe()}", GREEN)
+        candidates = [p for p in self.build_grid() if p not in self.tested_combinations and p not in self.skipped_failures]
+        pruned_before = len(self.pruner.pruned)
+        outside = 0
+        for result in self.results:
+            reason = self.objective.violation(result)
+            if reason is not None:
+                self.pruner.record_failure((result["coreVoltage"], result["frequency"]), reason, candidates)
+                outside += 1
+        self.status["pruned"] = len(self.pruner.pruned)
+        if self.results:
+            self.log(f"Loaded results outside the envelope: {outside} of {len(self.results)} "
+                     f"(ruling out {len(self.pruner.pruned) - pruned_before} more combos).", YELLOW)
+
+    # =============================================================
+    #                 FLEET STORE & WARM START
+    # =============================================================
+    def open_store(self):
+        """Register this device and run in the fleet store (the journal stays the source of truth)."""
+        if self.config.store is None:
+            return
+        if self.device_info is None:
+            self.log("Device identity unknown; this run is not recorded in the store.", RED)
+            return
+        self.identity = device_identity(self.device_info, self.ip_address)
+        config = self.config
+        options = {"search": factory_name(config.search), "reducer": factory_name(config.reducer), "order": config.order,
+                   "fine": config.fine, "earlyStop": config.early_stop, "pollInterval": config.poll_interval,
+                   "timeScale": config.time_scale}
+        try:
+            self.store = ResultStore(self.config.store)
+            self.store_device_id = self.store.register_device(self.identity)
+            self.store_run_id = self.store.start_run(self.store_device_id, self.config.ambient, options)
+        except sqlite3.Error as e:
+            self.log(f"Error opening store {self.config.store}: {e}", RED)
+            if self.store is not None:
+                self.store.close()
+            self.store = None
+            return
+        self.log(f"Recording to {self.config.store} as {self.identity['unit']} "
+                 f"({describe_identity(self.identity)}, firmware {self.identity['firmware']})", GREEN)
+
+    def apply_warm_start(self):
+        """Start in the fleet's stable region and pre-prune beyond the fleet's failure boundary.
+
+        The start is the highest-hashrate point stable on the most units. A
+        fleet failure counts when more units failed than passed at that point
+        and the retry policy would not retry it at today's ambient. The failure
+        point itself stays in the queue: if it passes on this unit, the combos
+        only it ruled out are queued again.
+        """
+        from nerdqaxe_search import retry_decision
+
+        if self.store is None:
+            self.log("Warm start needs the store; starting cold.", YELLOW)
+            return
+        try:
+            points, units = self.store.fleet_points(self.identity)
+        except sqlite3.Error as e:
+            self.log(f"Error reading fleet data from store: {e}", RED)
+            return
+        if not units:
+            self.log(f"Warm start: no other {describe_identity(self.identity)} units in the store yet; starting cold.",
+                     YELLOW)
+            return
+
+        now = time.time()
+        boundary = {}
+        stable = []
+        for point, entry in points.items():
+            failed = {}
+            for unit, failure in entry["failures"]:
+                retry, _ = retry_decision(failure, now, self.config.ambient)
+                if not retry:
+                    failed.setdefault(unit, failure["errorReason"])
+            if len(failed) > entry["passed"]:
+                boundary[point] = Counter(failed.values()).most_common(1)[0][0]
+            elif entry["passed"] and not failed:
+                stable.append((point, entry))
+
+        grid = set(self.build_grid())
+        stable = [(point, entry) for point, entry in stable if point in grid]
+        start = ""
+        if stable:
+            point, entry = max(stable, key=lambda item: (item[1]["passed"], item[1]["hashrate"]))
+            self.initial_voltage, self.initial_frequency = point
+            start = (f"starting at {point[0]} mV @ {point[1]} MHz (stable on {entry['passed']} units, "
+                     f"~{entry['hashrate']:.0f} GH/s); ")
+            best_hashrate = sorted(stable, key=lambda item: -item[1]["hashrate"])
+            best_efficiency = sorted(stable, key=lambda item: item[1]["efficiency"])
+            for point, _ in best_hashrate[:warm_start_seed_points] + best_efficiency[:warm_start_seed_points]:
+                if point not in self.fleet_points:
+                    self.fleet_points.append(point)
+
+        candidates = [p for p in self.build_grid() if p not in self.tested_combinations and p not in self.skipped_failures]
+        pruned_before = len(self.pruner.pruned)
+        for point, reason in sorted(boundary.items()):
+            if point in self.tested_combinations or point in self.skipped_failures:
+                continue
+            self.pruner.record_failure(point, reason, candidates, origin="fleet")
+            if point in self.pruner.failures:
+                self.fleet_boundary[point] = reason
+        self.status["pruned"] = len(self.pruner.pruned)
+        self.log(f"Warm start from {units} other {describe_identity(self.identity)} units: {start}"
+                 f"{len(self.fleet_boundary)} fleet failures rule out {len(self.pruner.pruned) - pruned_before} combos "
+                 f"unless this unit passes them.", GREEN)
+
+    # =============================================================
+    #                    SYSTEM INTERACTION
+    # =============================================================
+    def fetch_default_settings(self):
+        """Query device for defaults and core configuration."""
+        import requests
 
-        if sample < total_samples - 1:
-            time.sleep(sample_interval)
+        try:
+            system_info = self.client.get("/api/system/info").json()
+            self.device_info = system_info
+            self.default_voltage = system_info.get("coreVoltage", 1150)  # Fallback to 1150 if not found
+            self.default_frequency = system_info.get("frequency", 600)   # Fallback to 600 if not found
+            self.small_core_count = system_info.get("smallCoreCount", 0)
+            self.asic_count = system_info.get("asicCount", 0)
+            self.current_settings = (self.default_voltage, self.default_frequency)
+            self.log(f"Current settings determined:\n"
+                     f"  Core Voltage: {self.default_voltage}mV\n"
+                     f"  Frequency: {self.default_frequency}MHz\n"
+                     f"  ASIC Configuration: {self.small_core_count * self.asic_count} total cores", GREEN)
+        except requests.exceptions.RequestException as e:
+            self.log(f"Error fetching default system settings: {e}. Using fallback defaults.", RED)
+            self.default_voltage = 1150
+            self.default_frequency = 600
+            self.small_core_count = 0
+            self.asic_count = 0
 
-    if hash_rates and temperatures and power_consumptions:
-        # Trim outliers from hashrate
-        sorted_hashrates = sorted(hash_rates)
-        trimmed_hashrates = sorted_hashrates[3:-3] if len(sorted_hashrates) > 6 else sorted_hashrates
-        average_hashrate = sum(trimmed_hashrates) / len(trimmed_hashrates)
+    def get_system_info(self):
+        """Fetch one snapshot of telemetry from device, with retries."""
+        import requests
 
-        # Trim warmup from temps
-        sorted_temps = sorted(temperatures)
-        trimmed_temps = sorted_temps[6:] if len(sorted_temps) > 6 else sorted_temps
-        average_temperature = sum(trimmed_temps) / len(trimmed_temps)
+        try:
+            return self.client.get("/api/system/info").json()
+        except requests.exceptions.RequestException as e:
+            self.log(f"Error fetching system info: {e}", RED)
+            return None
+
+    def set_system_settings(self, core_voltage, frequency):
+        """Send new V/F settings and reboot to apply."""
+        import requests
+        from nerdqaxe_schedule import is_live_step
+
+        self.window_id = int(time.time() * 1000)
+        self.predictor = TrendPredictor(self.config.limits())
+        self.predicted_failure = None
+        settings = {
+            "coreVoltage": core_voltage,
+            "frequency": frequency
+        }
+        self.settled_from = self.current_settings
+        self.last_live_applied = False
+        try:
+            with self.profiler.phase("apply"):
+                self.client.patch("/api/system", json=settings)
+                self.log(f"Applying settings: Voltage = {core_voltage}mV, Frequency = {frequency}MHz", YELLOW)
+                self.status.update(voltage=core_voltage, frequency=frequency)
+                self.current_settings = (core_voltage, frequency)
+                self.sleep(2)
+            if (self.config.live_apply and not self.handling_interrupt and self.settled_from is not None
+                    and is_live_step(self.settled_from, self.current_settings)):
+                # Small step: the firmware applies it live, no reboot needed
+                self.log("Small step applied live, waiting for stabilization without a restart...", YELLOW)
+                self.last_live_applied = True
+                with self.profiler.phase("settle"):
+                    self.last_settle_seconds = self.wait_for_stabilization()
+            else:
+                self.restart_system()
+        except requests.exceptions.RequestException as e:
+            self.log(f"Error setting system settings: {e}", RED)
 
-        # VR temps optional
-        average_vr_temp = None
-        if vr_temps:
-            sorted_vr_temps = sorted(vr_temps)
-            trimmed_vr_temps = sorted_vr_temps[6:] if len(sorted_vr_temps) > 6 else sorted_vr_temps
-            average_vr_temp = sum(trimmed_vr_temps) / len(trimmed_vr_temps)
+    def restart_system(self):
+        """Restart hashing to apply settings; wait for stabilization unless shutting down."""
+        import requests
 
-        average_power = sum(power_consumptions) / len(power_consumptions)
+        self.last_settle_seconds = None
+        try:
+            is_interrupt = self.handling_interrupt
 
+            with self.profiler.phase("settle"):
+                if not is_interrupt:
+                    self.log(f"Applying new settings and waiting up to {settle_max_time}s for system stabilization...", YELLOW)
+                    self.client.post("/api/system/restart")
+                    self.last_settle_seconds = self.wait_for_stabilization()
+                else:
+                    self.log("Applying final settings...", YELLOW)
+                    self.client.post("/api/system/restart")
+        except requests.exceptions.RequestException as e:
+            self.log(f"Error restarting the system: {e}", RED)
+
+    def wait_for_stabilization(self):
+        """Poll the device after a restart until hashrate and temperatures settle; return seconds waited."""
+        import requests
+
+        self.status.update(phase="settling", sample=0, total_samples=0)
+        start = self.clock()
+        window = []
+
+        while True:
+            elapsed = self.clock() - start
+            if elapsed >= settle_max_time:
+                self.log(f"Stabilization not detected, hard limit of {settle_max_time}s reached.", YELLOW)
+                return settle_max_time
+
+            self.sleep(min(settle_poll_interval, settle_max_time - elapsed))
+            try:
+                # Single attempt with a short read timeout: this loop polls again anyway
+                info = self.client.get("/api/system/info", retries=0, timeout=(self.client.timeout[0], 5)).json()
+            except (requests.exceptions.RequestException, ValueError):
+                window.clear()  # device still rebooting
+                continue
+
+            elapsed = self.clock() - start
+            self.record_telemetry(info, "settling", self.status["voltage"], self.status["frequency"])
+            self.emit("on_sample", "settling", info)
+            self.status.update(hashRate=info.get("hashRate"), temp=info.get("temp"), vrTemp=info.get("vrTemp"),
+                               inputVoltage=info.get("voltage"), power=info.get("power"), lastSampleTime=time.time())
+
+            self.predictor.add(self.clock(), info)
+            if self.config.predict:
+                self.predicted_failure = self.predictor.check()
+                if self.predicted_failure:
+                    self.log_prediction(self.predicted_failure)
+                    return elapsed
+            window.append((elapsed / 60, info))
+            del window[:-settle_window]
+
+            if elapsed >= settle_min_time and len(window) == settle_window and is_stabilized(window):
+                self.log(f"System stabilized after {elapsed:.0f}s (saved {settle_max_time - elapsed:.0f}s).", GREEN)
+                return elapsed
+
+    def log_prediction(self, reason):
+        field, steady_state, lower_bound = self.predictor.projection
+        if reason.startswith("PREDICTED_"):
+            self.log(f"{reason}: {field} projected to settle at {steady_state:.1f} (at least {lower_bound:.1f}), "
+                     f"aborting this combo early.", RED)
+        else:
+            self.log(f"{reason}: {field} reached {steady_state:.1f} while settling, aborting this combo early.", RED)
+
+    def abort_predicted(self, reason):
+        """Failure tuple for a predicted abort."""
+        return None, None, None, False, None, reason
+
+    def close_window(self, core_voltage, frequency, reason):
+        """Terminal telemetry record of a measurement window: completed, or aborted with its reason."""
+        info = {"kind": self.measure_phase}
+        if reason is not None:
+            info["errorReason"] = reason
+        self.record_telemetry(info, "completed" if reason is None else "aborted", core_voltage, frequency)
+
+    # =============================================================
+    #                  MEASUREMENT WINDOW
+    # =============================================================
+    def benchmark_iteration(self, core_voltage, frequency):
+        """Run one benchmark window at given V/F, collect and reduce metrics."""
+        with self.profiler.phase("measure"):
+            try:
+                outcome = self.measure_window(core_voltage, frequency)
+            except BaseException as e:
+                interrupted = isinstance(e, (BenchmarkInterrupted, KeyboardInterrupt))
+                self.close_window(core_voltage, frequency, "INTERRUPTED" if interrupted else type(e).__name__)
+                raise
+            self.close_window(core_voltage, frequency, outcome[-1])
+            return outcome
+
+    def measure_window(self, core_voltage, frequency):
+        """The measurement window of benchmark_iteration(): guards, progress and the reducer."""
+        config = self.config
+        self.last_iteration_stats.clear()
+        current_time = time.strftime("%H:%M:%S")
+        self.log(f"[{current_time}] Starting benchmark for Core Voltage: {core_voltage}mV, Frequency: {frequency}MHz", GREEN)
+        total_samples = int(self.measure_time // config.poll_interval)
+        expected_hashrate = frequency * ((self.small_core_count * self.asic_count) / 1000)  # simple heuristic
+        self.status.update(phase="measuring", voltage=core_voltage, frequency=frequency, sample=0,
+                           total_samples=total_samples)
+        if self.predicted_failure:
+            return self.abort_predicted(self.predicted_failure)
+
+        reducer = self.reducer_factory()(self)
+        log_every = self.samples_for(1)  # one progress line per reference sample
+
+        with BackgroundSampler(self.get_system_info, config.poll_interval, config.time_scale, self.stop_event) as sampler:
+            for sample in range(total_samples):
+                info = sampler.next()
+                if info is None:
+                    self.log("Skipping this iteration due to failure in fetching system info.", YELLOW)
+                    return None, None, None, False, None, "SYSTEM_INFO_FAILURE"
+
+                self.record_telemetry(info, self.measure_phase, core_voltage, frequency)
+                self.emit("on_sample", "measuring", info)
+                temp = info.get("temp")
+                vr_temp = info.get("vrTemp")
+                voltage = info.get("voltage")
+
+                if temp is None:
+                    self.log("Temperature data not available.", YELLOW)
+                    return None, None, None, False, None, "TEMPERATURE_DATA_FAILURE"
+
+                if temp < 5:
+                    self.log("Temperature is below 5°C. This is unexpected. Please check the system.", YELLOW)
+                    return None, None, None, False, None, "TEMPERATURE_BELOW_5"
+
+                # Thermal/voltage/power guards
+                if temp >= config.max_temp:
+                    self.log(f"Chip temperature exceeded {config.max_temp}°C! Stopping current benchmark.", RED)
+                    return None, None, None, False, None, "CHIP_TEMP_EXCEEDED"
+
+                if vr_temp is not None and vr_temp >= config.max_vr_temp:
+                    self.log(f"Voltage regulator temperature exceeded {config.max_vr_temp}°C! Stopping current benchmark.", RED)
+                    return None, None, None, False, None, "VR_TEMP_EXCEEDED"
+
+                if voltage < config.min_input_voltage:
+                    self.log(f"Input voltage is below the minimum allowed value of {config.min_input_voltage}mV! Stopping current benchmark.", RED)
+                    return None, None, None, False, None, "INPUT_VOLTAGE_BELOW_MIN"
+
+                if voltage > config.max_input_voltage:
+                    self.log(f"Input voltage is above the maximum allowed value of {config.max_input_voltage}mV! Stopping current benchmark.", RED)
+                    return None, None, None, False, None, "INPUT_VOLTAGE_ABOVE_MAX"
+
+                hash_rate = info.get("hashRate")
+                power_consumption = info.get("power")
+
+                if hash_rate is None or power_consumption is None:
+                    self.log("Hashrate or Watts data not available.", YELLOW)
+                    return None, None, None, False, None, "HASHRATE_POWER_DATA_FAILURE"
+
+                if power_consumption > config.max_power:
+                    self.log(f"Power consumption exceeded {config.max_power}W! Stopping current benchmark.", RED)
+                    return None, None, None, False, None, "POWER_CONSUMPTION_EXCEEDED"
+
+                reducer.add(hash_rate, temp, vr_temp, power_consumption)
+
+                # Predictive guards: steady state beyond a limit, or hashrate collapsed
+                if config.predict:
+                    predicted = self.predictor.check() if self.predictor.add(self.clock(), info) else None
+                    if predicted:
+                        self.status["sample"] = sample + 1
+                        self.log_prediction(predicted)
+                        return self.abort_predicted(predicted)
+                    if hashrate_collapsed(reducer.median_hashrate(), reducer.count,
+                                          self.samples_for(hashrate_collapse_min_samples), expected_hashrate):
+                        self.status["sample"] = sample + 1
+                        self.log(f"Hashrate collapsed to {reducer.median_hashrate():.0f} GH/s "
+                                 f"(expected {expected_hashrate:.0f} GH/s), aborting this combo early.", RED)
+                        return self.abort_predicted("HASHRATE_COLLAPSE")
+                else:
+                    self.predictor.add(self.clock(), info)
+
+                # Progress line
+                self.status.update(sample=sample + 1, hashRate=hash_rate, temp=temp, vrTemp=vr_temp, inputVoltage=voltage,
+                                   power=power_consumption, lastSampleTime=time.time())
+                if (sample + 1) % log_every == 0 or sample == total_samples - 1:
+                    percentage_progress = ((sample + 1) / total_samples) * 100
+                    status_line = (
+                        f"[{sample + 1:3d}/{total_samples:3d}] "
+                        f"{percentage_progress:5.1f}% | "
+                        f"CV: {core_voltage:4d}mV | "
+                        f"F: {frequency:4d}MHz | "
+                        f"H: {int(hash_rate):4d} GH/s | "
+                        f"IV: {int(voltage):4d}mV | "
+                        f"T: {int(temp):2d}°C"
+                    )
+                    if vr_temp is not None and vr_temp > 0:
+                        status_line += f" | VR: {int(vr_temp):2d}°C"
+                    self.log(status_line)
+
+                if config.early_stop and reducer.count >= self.samples_for(early_stop_min_samples):
+                    hashrate_ci, efficiency_ci = reducer.confidence()
+                    if hashrate_ci <= config.ci_width and efficiency_ci <= config.ci_width:
+                        self.log(f"Estimates converged after {reducer.count} samples "
+                                 f"(hashrate CI {hashrate_ci:.2%}, efficiency CI {efficiency_ci:.2%}), ending window early.", GREEN)
+                        break
+            if sampler.late:
+                self.log(f"Sampler fell behind the {config.poll_interval:g}s schedule {sampler.late} times "
+                         f"(slow responses).", YELLOW)
+
+        reduced = reducer.reduce()
+        if reduced is None:
+            self.log("No Hashrate or Temperature or Watts data collected.", YELLOW)
+            return None, None, None, False, None, "NO_DATA_COLLECTED"
+
+        average_hashrate = reduced["averageHashRate"]
+        average_temperature = reduced["averageTemperature"]
+        average_vr_temp = reduced["averageVRTemp"]
         if average_hashrate > 0:
-            efficiency_jth = average_power / (average_hashrate / 1_000)
+            efficiency_jth = reduced["averagePower"] / (average_hashrate / 1_000)
         else:
-            print(RED + "Warning: Zero hashrate detected, skipping efficiency calculation" + RESET)
+            self.log("Warning: Zero hashrate detected, skipping efficiency calculation", RED)
             return None, None, None, False, None, "ZERO_HASHRATE"
 
         hashrate_within_tolerance = (average_hashrate >= expected_hashrate * 0.90)
+        stats = reduced["stats"]
+        self.last_iteration_stats.update(stats)
 
-        print(GREEN + f"Average Hashrate: {average_hashrate:.2f} GH/s (Expected: {expected_hashrate:.2f} GH/s)" + RESET)
-        print(GREEN + f"Average Temperature: {average_temperature:.2f}°C" + RESET)
+        self.log(f"Average Hashrate: {average_hashrate:.2f} GH/s (Expected: {expected_hashrate:.2f} GH/s, "
+                 f"5th percentile: {stats['hashRateP05']:.2f} GH/s)", GREEN)
+        self.log(f"Average Temperature: {average_temperature:.2f}°C (max {stats['maxTemperature']:.2f}°C)", GREEN)
         if average_vr_temp is not None:
-            print(GREEN + f"Average VR Temperature: {average_vr_temp:.2f}°C" + RESET)
-        print(GREEN + f"Efficiency: {efficiency_jth:.2f} J/TH" + RESET)
+            self.log(f"Average VR Temperature: {average_vr_temp:.2f}°C", GREEN)
+        self.log(f"Efficiency: {efficiency_jth:.2f} J/TH", GREEN)
 
         return average_hashrate, average_temperature, efficiency_jth, hashrate_within_tolerance, average_vr_temp, None
-    else:
-        print(YELLOW + "No Hashrate or Temperature or Watts data collected." + RESET)
-        return None, None, None, False, None, "NO_DATA_COLLECTED"
 
-# =============================================================
-#                  RESULT HANDLING
-# =============================================================
-def save_results():
-    """Persist current results list to IP-specific JSON file."""
-    try:
-        ip_clean = nerdqaxe_ip.replace('http://', '')
-        filename = f"nerdqaxe_benchmark_results_{ip_clean}.json"
-        with open(filename, "w") as f:
-            json.dump(results, f, indent=4)
-        print(GREEN + f"Results saved to {filename}" + RESET)
-        print()
-    except IOError as e:
-        print(RED + f"Error saving results to file: {e}" + RESET)
-
-def reset_to_best_setting():
-    """Apply best hashrate settings if available; otherwise apply device defaults."""
-    if not results:
-        print(YELLOW + "No valid benchmarking results found. Applying predefined default settings." + RESET)
-        set_system_settings(default_voltage, default_frequency)
-    else:
-        best_result = sorted(results, key=lambda x: x["averageHashRate"], reverse=True)[0]
-        best_voltage = best_result["coreVoltage"]
-        best_frequency = best_result["frequency"]
-
-        print(GREEN + f"Applying the best settings from benchmarking:\n"
-                      f"  Core Voltage: {best_voltage}mV\n"
-                      f"  Frequency: {best_frequency}MHz" + RESET)
-        set_system_settings(best_voltage, best_frequency)
-
-    restart_system()
+    def reducer_factory(self):
+        """The configured window reducer: a REDUCERS name or a factory taking the session."""
+        reducer = self.config.reducer
+        return reducer if callable(reducer) else REDUCERS[reducer]
+
+    # =============================================================
+    #             LOCAL REFINEMENT OF THE TOP RESULTS
+    # =============================================================
+    def fine_tune_top_performers(self):
+        """Pattern search with shrinking steps around the best hashrate and J/TH results (or the objective's best)."""
+        target = "the best hashrate and J/TH results" if self.objective is None else f"the best {self.objective.name} result"
+        self.log(f"\n[FINE] Starting local refinement around {target}...", GREEN)
+        search = self.build_refinement()
+        if not search.incumbents:
+            self.log(f"[FINE] No result satisfies the objective ({self.objective.describe()}); nothing to refine.", YELLOW)
+            return
+        objectives = [(key, label) for key, label in (("averageHashRate", "hashrate"), ("efficiencyJTH", "J/TH"))
+                      if key in search.incumbents]
+        for key, label in objectives:
+            start = search.incumbents[key]
+            estimate = ", model map estimate" if start.get("modelEstimate") else ""
+            self.log(f"[FINE] Best {label} so far: {start['coreVoltage']} mV @ {start['frequency']} MHz "
+                     f"({start['averageHashRate']:.1f} GH/s, {start['efficiencyJTH']:.2f} J/TH{estimate})", GREEN)
+        self.status.update(combo=0, total_combos=len(search.pending), remaining=len(search.pending))
+        self.run_search(search, "FINE")
+
+        for key, label in objectives:
+            before, after = search.initial[key], search.incumbents[key]
+            if after is before:
+                self.log(f"[FINE] {label}: no neighbour of {before['coreVoltage']} mV @ {before['frequency']} MHz "
+                         f"improves beyond measurement noise.", GREEN)
+            else:
+                self.log(f"[FINE] {label}: {before['coreVoltage']}/{before['frequency']} -> "
+                         f"{after['coreVoltage']} mV @ {after['frequency']} MHz "
+                         f"({before[key]:.2f} -> {after[key]:.2f}).", GREEN)
+        self.log(f"[FINE] Refinement measured {search.measured} combos.", GREEN)
+
+    def build_refinement(self):
+        from nerdqaxe_search import LocalRefinement
+
+        return LocalRefinement(self.build_grid(), self.results, self.tested_combinations, self.pruner,
+                               self.config.limits(), failed=self.skipped_failures, objective=self.objective,
+                               seeds=self.seed_results)
+
+    # =============================================================
+    #                  RESULT HANDLING
+    # =============================================================
+    def build_result(self, core_voltage, frequency, avg_hashrate, avg_temp, efficiency_jth, avg_vr_temp):
+        """Assemble one result entry, including settle time, sample count and CI widths."""
+        result = {
+            "coreVoltage": core_voltage,
+            "frequency": frequency,
+            "averageHashRate": avg_hashrate,
+            "averageTemperature": avg_temp,
+            "efficiencyJTH": efficiency_jth
+        }
+        if avg_vr_temp is not None:
+            result["averageVRTemp"] = avg_vr_temp
+        if self.last_settle_seconds is not None:
+            result["settleSeconds"] = round(self.last_settle_seconds, 1)
+            if self.settled_from is not None:
+                result["settledFrom"] = list(self.settled_from)
+            if self.last_live_applied:
+                result["liveApplied"] = True
+        result.update(self.last_iteration_stats)
+        return result
+
+    def save_result(self, result):
+        """Append one result to the crash-safe journal; compact into the snapshot every few combos."""
+        self.failures.pop((result["coreVoltage"], result["frequency"]), None)
+        try:
+            self.journal.append("result", result)
+            if self.journal.needs_compaction():
+                self.journal.compact(self.snapshot_data())
+            self.log(f"Result saved to {self.journal.filename}", GREEN)
+            self.log("")
+        except OSError as e:
+            self.log(f"Error saving result to journal: {e}", RED)
+        if self.store is not None:
+            try:
+                self.store.add_result(self.store_run_id, self.store_device_id, result, self.config.ambient)
+            except sqlite3.Error as e:
+                self.log(f"Error saving result to store: {e}", RED)
+
+    def save_failure(self, core_voltage, frequency, error_reason, timing=None):
+        """Journal a failed combo so resume can apply the retry policy instead of retesting it blindly."""
+        failure = {
+            "coreVoltage": core_voltage,
+            "frequency": frequency,
+            "errorReason": error_reason or "UNKNOWN",
+            "sampleCount": self.status["sample"],
+            "timestamp": round(time.time(), 3),
+        }
+        if self.config.ambient is not None:
+            failure["ambient"] = self.config.ambient
+        if timing is not None:
+            failure["timing"] = timing
+        self.failures[(core_voltage, frequency)] = failure
+        try:
+            self.journal.append("failure", failure)
+        except OSError as e:
+            self.log(f"Error saving failure to journal: {e}", RED)
+        if self.store is not None:
+            try:
+                self.store.add_failure(self.store_run_id, self.store_device_id, failure)
+            except sqlite3.Error as e:
+                self.log(f"Error saving failure to store: {e}", RED)
+
+    def snapshot_data(self):
+        """Results file contents: all results sorted by V/F, top lists, failures and pruned combos."""
+        results = sorted(self.results, key=lambda x: (x["coreVoltage"], x["frequency"]))
+        final_data = build_final_data(results)
+        if self.failures:
+            final_data["failures"] = [self.failures[point] for point in sorted(self.failures)]
+        if self.pruner.pruned:
+            final_data["pruned"] = self.pruner.summary()
+        if self.objective is not None:
+            best = self.objective.best(results)
+            final_data["objective"] = {**self.objective.to_dict(), "best": summary_entry(1, best) if best else None}
+        profile = combo_profile(results, final_data.get("failures", []))
+        if profile is not None:
+            final_data["profile"] = profile
+        return final_data
+
+    def best_result(self):
+        """The setting to apply: the objective's best inside its envelope, else the highest hashrate (None if none)."""
+        if self.objective is not None:
+            return self.objective.best(self.results)
+        return max(self.results, key=lambda x: x["averageHashRate"], default=None)
+
+    def reset_to_best_setting(self):
+        """Apply the best settings (see best_result) if available; otherwise apply device defaults."""
+        best_result = self.best_result()
+        if not self.results:
+            self.log("No valid benchmarking results found. Applying predefined default settings.", YELLOW)
+            self.set_system_settings(self.default_voltage, self.default_frequency)
+        elif best_result is None:
+            self.log(f"No result satisfies the objective ({self.objective.describe()}). "
+                     f"Applying predefined default settings.", RED)
+            self.set_system_settings(self.default_voltage, self.default_frequency)
+        else:
+            best_voltage = best_result["coreVoltage"]
+            best_frequency = best_result["frequency"]
+
+            self.log(f"Applying the best settings from benchmarking:\n"
+                     f"  Core Voltage: {best_voltage}mV\n"
+                     f"  Frequency: {best_frequency}MHz", GREEN)
+            self.set_system_settings(best_voltage, best_frequency)
+
+        self.restart_system()
+
+    # =============================================================
+    #                  MAIN LOGIC
+    # =============================================================
+    def run(self):
+        """Run the full benchmark (or fine-tuning) and always finish by applying the best settings."""
+        self.prepare()
+        if self.config.telemetry and self.telemetry is None:
+            self.telemetry = TelemetryWriter(telemetry_filename(self.ip_address))
+        try:
+            self.load_resume(repair=True)
+            self.fetch_default_settings()
+            self.apply_failure_policy()
+            self.apply_objective()
+            self.open_store()
+
+            if self.config.fine:
+                if not self.results:
+                    self.log("No previous results loaded. Cannot fine-tune without baseline data.", RED)
+                    self.status.update(phase="failed", message="no baseline results")
+                    self.system_reset_done = True
+                    return
+
+                self.fine_tune_top_performers()
+                self.log("✔ Fine-tuning completed.", GREEN)
+            else:
+                if self.config.warm_start:
+                    self.apply_warm_start()
+                self.run_grid()
+        except BenchmarkInterrupted:
+            self.handling_interrupt = True
+            self.log("Benchmarking interrupted by user.", RED)
+        except Exception as e:
+            self.log(f"An unexpected error occurred: {e}", RED)
+            self.status["message"] = str(e)
+        finally:
+            self.finalize()
+
+        if self.config.daemon and self.results and not self.stop_event.is_set():
+            import nerdqaxe_autotune
+            nerdqaxe_autotune.AutotuneDaemon(self).run()
+
+    def build_grid(self):
+        """The full V/F grid within allowed bounds using configured steps."""
+        return [
+            (v, f)
+            for v in range(self.config.min_allowed_voltage, self.config.max_allowed_voltage + 1, self.config.voltage_step)
+            for f in range(self.config.min_allowed_frequency, self.config.max_allowed_frequency + 1, self.frequency_step)
+        ]
+
+    def grid_order(self):
+        """The grid in priority order and its sort key, as handed to the search strategy."""
+        grid = self.build_grid()
+
+        # Optional: start from user-provided initial pair by ordering the grid
+        # Place the initial pair and its forward region first for faster feedback
+        def sort_key(pair):
+            v, f = pair
+            bias = 0
+            if self.objective is not None:
+                bias = self.objective.grid_tier(pair)  # column by column, see Objective.grid_tier
+            elif v >= self.initial_voltage and f >= self.initial_frequency:
+                bias = -1  # test forward quadrant earlier
+            return (bias, abs(v - self.initial_voltage) + abs(f - self.initial_frequency))
+        grid.sort(key=sort_key)
+        return grid, sort_key
+
+    def build_search(self, grid, sort_key):
+        strategy = self.config.search
+        return (strategy if callable(strategy) else SEARCH_STRATEGIES[strategy])(self, grid, sort_key)
+
+    def run_grid(self):
+        """Walk the full V/F grid, starting from the initial pair."""
+        # ---------- Full-grid approach (no extra flags required) ----------
+        grid, sort_key = self.grid_order()
+        self.log(f"Total combos to test: {len(grid)}", GREEN)
+
+        search = self.build_search(grid, sort_key)
+        remaining = len(search.pending)
+        if self.tested_combinations:
+            self.log(f"Already tested combos: {len(self.tested_combinations)} | Remaining: {remaining}", YELLOW)
+        total = getattr(search, "total", len(grid))
+        self.status.update(combo=total - remaining, total_combos=total, remaining=remaining)
+
+        self.run_search(search, "RUN")
+
+        if self.pruner.pruned:
+            saved_hours = len(self.pruner.pruned) * self.estimated_combo_seconds() / 3600
+            self.log(f"Pruning skipped {len(self.pruner.pruned)} combos (~{saved_hours:.1f}h saved).", GREEN)
+        if search.pending:
+            skipped = len(search.pending)
+            improvement = (f" (best expected improvement {search.last_acquisition:.2%})"
+                           if search.last_acquisition is not None else "")
+            self.log(f"Search finished after {search.measured} combos{improvement}; {skipped} grid combos not needed "
+                     f"(~{skipped * self.estimated_combo_seconds() / 3600:.1f}h saved).", GREEN)
+
+    def run_search(self, search, tag):
+        """Measure the points a search proposes until it is done, feeding every outcome back."""
+        from nerdqaxe_schedule import transitions_from_results
+
+        self.prune_by_objective(search)
+        while True:
+            point = search.next_point()
+            if point is None:
+                break
+            current_voltage, current_frequency = point
+
+            self.status["combo"] += 1
+            self.status["remaining"] = len(search.pending)
+            self.status["total_combos"] = max(self.status["total_combos"], self.status["combo"] + self.status["remaining"])
+            eta = self.eta_seconds()
+            self.log(f"[{tag}] Testing: {current_voltage} mV @ {current_frequency} MHz "
+                     f"(combo {self.status['combo']}/{self.status['total_combos']}"
+                     + (f", ~{format_duration(eta)} left)" if eta is not None else ")"), GREEN)
+            self.profiler.start_combo()
+            self.set_system_settings(current_voltage, current_frequency)
+            avg_hashrate, avg_temp, efficiency_jth, hashrate_within_tolerance, avg_vr_temp, error_reason = self.benchmark_iteration(current_voltage, current_frequency)
+            passed = avg_hashrate is not None and avg_temp is not None and efficiency_jth is not None
+            timing = self.profiler.end_combo(passed)
+
+            if passed:
+                result = self.build_result(current_voltage, current_frequency, avg_hashrate, avg_temp, efficiency_jth, avg_vr_temp)
+                result["timing"] = timing
+                self.results.append(result)
+                self.tested_combinations.add((current_voltage, current_frequency))
+                self.save_result(result)
+                if self.config.order == "settle" and "settledFrom" in result:
+                    self.cost_model.fit(transitions_from_results(self.results))
+                reason = self.objective.violation(result) if self.objective is not None else None
+                if reason is not None:
+                    self.log(f"{current_voltage} mV @ {current_frequency} MHz is outside the objective's envelope ({reason})", YELLOW)
+                newly_pruned = search.observe(point, result, reason)
+                self.emit("on_combo_done", result)
+                if point in self.fleet_boundary:
+                    self.retract_fleet_failure(point, search)
+            else:
+                self.log(f"Skipping {current_voltage} mV @ {current_frequency} MHz due to {error_reason or 'instability'}", YELLOW)
+                self.status["message"] = f"{current_voltage}/{current_frequency}: {error_reason or 'instability'}"
+                # Not a tested combination: the retry policy decides on resume whether to test it again
+                self.save_failure(current_voltage, current_frequency, error_reason, timing)
+                self.fleet_boundary.pop(point, None)
+                newly_pruned = search.observe(point, None, error_reason)
+                self.emit("on_failure", point, error_reason or "UNKNOWN")
+                reason = error_reason
+            if newly_pruned:
+                self.status["combo"] += len(newly_pruned)
+                self.status["pruned"] = len(self.pruner.pruned)
+                self.status["remaining"] = len(search.pending)
+                self.log(f"[PRUNE] {reason} at {current_voltage} mV @ {current_frequency} MHz rules out "
+                         f"{len(newly_pruned)} more combos | Remaining: {len(search.pending)}", YELLOW)
+            self.prune_by_objective(search)
+
+    def prune_by_objective(self, search):
+        """Rule out pending combos whose frequency cannot reach the objective (frequency x cores bound)."""
+        if self.objective is None or not self.small_core_count or not self.asic_count:
+            return
+        hashrate_per_mhz = self.small_core_count * self.asic_count / 1000
+        best = self.objective.best(self.results)
+        excluded = Counter()
+        dropped = []
+        for point in search.pending:
+            reason = self.objective.unreachable(point, hashrate_per_mhz, best)
+            if reason is not None:
+                self.pruner.exclude(point, reason)
+                excluded[reason] += 1
+                dropped.append(point)
+        if not dropped:
+            return
+        search.discard(dropped)
+        self.status["combo"] += len(dropped)
+        self.status.update(pruned=len(self.pruner.pruned), remaining=len(search.pending))
+        for reason, count in excluded.items():
+            self.log(f"[PRUNE] {reason}: {count} combos cannot meet the objective | Remaining: {len(search.pending)}", YELLOW)
+
+    def retract_fleet_failure(self, point, search):
+        """A fleet failure point passed on this unit: give back the combos only it ruled out."""
+        reason = self.fleet_boundary.pop(point)
+        freed = self.pruner.retract(point)
+        search.restore(freed)
+        self.status["combo"] -= len(freed)
+        self.status.update(pruned=len(self.pruner.pruned), remaining=len(search.pending))
+        self.log(f"[WARM] {point[0]} mV @ {point[1]} MHz passed on this unit despite the fleet's {reason}; "
+                 f"{len(freed)} combos back in the queue | Remaining: {len(search.pending)}", YELLOW)
+
+    def eta_seconds(self):
+        """Rough time to finish the current phase of work: remaining combos at the average cost so far."""
+        status = self.status
+        if status["phase"] in ("done", "failed", "idle", "monitoring"):
+            return None
+        current = 0.0
+        if status["phase"] == "measuring":
+            current = max(status["total_samples"] - status["sample"], 0) * self.config.poll_interval
+        elif status["phase"] == "settling":
+            current = max(self.estimated_combo_seconds() - self.profiler.combo_elapsed(), 0.0)
+        return current + status["remaining"] * self.estimated_combo_seconds()
+
+    def log_plan(self, points):
+        """Print the planned test order with its expected duration."""
+        from nerdqaxe_schedule import planned_seconds
+
+        if not points:
+            return
+        settle_seconds = planned_seconds(self.current_settings or points[0], points, self.cost_model)
+        total_hours = (settle_seconds + len(points) * self.measure_time) / 3600
+        model = f"fitted on {self.cost_model.observations} transitions" if self.cost_model.observations else "prior"
+        self.log(f"Planned order ({self.config.order}, settle model: {model}): {len(points)} combos, "
+                 f"~{settle_seconds / 3600:.1f}h settling, ~{total_hours:.1f}h total", GREEN)
+        for start in range(0, len(points), 8):
+            self.log("  " + " -> ".join(f"{v}/{f}" for v, f in points[start:start + 8]))
+
+    def plan(self):
+        """--plan: estimate how long run() would take, from the grid, the resume state and past combo costs.
+
+        Reads only the results file; the device is not contacted and no settings change.
+        Returns the estimate in (device) seconds, or None if there is nothing to plan.
+        """
+        from nerdqaxe_schedule import planned_seconds, transitions_from_results
+
+        self.prepare()
+        self.load_resume()
+        self.apply_failure_policy()
+        self.apply_objective()
+        self.cost_model.fit(transitions_from_results(self.results))
+        if self.config.fine:
+            if not self.results:
+                self.log("No previous results loaded. Cannot fine-tune without baseline data.", RED)
+                return None
+            points = self.build_refinement().planned_points()
+            what = "fine refinement, if no incumbent moves"
+        else:
+            grid, sort_key = self.grid_order()
+            points = self.build_search(grid, sort_key).pending
+            # Adaptive search stops early, and an objective rules out combos as results come in
+            upper_bound = self.config.search == "adaptive" or self.objective is not None
+            what = f"{factory_name(self.config.search)} search" + (", upper bound" if upper_bound else "")
+            if self.config.warm_start:
+                self.log("Plan ignores --warm-start: the fleet store is not read.", YELLOW)
+        if not points:
+            self.log(f"Nothing left to test for {self.ip_address} ({len(self.tested_combinations)} combos already tested).", GREEN)
+            return 0.0
+
+        per_combo = self.profiler.mean_combo_seconds()
+        if per_combo is not None:
+            total = per_combo * len(points)
+            basis = f"mean of {self.profiler.timed_combos} profiled combos, {format_duration(per_combo)} each"
+        else:
+            windows = [r["sampleCount"] * r.get("pollInterval", sample_interval) for r in self.results if "sampleCount" in r]
+            window = sum(windows) / len(windows) if windows else self.measure_time
+            settle = planned_seconds(self.current_settings or points[0], points, self.cost_model)
+            total = settle + len(points) * (window + 2)
+            model = f"fitted on {self.cost_model.observations} transitions" if self.cost_model.observations else "prior"
+            basis = f"settle model ({model}) and {format_duration(window)} measurement windows"
+        finish = time.strftime("%a %H:%M", time.localtime(time.time() + total / self.config.time_scale))
+        self.log(f"Plan for {self.ip_address}: {len(points)} combos ({what}), "
+                 f"{len(self.tested_combinations)} already tested, {len(self.skipped_failures) + len(self.pruner.pruned)} "
+                 f"skipped or ruled out", GREEN)
+        self.log(f"  ~{format_duration(total)} ({basis}), done around {finish} if started now", GREEN)
+        phases = self.profiler.mean_phase_seconds()
+        if phases is not None:
+            self.log(f"  Typical combo: {phase_breakdown(phases, per_combo)}", GREEN)
+        return total
+
+    def estimated_combo_seconds(self):
+        """Average cost of one tested combo: profiled combos first, else settle + measurement of results."""
+        profiled = self.profiler.mean_combo_seconds()
+        if profiled is not None:
+            return profiled
+        costs = [r["settleSeconds"] + r["sampleCount"] * r.get("pollInterval", sample_interval)
+                 for r in self.results if "settleSeconds" in r and "sampleCount" in r]
+        if not costs:
+            return settle_max_time + self.measure_time
+        return sum(costs) / len(costs)
+
+    def finalize(self):
+        """Apply best (or default) settings once, then write and print the summary."""
+        if not self.system_reset_done:
+            self.status["phase"] = "finalizing"
+            if self.stop_event.is_set():
+                self.handling_interrupt = True
+            if self.results:
+                self.reset_to_best_setting()
+                self.log("Bitaxe reset to best settings.", GREEN)
+            else:
+                self.log("No valid benchmarking results found. Applying predefined default settings.", YELLOW)
+                self.set_system_settings(self.default_voltage, self.default_frequency)
+                self.restart_system()
+            self.system_reset_done = True
+
+        if self.status["phase"] != "failed":
+            self.status["phase"] = "done"
+        if self.telemetry is not None:
+            self.telemetry.close()
+        if self.store is not None:
+            self.store.close()
+        self.log_http_stats()
+
+        # Print results summary only if we have results
+        if self.results:
+            self.write_summary()
+
+    def log_http_stats(self):
+        """One line per endpoint: request count, latency percentiles and errors."""
+        stats = self.client.stats()
+        if not stats["endpoints"]:
+            return
+        self.log(f"HTTP client (circuit {stats['circuit']}, opened {stats['circuitOpened']}x):", GREEN)
+        for key, endpoint in sorted(self.client.endpoints.items()):
+            latency = endpoint.latency
+            errors = ", ".join(f"{kind} {n}" for kind, n in sorted(endpoint.errors.items())) or "no errors"
+            self.log(f"  {key:<28} {latency.count:>6} requests | p50 {latency.percentile(50) or 0:.0f} ms, "
+                     f"p99 {latency.percentile(99) or 0:.0f} ms | {errors} | {endpoint.retries} retries")
+
+    def write_summary(self):
+        """Save the final results file with top lists and print the summary."""
+        # Sort all results by coreVoltage, then frequency
+        self.results = sorted(self.results, key=lambda x: (x["coreVoltage"], x["frequency"]))
+        results = self.results
 
-# =============================================================
-#                  MAIN LOGIC
-# =============================================================
-try:
-    fetch_default_settings()
+        top_8_results, top_8_efficient_results = rank_results(results)
 
-    if args.fine:
-        if not results:
-            print(RED + "No previous results loaded. Cannot fine-tune without baseline data." + RESET)
-            sys.exit(1)
+        # Compact the journal into the final results file
+        try:
+            self.journal.compact(self.snapshot_data())
+            self.log(f"Results saved to {self.results_filename}", GREEN)
+        except OSError as e:
+            self.log(f"Error saving results to {self.results_filename}: {e} (the journal {self.journal.filename} still has them)", RED)
+
+        self.log("Benchmarking completed.", GREEN)
+        settle_times = [r["settleSeconds"] for r in results if "settleSeconds" in r]
+        if settle_times:
+            saved_hours = sum(settle_max_time - t for t in settle_times) / 3600
+            self.log(f"Average stabilization time: {sum(settle_times) / len(settle_times):.0f}s per combo "
+                     f"({saved_hours:.1f}h saved versus a fixed {settle_max_time}s wait)", GREEN)
+        self.profiler.charge()
+        run_seconds = sum(self.profiler.totals.values())
+        if run_seconds > 0:
+            requests_made, http_seconds = self.http_totals()
+            self.log(f"Run time {format_duration(run_seconds)}: {phase_breakdown(self.profiler.totals, run_seconds)}", GREEN)
+            self.log(f"  {format_duration(self.profiler.aborted_seconds)} spent on combos without a result, "
+                     f"{requests_made} HTTP requests ({http_seconds:.1f}s latency)", GREEN)
+        if top_8_results:
+            self.log("\nTop 8 Highest Hashrate Settings:", GREEN)
+            for i, result in enumerate(top_8_results, 1):
+                self.print_result(i, result)
 
-        top_8_results = sorted(results, key=lambda x: x["averageHashRate"], reverse=True)[:8]
-        fine_tune_top_performers(top_8_results)
-        save_results()
-        reset_to_best_setting()
-        print(GREEN + "✔ Fine-tuning completed. Results saved and best settings applied." + RESET)
-        sys.exit(0)
+            self.log("\nTop 8 Most Efficient Settings:", GREEN)
+            for i, result in enumerate(top_8_efficient_results, 1):
+                self.print_result(i, result)
+
+            if self.objective is not None:
+                best = self.objective.best(results)
+                self.log(f"\nBest for the objective ({self.objective.describe()}):", GREEN)
+                if best is None:
+                    self.log("  No result satisfies it.", RED)
+                else:
+                    self.print_result(1, best)
+
+            from nerdqaxe_analysis import pareto_front
+            self.log("\nPareto Front (no other setting has more hashrate, lower J/TH and lower temperature at once):", GREEN)
+            for result in pareto_front(results):
+                self.log(f"  {result['coreVoltage']:>5} mV @ {result['frequency']:>4} MHz | "
+                         f"{result['averageHashRate']:>8.1f} GH/s | {result['efficiencyJTH']:>6.2f} J/TH | "
+                         f"{result['averageTemperature']:.1f}°C", GREEN)
+        else:
+            self.log("No valid results were found during benchmarking.", RED)
+
+    def print_result(self, rank, result):
+        """Print one ranked result block."""
+        self.log(f"\nRank {rank}:", GREEN)
+        self.log(f"  Core Voltage: {result['coreVoltage']}mV", GREEN)
+        self.log(f"  Frequency: {result['frequency']}MHz", GREEN)
+        self.log(f"  Average Hashrate: {result['averageHashRate']:.2f} GH/s", GREEN)
+        self.log(f"  Average Temperature: {result['averageTemperature']:.2f}°C", GREEN)
+        self.log(f"  Efficiency: {result['efficiencyJTH']:.2f} J/TH", GREEN)
+        if "averageVRTemp" in result:
+            self.log(f"  Average VR Temperature: {result['averageVRTemp']:.2f}°C", GREEN)
 
+# =============================================================
+#                  CLI ENTRY POINT
+# =============================================================
+def print_disclaimer():
     # Add disclaimer
     print(RED + "\nDISCLAIMER:" + RESET)
     print("This tool will stress test your Bitaxe by running it at various voltages and frequencies.")
@@ -468,173 +1888,81 @@ try:
     print("\nNOTE: Ambient temperature significantly affects these results. The optimal settings found may not")
     print("work well if room temperature changes substantially. Re-run the benchmark if conditions change.\n")
 
-    # ---------- Full-grid approach (no extra flags required) ----------
-    # Build the full V/F grid within allowed bounds using configured steps
-    grid = [
-        (v, f)
-        for v in range(min_allowed_voltage, max_allowed_voltage + 1, voltage_step)
-        for f in range(min_allowed_frequency, max_allowed_frequency + 1, frequency_step)
-    ]
-
-    # Optional: start from user-provided initial pair by ordering the grid
-    # Place the initial pair and its forward region first for faster feedback
-    def sort_key(pair):
-        v, f = pair
-        bias = 0
-        if v >= initial_voltage and f >= initial_frequency:
-            bias = -1  # test forward quadrant earlier
-        return (bias, abs(v - initial_voltage) + abs(f - initial_frequency))
-    grid.sort(key=sort_key)
-
-    print(GREEN + f"Total combos to test: {len(grid)}" + RESET)
-
-    remaining = sum(1 for p in grid if p not in tested_combinations)
-    if tested_combinations:
-        print(YELLOW + f"Already tested combos: {len(tested_combinations)} | Remaining: {remaining}" + RESET)
-
-    for (current_voltage, current_frequency) in grid:
-        if (current_voltage, current_frequency) in tested_combinations:
-            print(YELLOW + f"[SKIP] Already tested: {current_voltage} mV @ {current_frequency} MHz" + RESET)
-            continue
-
-        print(GREEN + f"[RUN] Testing: {current_voltage} mV @ {current_frequency} MHz" + RESET)
-        set_system_settings(current_voltage, current_frequency)
-        avg_hashrate, avg_temp, efficiency_jth, hashrate_within_tolerance, avg_vr_temp, error_reason = benchmark_iteration(current_voltage, current_frequency)
-
-        if avg_hashrate is not None and avg_temp is not None and efficiency_jth is not None:
-            result = {
-                "coreVoltage": current_voltage,
-                "frequency": current_frequency,
-                "averageHashRate": avg_hashrate,
-                "averageTemperature": avg_temp,
-                "efficiencyJTH": efficiency_jth
-            }
-            if avg_vr_temp is not None:
-                result["averageVRTemp"] = avg_vr_temp
-
-            results.append(result)
-            tested_combinations.add((current_voltage, current_frequency))
-            save_results()
-        else:
-            print(YELLOW + f"Skipping {current_voltage} mV @ {current_frequency} MHz due to {error_reason or 'instability'}" + RESET)
-            # Do not add to tested_combinations to allow retry in future runs if needed
-            continue
-
-    # Finished grid
-    save_results()
-
-except Exception as e:
-    print(RED + f"An unexpected error occurred: {e}" + RESET)
-    if results:
-        reset_to_best_setting()
-        save_results()
-    else:
-        print(YELLOW + "No valid benchmarking results found. Applying predefined default settings." + RESET)
-        set_system_settings(default_voltage, default_frequency)
-        restart_system()
-finally:
-    if not system_reset_done:
-        if results:
-            reset_to_best_setting()
-            save_results()
-            print(GREEN + "Bitaxe reset to best or default settings and results saved." + RESET)
-        else:
-            print(YELLOW + "No valid benchmarking results found. Applying predefined default settings." + RESET)
-            set_system_settings(default_voltage, default_frequency)
-            restart_system()
-        system_reset_done = True
-        results = sorted(results, key=lambda x: (x["coreVoltage"], x["frequency"]))
-
-    # Print results summary only if we have results
-    if results:
-        # Sort all results by coreVoltage, then frequency
-        results = sorted(results, key=lambda x: (x["coreVoltage"], x["frequency"]))
-
-        # Determine top 8 performers and most efficient settings
-        top_8_results = sorted(results, key=lambda x: x["averageHashRate"], reverse=True)[:8]
-        top_8_efficient_results = sorted(results, key=lambda x: x["efficiencyJTH"], reverse=True)[:8]
-
-        # Create a dictionary containing all results and top performers
-        final_data = {
-            "all_results": results,
-            "top_performers": [
-                {
-                    "rank": i,
-                    "coreVoltage": result["coreVoltage"],
-                    "frequency": result["frequency"],
-                    "averageHashRate": result["averageHashRate"],
-                    "averageTemperature": result["averageTemperature"],
-                    "efficiencyJTH": result["efficiencyJTH"],
-                    **({"averageVRTemp": result["averageVRTemp"]} if "averageVRTemp" in result else {})
-                }
-                for i, result in enumerate(top_8_results, 1)
-            ],
-            "most_efficient": [
-                {
-                    "rank": i,
-                    "coreVoltage": result["coreVoltage"],
-                    "frequency": result["frequency"],
-                    "averageHashRate": result["averageHashRate"],
-                    "averageTemperature": result["averageTemperature"],
-                    "efficiencyJTH": result["efficiencyJTH"],
-                    **({"averageVRTemp": result["averageVRTemp"]} if "averageVRTemp" in result else {})
-                }
-                for i, result in enumerate(top_8_efficient_results, 1)
-            ]
-        }
-
-        # Save the final data to JSON
-        ip_clean = nerdqaxe_ip.replace('http://', '')
-        filename = f"nerdqaxe_benchmark_results_{ip_clean}.json"
-        with open(filename, "w") as f:
-            json.dump(final_data, f, indent=4)
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "replay":
+        import nerdqaxe_replay
+        nerdqaxe_replay.main(sys.argv[2:])
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == "budget":
+        import nerdqaxe_budget
+        nerdqaxe_budget.main(sys.argv[2:])
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == "analyze":
+        import nerdqaxe_analysis
+        nerdqaxe_analysis.main(sys.argv[2:])
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == "store":
+        import nerdqaxe_store
+        nerdqaxe_store.main(sys.argv[2:])
+        return
 
-        print(GREEN + "Benchmarking completed." + RESET)
-        if top_8_results:
-            print(GREEN + "\nTop 8 Highest Hashrate Settings:" + RESET)
-            for i, result in enumerate(top_8_results, 1):
-                print(GREEN + f"\nRank {i}:" + RESET)
-                print(GREEN + f"  Core Voltage: {result['coreVoltage']}mV" + RESET)
-                print(GREEN + f"  Frequency: {result['frequency']}MHz" + RESET)
-                print(GREEN + f"  Average Hashrate: {result['averageHashRate']:.2f} GH/s" + RESET)
-                print(GREEN + f"  Average Temperature: {result['averageTemperature']:.2f}°C" + RESET)
-                print(GREEN + f"  Efficiency: {result['efficiencyJTH']:.2f} J/TH" + RESET)
-                if "averageVRTemp" in result:
-                    print(GREEN + f"  Average VR Temperature: {result['averageVRTemp']:.2f}°C" + RESET)
-
-            print(GREEN + "\nTop 8 Most Efficient Settings:" + RESET)
-            for i, result in enumerate(top_8_efficient_results, 1):
-                print(GREEN + f"\nRank {i}:" + RESET)
-                print(GREEN + f"  Core Voltage: {result['coreVoltage']}mV" + RESET)
-                print(GREEN + f"  Frequency: {result['frequency']}MHz" + RESET)
-                print(GREEN + f"  Average Hashrate: {result['averageHashRate']:.2f} GH/s" + RESET)
-                print(GREEN + f"  Average Temperature: {result['averageTemperature']:.2f}°C" + RESET)
-                print(GREEN + f"  Efficiency: {result['efficiencyJTH']:.2f} J/TH" + RESET)
-                if "averageVRTemp" in result:
-                    print(GREEN + f"  Average VR Temperature: {result['averageVRTemp']:.2f}°C" + RESET)
+    args = parse_arguments()
+    config = BenchmarkConfig.from_args(args)
+    config.validate()
+    validate_arguments(args)
+
+    if args.plan:
+        if args.shard:
+            import nerdqaxe_fleet
+            import nerdqaxe_shard
+            ips = nerdqaxe_fleet.load_fleet_ips(args.fleet)
+            nerdqaxe_shard.ShardCoordinator([BenchmarkSession(ip, config) for ip in ips]).plan()
+            return
+        if args.fleet:
+            import nerdqaxe_fleet
+            ips = nerdqaxe_fleet.load_fleet_ips(args.fleet)
         else:
-            print(RED + "No valid results were found during benchmarking." + RESET)
+            ips = [args.nerdqaxe_ip]
+        totals = [BenchmarkSession(ip, config).plan() for ip in ips]
+        if len(ips) > 1:
+            longest = max((t for t in totals if t is not None), default=None)
+            print(GREEN + f"Fleet runs concurrently: ~{format_duration(longest)} until the slowest unit is done." + RESET)
+        return
 
-# =============================================================
-#                  CLEANUP
-# =============================================================
-def cleanup_and_exit(reason=None):
-    """Finalizer used by signal/exception paths to persist and apply best settings."""
-    global system_reset_done
-    if system_reset_done:
+    if not config.fine:
+        print_disclaimer()
+
+    if args.fleet:
+        import nerdqaxe_fleet
+        metrics = (args.metrics_host, args.metrics_port) if args.metrics_port else None
+        nerdqaxe_fleet.run_fleet(nerdqaxe_fleet.load_fleet_ips(args.fleet), config, metrics=metrics, shard=args.shard)
         return
 
+    session = BenchmarkSession(args.nerdqaxe_ip, config)
+    metrics_server = None
+    if args.metrics_port:
+        import nerdqaxe_metrics
+        metrics_server = nerdqaxe_metrics.start_metrics_server([session], args.metrics_port, args.metrics_host)
+        print(GREEN + f"Metrics: http://{args.metrics_host}:{args.metrics_port}/metrics" + RESET)
+
+    # =============================================================
+    #                      SIGNAL HANDLING
+    # =============================================================
+    def handle_sigint(signum, frame):
+        """On Ctrl+C, let the session apply best known settings and save."""
+        session.request_stop()
+
+    signal.signal(signal.SIGINT, handle_sigint)
     try:
-        if results:
-            reset_to_best_setting()
-            save_results()
-            print(GREEN + "Bitaxe reset to best settings and results saved." + RESET)
-        else:
-            print(YELLOW + "No valid benchmarking results found. Applying predefined default settings." + RESET)
-            set_system_settings(default_voltage, default_frequency)
+        session.run()
     finally:
-        system_reset_done = True
-        if reason:
-            print(RED + f"Benchmarking stopped: {reason}" + RESET)
-        print(GREEN + "Benchmarking completed." + RESET)
-        sys.exit(0)
+        if metrics_server is not None:
+            metrics_server.shutdown()
+    if session.status["phase"] == "failed":
+        sys.exit(1)
+
+if __name__ == "__main__":
+    # Run the importable module rather than __main__: the helper modules import
+    # nerdqaxe_benchmark, so both must share one set of classes and tunables
+    import nerdqaxe_benchmark
+    nerdqaxe_benchmark.main()
@@ -0,0 +1,266 @@
+# =============================================================
+#                FLEET POWER-BUDGET ALLOCATOR
+# =============================================================
+# max_power guards a single device; a circuit feeding many miners has one
+# shared budget. Given each device's benchmark results, pick one (V, F) per
+# device so the fleet's total hashrate is maximal while the summed power
+# (efficiencyJTH * averageHashRate / 1000) stays within the budget. This is
+# a multiple-choice knapsack:
+#
+#   1. Per device only the Pareto front is kept (each step up in power
+#      must buy more hashrate); a full grid shrinks to ~10-20 choices.
+#   2. Dynamic programming over the power above each device's cheapest
+#      choice, in cells of `resolution` watts, one vectorized row update per
+#      choice. Choice powers are rounded up, so the plan never exceeds the
+#      budget; the cell size grows if the table would get too large.
+#   3. The watts lost to rounding are handed out greedily on real powers
+#      (best hashrate per extra watt first).
+#
+# Hundreds of devices with full result grids are solved in well under a
+# second.
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import math
+import os
+import re
+import sys
+import time
+
+import numpy as np
+
+from nerdqaxe_benchmark import GREEN, YELLOW, RED, RESET
+from nerdqaxe_journal import ResultJournal
+
+budget_resolution = 0.1          # watts per DP cell
+budget_max_cells = 20000         # the cell size grows beyond this many cells
+
+RESULTS_FILE_PATTERN = re.compile(r"nerdqaxe_benchmark_results_(.+)\.json$")
+
+def result_power(result):
+    return result["efficiencyJTH"] * result["averageHashRate"] / 1000
+
+def pareto_choices(results, max_temp=None):
+    """(power, hashrate, result) choices sorted by power where each one adds hashrate."""
+    choices = sorted(
+        ((result_power(r), r["averageHashRate"], r) for r in results
+         if max_temp is None or r.get("averageTemperature") is None or r["averageTemperature"] <= max_temp),
+        key=lambda c: (c[0], -c[1]))
+    front = []
+    for choice in choices:
+        if not front or choice[1] > front[-1][1]:
+            front.append(choice)
+    return front
+
+def allocate(fronts, budget, resolution=budget_resolution, max_cells=budget_max_cells):
+    """Pick one result per device maximizing total hashrate with total power <= budget.
+
+    fronts maps a device name to its pareto_choices(). Returns {name: result}, or None
+    if even the cheapest choices exceed the budget.
+    """
+    names = [name for name in fronts if fronts[name]]
+    fronts = [fronts[name] for name in names]
+    if not fronts:
+        return {}
+    base = sum(front[0][0] for front in fronts)
+    if base > budget + 1e-9:
+        return None
+
+    # Extra power above each device's cheapest choice, in DP cells
+    spread = sum(front[-1][0] - front[0][0] for front in fronts)
+    extra = min(budget - base, spread)
+    resolution = max(resolution, extra / max_cells)
+    cells = int(math.floor(extra / resolution + 1e-9)) + 1 if extra > 0 else 1
+
+    best = np.zeros(cells)                # best hashrate above the cheapest choices, per extra power allowed
+    picks = np.zeros((len(fronts), cells), dtype=np.int16)
+    for d, front in enumerate(fronts):
+        low_power, low_hashrate = front[0][0], front[0][1]
+        updated = best.copy()             # choice 0: no extra power, no extra hashrate
+        for c, (power, hashrate, _) in enumerate(front[1:], 1):
+            weight = int(math.ceil((power - low_power) / resolution - 1e-9))
+            if weight >= cells:
+                break
+            candidate = best[:cells - weight] + (hashrate - low_hashrate)
+            better = candidate > updated[weight:]
+            np.copyto(updated[weight:], candidate, where=better)
+            np.copyto(picks[d, weight:], c, where=better)
+        best = updated
+
+    # Walk back from the full budget
+    chosen = [0] * len(fronts)
+    cell = cells - 1
+    for d in range(len(fronts) - 1, -1, -1):
+        chosen[d] = int(picks[d, cell])
+        power = fronts[d][chosen[d]][0] - fronts[d][0][0]
+        cell -= int(math.ceil(power / resolution - 1e-9))
+
+    # Hand out the watts lost to rounding, best hashrate per watt first
+    used = sum(front[c][0] for front, c in zip(fronts, chosen))
+    while True:
+        upgrades = [
+            ((front[k][1] - front[chosen[d]][1]) / max(front[k][0] - front[chosen[d]][0], 1e-9), d, k)
+            for d, front in enumerate(fronts)
+            for k in range(chosen[d] + 1, len(front))
+            if used - front[chosen[d]][0] + front[k][0] <= budget + 1e-9
+        ]
+        if not upgrades:
+            break
+        _, d, k = max(upgrades)
+        used += fronts[d][k][0] - fronts[d][chosen[d]][0]
+        chosen[d] = k
+    return {name: front[c][2] for name, front, c in zip(names, fronts, chosen)}
+
+# =============================================================
+#                     LOADING & APPLYING
+# =============================================================
+def load_results_file(filename):
+    """All results of a results snapshot plus its journal."""
+    snapshot, records = ResultJournal(filename).load()
+    return list(snapshot.get("all_results", [])) + [r["entry"] for r in records if r["type"] == "result"]
+
+def device_name(filename):
+    match = RESULTS_FILE_PATTERN.search(os.path.basename(filename))
+    return match.group(1) if match else filename
+
+def apply_settings(ip_address, result, connect_timeout, read_timeout):
+    """PATCH the chosen V/F and restart hashing; returns None or an error message."""
+    import requests
+    from nerdqaxe_client import DeviceClient
+
+    client = DeviceClient(f"http://{ip_address}", connect_timeout=connect_timeout, read_timeout=read_timeout)
+    try:
+        client.patch("/api/system", json={"coreVoltage": result["coreVoltage"], "frequency": result["frequency"]})
+        time.sleep(2)
+        client.post("/api/system/restart")
+        return None
+    except requests.exceptions.RequestException as e:
+        return str(e)
+    finally:
+        client.close()
+
+async def apply_plan(plan, connect_timeout, read_timeout):
+    """Apply every device's setting concurrently; returns {ip: error or None}."""
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(concurrent.futures.ThreadPoolExecutor(max_workers=max(len(plan), 1)))
+    ips = list(plan)
+    outcomes = await asyncio.gather(*(asyncio.to_thread(apply_settings, ip, plan[ip], connect_timeout, read_timeout)
+                                      for ip in ips))
+    return dict(zip(ips, outcomes))
+
+def parse_arguments(argv):
+    parser = argparse.ArgumentParser(prog="nerdqaxe_benchmark.py budget",
+                                     description='Pick one V/F per device that maximizes fleet hashrate under a power budget')
+    parser.add_argument('results_files', nargs='*', help='nerdqaxe_benchmark_results_<ip>.json files')
+    parser.add_argument('--budget', type=float, required=True, help='Total power budget for all devices (W)')
+    parser.add_argument('--fleet', metavar='IPS_OR_FILE', help='Use the results files of these devices')
+    parser.add_argument('--store', nargs='?', const="", metavar='DB',
+                        help='Use the results of every unit in the fleet store instead of results files')
+    parser.add_argument('--model', help='With --store: only this device model')
+    parser.add_argument('--max-temp', type=float, help='Ignore results with a higher average chip temperature (°C)')
+    parser.add_argument('--resolution', type=float, default=budget_resolution,
+                        help=f'Power resolution of the optimizer in W (default: {budget_resolution})')
+    parser.add_argument('--output', default='nerdqaxe_budget_plan.json', help='Plan file (default: nerdqaxe_budget_plan.json)')
+    parser.add_argument('--apply', action='store_true', help='Apply the chosen settings to every device in parallel')
+    parser.add_argument('--connect-timeout', type=float, default=3.05, help='Seconds to wait for a connection (default: 3.05)')
+    parser.add_argument('--read-timeout', type=float, default=20.0, help='Seconds to wait for a response (default: 20)')
+    args = parser.parse_args(argv)
+    if not args.results_files and not args.fleet and args.store is None:
+        parser.error("give results files, --fleet or --store")
+    if args.budget <= 0 or args.resolution <= 0:
+        parser.error("--budget and --resolution must be greater than zero")
+    return args
+
+def load_devices(args):
+    """({device: results}, {device: ip or None}) from the store, the fleet's results files or the given files.
+
+    With --store, units that share a recorded IP keep only the most recently seen one as host.
+    """
+    if args.store is not None:
+        from nerdqaxe_store import ResultStore, default_store_filename
+        store = ResultStore(args.store or default_store_filename)
+        units = store.unit_results(args.model)
+        store.close()
+        # Keyed by unit: a re-benchmarked device may share its recorded IP with an older unit
+        devices = {name: unit["results"] for name, unit in units.items()}
+        hosts = {}
+        for name, unit in sorted(units.items(), key=lambda item: item[1]["lastSeen"] or 0):
+            older = next((other for other, ip in hosts.items() if unit["ip"] and ip == unit["ip"]), None)
+            if older is not None:
+                print(YELLOW + f"{older}: shares {unit['ip']} with the more recently seen {name}" + RESET)
+                hosts[older] = None
+            hosts[name] = unit["ip"]
+        return devices, hosts
+
+    filenames = list(args.results_files)
+    if args.fleet:
+        from nerdqaxe_fleet import load_fleet_ips
+        filenames += [f"nerdqaxe_benchmark_results_{ip}.json" for ip in load_fleet_ips(args.fleet)]
+    devices = {}
+    for filename in filenames:
+        name = device_name(filename)
+        if not ResultJournal(filename).exists():
+            print(RED + f"No results for {name} ({filename} not found)" + RESET)
+            continue
+        devices[name] = load_results_file(filename)
+    return devices, {name: name for name in devices}
+
+def main(argv):
+    args = parse_arguments(argv)
+    devices, hosts = load_devices(args)
+    empty = sorted(name for name, results in devices.items() if not results)
+    for name in empty:
+        print(YELLOW + f"{name}: no results, left out of the plan" + RESET)
+
+    started = time.perf_counter()
+    fronts = {name: pareto_choices(results, args.max_temp) for name, results in devices.items() if results}
+    for name in [name for name, front in fronts.items() if not front]:
+        print(YELLOW + f"{name}: no result within --max-temp, left out of the plan" + RESET)
+    plan = allocate(fronts, args.budget, args.resolution)
+    elapsed = time.perf_counter() - started
+    if plan is None:
+        minimum = sum(front[0][0] for front in fronts.values() if front)
+        print(RED + f"Budget {args.budget:.0f} W is too small: the cheapest results of {len(fronts)} devices "
+                    f"already draw {minimum:.1f} W." + RESET)
+        sys.exit(1)
+
+    total_power = sum(result_power(r) for r in plan.values())
+    total_hashrate = sum(r["averageHashRate"] for r in plan.values())
+    unconstrained = sum(front[-1][1] for front in fronts.values() if front)
+    unconstrained_power = sum(front[-1][0] for front in fronts.values() if front)
+    for name, result in sorted(plan.items()):
+        temp = result.get("averageTemperature")
+        print(f"{name:<21} {result['coreVoltage']:>5} mV @ {result['frequency']:>4} MHz | "
+              f"{result['averageHashRate']:>8.1f} GH/s | {result_power(result):>6.1f} W | "
+              f"{result['efficiencyJTH']:>6.2f} J/TH | {'-' if temp is None else f'{temp:.1f}°C'}")
+    print(GREEN + f"{len(plan)} devices: {total_hashrate / 1000:.2f} TH/s at {total_power:.1f} W of {args.budget:.0f} W "
+                  f"({total_hashrate / unconstrained:.1%} of the {unconstrained / 1000:.2f} TH/s the fleet reaches "
+                  f"at {unconstrained_power:.0f} W); solved in {elapsed * 1000:.0f} ms" + RESET)
+
+    plan_data = {
+        "budget": args.budget,
+        "totalPower": round(total_power, 2),
+        "totalHashRate": round(total_hashrate, 2),
+        "devices": [{"device": name, **result, "power": round(result_power(result), 2)}
+                    for name, result in sorted(plan.items())],
+    }
+    with open(args.output, "w") as f:
+        json.dump(plan_data, f, indent=4)
+    print(GREEN + f"Plan saved to {args.output}" + RESET)
+
+    if args.apply:
+        for name in sorted(name for name in plan if not hosts.get(name)):
+            print(YELLOW + f"{name}: no current IP address recorded, settings not applied" + RESET)
+        targets = {hosts[name]: result for name, result in plan.items() if hosts.get(name)}
+        outcomes = asyncio.run(apply_plan(targets, args.connect_timeout, args.read_timeout))
+        for ip, error in sorted(outcomes.items()):
+            if error is None:
+                print(GREEN + f"{ip}: applied {targets[ip]['coreVoltage']}mV @ {targets[ip]['frequency']}MHz" + RESET)
+            else:
+                print(RED + f"{ip}: failed to apply settings: {error}" + RESET)
+        if any(outcomes.values()):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,261 @@
+# =============================================================
+#                  POOLED DEVICE HTTP CLIENT
+# =============================================================
+# One DeviceClient per device wraps a requests.Session, so consecutive
+# calls reuse a keep-alive connection instead of paying TCP setup (and on
+# Wi-Fi often a lost SYN) every few seconds. On top of the pool:
+#
+#   - separate connect and read timeouts: an unreachable device fails in
+#     seconds instead of blocking for the full read timeout
+#   - exponential backoff with full jitter between retries, so many
+#     devices on one access point do not retry in lockstep
+#   - a circuit breaker per device: after consecutive transport failures
+#     calls fail immediately until a cooldown has passed, then a single
+#     probe decides whether the device is back
+#   - per-endpoint latency histograms and error counters
+#
+# Errors are raised as requests exceptions (CircuitOpenError is one), so
+# callers keep catching requests.exceptions.RequestException.
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Timeouts (seconds)
+connect_timeout = 3.05
+read_timeout = 20
+
+# Retries: delay before attempt n is uniform(0, min(backoff_max, backoff_base * 2**n))
+default_retries = 2
+backoff_base = 2.0
+backoff_max = 30.0
+
+# Circuit breaker
+breaker_failure_threshold = 5     # consecutive transport failures that open the circuit
+breaker_cooldown = 30.0           # seconds before a probe is let through
+breaker_max_cooldown = 300.0      # cooldown doubles after each failed probe up to this
+
+# Latency histogram bucket upper bounds (milliseconds); the last bucket is open-ended
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 20000, 60000)
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised without touching the network while a device's circuit is open."""
+
+def error_kind(error):
+    """Counter name for a request exception."""
+    if isinstance(error, CircuitOpenError):
+        return "circuit_open"
+    if isinstance(error, requests.exceptions.Timeout):
+        return "timeout"
+    if isinstance(error, requests.exceptions.ConnectionError):
+        return "connection"
+    if isinstance(error, requests.exceptions.HTTPError):
+        return "http"
+    return "other"
+
+def is_transport_failure(error):
+    """Failures that say nothing good about the device's reachability (count towards the breaker)."""
+    if isinstance(error, CircuitOpenError):
+        return False
+    if isinstance(error, (requests.exceptions.Timeout, requests.exceptions.ConnectionError)):
+        return True
+    response = getattr(error, "response", None)
+    return response is not None and response.status_code >= 500
+
+def is_retryable(method, error):
+    """Whether a failed call may be repeated; a POST only if it never reached the device."""
+    if isinstance(error, CircuitOpenError):
+        return False
+    if method == "POST":
+        return isinstance(error, requests.exceptions.ConnectTimeout)
+    return is_transport_failure(error)
+
+class LatencyHistogram:
+    """Cumulative-style latency histogram with fixed millisecond buckets."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum_ms = 0.0
+
+    def observe(self, milliseconds):
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if milliseconds <= bound:
+                index = i
+                break
+        self.counts[index] += 1
+        self.count += 1
+        self.sum_ms += milliseconds
+
+    def merge(self, other):
+        for i, n in enumerate(other.counts):
+            self.counts[i] += n
+        self.count += other.count
+        self.sum_ms += other.sum_ms
+        return self
+
+    def percentile(self, q):
+        """Approximate q-th percentile (0-100), interpolated linearly inside the bucket."""
+        if not self.count:
+            return None
+        rank = q / 100 * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                low = self.buckets[i - 1] if i > 0 else 0.0
+                high = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return low + (high - low) * max(rank - seen, 0) / n
+            seen += n
+        return float(self.buckets[-1])
+
+    def to_dict(self):
+        return {"buckets": list(self.buckets), "counts": list(self.counts), "count": self.count,
+                "sumMs": round(self.sum_ms, 3)}
+
+class EndpointStats:
+    """Latency histogram and error counters of one "METHOD /path"."""
+
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.errors = {}
+        self.retries = 0
+
+    def to_dict(self):
+        return {"latency": self.latency.to_dict(), "errors": dict(self.errors), "retries": self.retries}
+
+class DeviceClient:
+    """Keep-alive HTTP client for one device with retries, a circuit breaker and per-endpoint stats."""
+
+    def __init__(self, base_url, connect_timeout=connect_timeout, read_timeout=read_timeout, retries=default_retries,
+                 sleep=time.sleep, clock=time.monotonic, on_retry=None):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.sleep = sleep            # interruptible / time-scaled sleep of the caller
+        self.clock = clock
+        self.on_retry = on_retry      # on_retry(method, path, attempt, attempts, error, delay)
+        self.http = requests.Session()
+        # One device, one connection: a bigger pool only helps concurrent callers
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=0)
+        self.http.mount("http://", adapter)
+        self.http.mount("https://", adapter)
+
+        self.lock = threading.Lock()
+        self.endpoints = {}
+        self.consecutive_failures = 0
+        self.circuit = "closed"       # closed | open | half_open
+        self.open_until = 0.0
+        self.cooldown = breaker_cooldown
+        self.circuit_opened = 0
+
+    # ---------------- circuit breaker ----------------
+    def before_request(self, method, path):
+        """Raise CircuitOpenError unless the circuit lets this call through."""
+        with self.lock:
+            if self.circuit == "closed":
+                return
+            if self.circuit == "open" and self.clock() >= self.open_until:
+                self.circuit = "half_open"   # this call is the probe
+                return
+            raise CircuitOpenError(f"circuit open for {self.base_url} ({method} {path} not sent), "
+                                   f"retry in {max(self.open_until - self.clock(), 0):.0f}s")
+
+    def record_outcome(self, failed):
+        with self.lock:
+            if not failed:
+                self.consecutive_failures = 0
+                self.circuit = "closed"
+                self.cooldown = breaker_cooldown
+                return
+            self.consecutive_failures += 1
+            if self.circuit == "half_open":
+                self.cooldown = min(self.cooldown * 2, breaker_max_cooldown)
+            elif self.consecutive_failures < breaker_failure_threshold:
+                return
+            self.circuit = "open"
+            self.open_until = self.clock() + self.cooldown
+            self.circuit_opened += 1
+
+    # ---------------- requests ----------------
+    def endpoint(self, method, path):
+        key = f"{method} {path}"
+        stats = self.endpoints.get(key)
+        if stats is None:
+            stats = self.endpoints[key] = EndpointStats()
+        return stats
+
+    def send(self, method, path, timeout=None, **kwargs):
+        """One attempt: returns the response or raises; stats and breaker are updated."""
+        self.before_request(method, path)
+        start = time.perf_counter()
+        error = None
+        try:
+            response = self.http.request(method, self.base_url + path, timeout=timeout or self.timeout, **kwargs)
+            response.raise_for_status()
+            return response
+        except requests.exceptions.RequestException as e:
+            error = e
+            raise
+        finally:
+            milliseconds = (time.perf_counter() - start) * 1000
+            with self.lock:
+                stats = self.endpoint(method, path)
+                stats.latency.observe(milliseconds)
+                if error is not None:
+                    kind = error_kind(error)
+                    stats.errors[kind] = stats.errors.get(kind, 0) + 1
+            self.record_outcome(error is not None and is_transport_failure(error))
+
+    def request(self, method, path, retries=None, timeout=None, **kwargs):
+        """Send with retries and jittered exponential backoff; raises the last error."""
+        attempts = 1 + (self.retries if retries is None else retries)
+        for attempt in range(attempts):
+            try:
+                return self.send(method, path, timeout=timeout, **kwargs)
+            except requests.exceptions.RequestException as e:
+                if isinstance(e, CircuitOpenError):
+                    with self.lock:
+                        stats = self.endpoint(method, path)
+                        stats.errors["circuit_open"] = stats.errors.get("circuit_open", 0) + 1
+                if attempt + 1 >= attempts or not is_retryable(method, e):
+                    raise
+                delay = random.uniform(0, min(backoff_max, backoff_base * 2 ** attempt))
+                with self.lock:
+                    self.endpoint(method, path).retries += 1
+                if self.on_retry is not None:
+                    self.on_retry(method, path, attempt + 1, attempts, e, delay)
+                self.sleep(delay)
+
+    def get(self, path, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def patch(self, path, **kwargs):
+        return self.request("PATCH", path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request("POST", path, **kwargs)
+
+    def close(self):
+        self.http.close()
+
+    # ---------------- statistics ----------------
+    def stats(self):
+        """Snapshot of per-endpoint latency/error stats and breaker state."""
+        with self.lock:
+            return {
+                "circuit": self.circuit,
+                "circuitOpened": self.circuit_opened,
+                "endpoints": {key: stats.to_dict() for key, stats in self.endpoints.items()},
+            }
+
+    def latency(self):
+        """Latency histogram over all endpoints."""
+        with self.lock:
+            total = LatencyHistogram()
+            for stats in self.endpoints.values():
+                total.merge(stats.latency)
+            return total
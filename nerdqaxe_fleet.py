@@ -0,0 +1,143 @@
+# =============================================================
+#                 FLEET BENCHMARK ORCHESTRATOR
+# =============================================================
+# Runs one BenchmarkSession per device concurrently from a single process.
+# Each session keeps its own state, results file and log file; the terminal
+# only shows one consolidated status table.
+import asyncio
+import concurrent.futures
+import os
+import signal
+import sys
+import time
+
+from nerdqaxe_benchmark import BenchmarkSession, GREEN, YELLOW, RED, RESET
+from nerdqaxe_profile import format_duration
+
+status_refresh_interval = 2      # seconds between table redraws on a terminal
+status_log_interval = 60         # seconds between table prints when stdout is not a terminal
+
+def load_fleet_ips(spec):
+    """Read device IPs from a file (one per line, # comments allowed) or a comma-separated list."""
+    if os.path.isfile(spec):
+        with open(spec, "r") as f:
+            lines = [line.split("#", 1)[0].strip() for line in f]
+        ips = [line for line in lines if line]
+    else:
+        ips = [ip.strip() for ip in spec.split(",") if ip.strip()]
+
+    if not ips:
+        raise ValueError(RED + f"Error: No device IPs found in '{spec}'." + RESET)
+    if len(set(ips)) != len(ips):
+        raise ValueError(RED + "Error: Duplicate device IPs in fleet list." + RESET)
+    return ips
+
+def format_value(value, fmt):
+    return "-" if value is None else format(value, fmt)
+
+def render_status_table(sessions, started):
+    """Build the consolidated status table, one row per device."""
+    elapsed = time.monotonic() - started
+    lines = [
+        f"Fleet benchmark: {len(sessions)} devices | elapsed {elapsed / 3600:.2f}h",
+        f"{'Device':<21} {'Phase':<10} {'Combo':>9} {'Sample':>7} {'CV':>6} {'F':>5} "
+        f"{'H GH/s':>7} {'T °C':>5} {'VR °C':>5} {'IV mV':>6} {'Results':>7} {'Pruned':>6} {'ETA':>6}  Note",
+    ]
+    for session in sessions:
+        s = session.status
+        phase = s["phase"]
+        color = RED if phase == "failed" else GREEN if phase == "done" else YELLOW if phase == "settling" else ""
+        combo = f"{s['combo']}/{s['total_combos']}" if s["total_combos"] else "-"
+        sample = f"{s['sample']}/{s['total_samples']}" if s["total_samples"] else "-"
+        eta = session.eta_seconds()
+        eta = format_duration(eta / session.config.time_scale) if eta is not None else "-"
+        lines.append(color +
+            f"{session.ip_address:<21} {phase:<10} {combo:>9} {sample:>7} "
+            f"{format_value(s['voltage'], '>6')} {format_value(s['frequency'], '>5')} "
+            f"{format_value(s['hashRate'], '>7.0f')} {format_value(s['temp'], '>5.1f')} "
+            f"{format_value(s['vrTemp'], '>5.1f')} {format_value(s['inputVoltage'], '>6.0f')} "
+            f"{len(session.results):>7} {s['pruned']:>6} {eta:>6}  {s['message'][:40]}" + RESET)
+    return "\n".join(lines)
+
+async def report_status(sessions, tasks):
+    """Redraw the status table until every device task has finished."""
+    started = time.monotonic()
+    interactive = sys.stdout.isatty()
+    interval = status_refresh_interval if interactive else status_log_interval
+
+    while not all(task.done() for task in tasks):
+        table = render_status_table(sessions, started)
+        if interactive:
+            sys.stdout.write("\033[H\033[J" + table + "\n")
+        else:
+            print(table + "\n")
+        sys.stdout.flush()
+        await asyncio.wait(tasks, timeout=interval)
+
+    print(render_status_table(sessions, started))
+
+async def benchmark_fleet(sessions):
+    """Run every session's blocking benchmark flow in its own worker thread."""
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(concurrent.futures.ThreadPoolExecutor(max_workers=len(sessions)))
+    tasks = [asyncio.create_task(asyncio.to_thread(session.run)) for session in sessions]
+    await report_status(sessions, tasks)
+    return await asyncio.gather(*tasks, return_exceptions=True)
+
+def run_fleet(ips, config, metrics=None, shard=False):
+    """Benchmark all devices concurrently; per-device output goes to nerdqaxe_benchmark_<ip>.log.
+
+    metrics is an optional (host, port) for the Prometheus endpoint. With
+    shard the devices split one grid between them (see nerdqaxe_shard).
+    """
+    log_files = [open(f"nerdqaxe_benchmark_{ip}.log", "a", encoding="utf-8") for ip in ips]
+    sessions = [BenchmarkSession(ip, config, out=log_file) for ip, log_file in zip(ips, log_files)]
+    coordinator = None
+    if shard:
+        import nerdqaxe_shard
+        try:
+            coordinator = nerdqaxe_shard.ShardCoordinator(sessions)
+            coordinator.check_identity()
+            coordinator.start()
+        except ValueError:
+            for log_file in log_files:
+                log_file.close()
+            raise
+    metrics_server = None
+    if metrics is not None:
+        import nerdqaxe_metrics
+        metrics_server = nerdqaxe_metrics.start_metrics_server(sessions, metrics[1], metrics[0])
+
+    def handle_sigint(signum, frame):
+        """On Ctrl+C, every device applies its best known settings and saves."""
+        for session in sessions:
+            session.request_stop()
+
+    signal.signal(signal.SIGINT, handle_sigint)
+    print(GREEN + f"Starting fleet benchmark on {len(sessions)} devices. Per-device logs: nerdqaxe_benchmark_<ip>.log" + RESET)
+    if metrics_server is not None:
+        print(GREEN + f"Metrics: http://{metrics[0]}:{metrics[1]}/metrics" + RESET)
+
+    try:
+        outcomes = asyncio.run(benchmark_fleet(sessions))
+    finally:
+        if metrics_server is not None:
+            metrics_server.shutdown()
+        for log_file in log_files:
+            log_file.close()
+
+    print(GREEN + "\nFleet benchmarking completed." + RESET)
+    for session, outcome in zip(sessions, outcomes):
+        if isinstance(outcome, BaseException):
+            print(RED + f"{session.ip_address}: failed with {outcome!r}" + RESET)
+        elif session.best_result() is not None:
+            best = session.best_result()
+            print(GREEN + f"{session.ip_address}: best {best['coreVoltage']}mV @ {best['frequency']}MHz -> "
+                          f"{best['averageHashRate']:.2f} GH/s, {best['efficiencyJTH']:.2f} J/TH "
+                          f"(results: {session.results_filename})" + RESET)
+        elif session.results:
+            print(YELLOW + f"{session.ip_address}: no result satisfies the objective" + RESET)
+        else:
+            print(YELLOW + f"{session.ip_address}: no valid results" + RESET)
+    if coordinator is not None:
+        coordinator.finish()
@@ -0,0 +1,141 @@
+# =============================================================
+#                  CRASH-SAFE RESULT JOURNAL
+# =============================================================
+# Results are persisted in two files per device:
+#
+#   nerdqaxe_benchmark_results_<ip>.json     snapshot (final results layout)
+#   nerdqaxe_benchmark_results_<ip>.journal  append-only JSON Lines journal
+#
+# Every finished combo is appended to the journal as one fsync'd line:
+#
+#   {"seq": 42, "type": "result", "ts": 1718000000.12, "entry": {...}}
+#
+# Compaction writes a new snapshot to a temporary file, fsyncs it, renames it
+# over the old snapshot and only then empties the journal. The snapshot
+# stores the last journal seq it contains, so records that survive a crash
+# between rename and truncate are skipped on load. A torn last line (power
+# cut mid-write) is ignored by readers and cut off only by the writer,
+# before its next append. A corrupt line with records after it cannot be a
+# torn write: it is skipped and counted, and the records after it are kept.
+# At no point is the only copy of a result being overwritten.
+import json
+import os
+import tempfile
+import time
+
+journal_compact_every = 25       # journal records between snapshot compactions
+
+def journal_filename(results_filename):
+    base = results_filename[:-len(".json")] if results_filename.endswith(".json") else results_filename
+    return base + ".journal"
+
+def fsync_directory(path):
+    """Make a rename in path durable (not supported on every platform)."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def write_atomic(filename, data):
+    """Write JSON to filename via temp file + fsync + rename; readers see the old or the new file."""
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, temp_name = tempfile.mkstemp(prefix=os.path.basename(filename) + ".", suffix=".tmp", dir=directory)
+    try:
+        # mkstemp creates the file 0600; keep the permissions of the file being replaced
+        os.chmod(temp_name, os.stat(filename).st_mode & 0o777 if os.path.exists(filename) else 0o644)
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_name, filename)
+    except BaseException:
+        try:
+            os.remove(temp_name)
+        except OSError:
+            pass
+        raise
+    fsync_directory(directory)
+
+def parse_record(line):
+    """The journal record on one line, or None if the line is torn or corrupt."""
+    if not line.endswith(b"\n"):
+        return None
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return None
+    return record if isinstance(record, dict) and isinstance(record.get("seq"), int) else None
+
+class ResultJournal:
+    """Append-only, fsync'd journal of per-combo records with atomic snapshot compaction."""
+
+    def __init__(self, results_filename):
+        self.snapshot_filename = results_filename
+        self.filename = journal_filename(results_filename)
+        self.seq = 0
+        self.pending = 0   # records appended since the last compaction
+        self.corrupt = 0   # unreadable lines before the end, skipped by the last load
+
+    def exists(self):
+        return os.path.exists(self.snapshot_filename) or os.path.exists(self.filename)
+
+    def load(self, repair=False):
+        """Return (snapshot, records): the snapshot dict and journal records not yet contained in it.
+
+        A legacy snapshot holding a plain result list is returned as {"all_results": [...]}.
+        repair truncates a torn last line on disk; only the session about to
+        append may ask for it, since a reader could cut a record being written.
+        Unreadable lines before the last one are skipped and counted in corrupt.
+        """
+        snapshot = {}
+        if os.path.exists(self.snapshot_filename):
+            with open(self.snapshot_filename, "r") as f:
+                snapshot = json.load(f)
+            if isinstance(snapshot, list):
+                snapshot = {"all_results": snapshot}
+        self.seq = snapshot.get("journalSeq", 0)
+
+        records = []
+        self.corrupt = 0
+        if os.path.exists(self.filename):
+            with open(self.filename, "rb") as f:
+                lines = f.readlines()  # short: compaction empties the journal every few records
+            parsed = [parse_record(line) for line in lines]
+            if parsed and parsed[-1] is None:
+                # Only the last line can be a torn write
+                if repair:
+                    os.truncate(self.filename, sum(len(line) for line in lines[:-1]))
+                parsed.pop()
+            self.corrupt = parsed.count(None)
+            records = [record for record in parsed if record is not None and record["seq"] > self.seq]
+        if records:
+            self.seq = records[-1]["seq"]
+        self.pending = len(records)
+        return snapshot, records
+
+    def append(self, record_type, entry):
+        """Durably append one record; returns its seq."""
+        self.seq += 1
+        record = {"seq": self.seq, "type": record_type, "ts": round(time.time(), 3), "entry": entry}
+        with open(self.filename, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.pending += 1
+        return self.seq
+
+    def needs_compaction(self):
+        return self.pending >= journal_compact_every
+
+    def compact(self, snapshot):
+        """Atomically replace the snapshot with `snapshot`, then empty the journal."""
+        write_atomic(self.snapshot_filename, {**snapshot, "journalSeq": self.seq})
+        if os.path.exists(self.filename):
+            os.truncate(self.filename, 0)
+        self.pending = 0
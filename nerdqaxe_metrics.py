@@ -0,0 +1,148 @@
+# =============================================================
+#              PROMETHEUS / OPENMETRICS EXPORTER
+# =============================================================
+# Serves GET /metrics in the Prometheus text exposition format (0.0.4),
+# which OpenMetrics scrapers accept as well. Each scrape renders the live
+# status of every BenchmarkSession from a daemon thread; the benchmark
+# threads never wait for the exporter, they only keep updating
+# session.status and the device client's counters.
+#
+# Every series carries a device="<ip>" label, e.g.
+#
+#   nerdqaxe_benchmark_hashrate_ghs{device="192.168.2.26"} 5021.4
+#   nerdqaxe_benchmark_phase{device="192.168.2.26",phase="measuring"} 1
+#   nerdqaxe_benchmark_http_request_duration_seconds_bucket{device="...",endpoint="GET /api/system/info",le="0.01"} 812
+#
+# nerdqaxe_benchmark_last_sample_timestamp_seconds is the Unix time of the
+# last successful device poll: alert on time() minus it to catch stuck
+# devices.
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+PHASES = ("idle", "settling", "measuring", "finalizing", "monitoring", "done", "failed")
+
+# (metric name, session.status key, help)
+STATUS_GAUGES = (
+    ("nerdqaxe_benchmark_core_voltage_millivolts", "voltage", "Core voltage of the combo under test"),
+    ("nerdqaxe_benchmark_frequency_mhz", "frequency", "ASIC frequency of the combo under test"),
+    ("nerdqaxe_benchmark_hashrate_ghs", "hashRate", "Last polled hashrate"),
+    ("nerdqaxe_benchmark_chip_temperature_celsius", "temp", "Last polled chip temperature"),
+    ("nerdqaxe_benchmark_vr_temperature_celsius", "vrTemp", "Last polled voltage regulator temperature"),
+    ("nerdqaxe_benchmark_input_voltage_millivolts", "inputVoltage", "Last polled input voltage"),
+    ("nerdqaxe_benchmark_power_watts", "power", "Last polled power consumption"),
+    ("nerdqaxe_benchmark_samples_collected", "sample", "Samples collected in the current measurement window"),
+    ("nerdqaxe_benchmark_samples_target", "total_samples", "Samples planned for the current measurement window"),
+    ("nerdqaxe_benchmark_combos_total", "total_combos", "Combos in the current sweep"),
+    ("nerdqaxe_benchmark_combos_remaining", "remaining", "Combos still queued (an upper bound for adaptive search)"),
+    ("nerdqaxe_benchmark_combos_pruned", "pruned", "Combos ruled out by failure boundaries"),
+    ("nerdqaxe_benchmark_last_sample_timestamp_seconds", "lastSampleTime", "Unix time of the last successful device poll"),
+)
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def labels(**pairs):
+    return "{" + ",".join(f'{key}="{escape_label(value)}"' for key, value in pairs.items()) + "}"
+
+def format_number(value):
+    if value is None:
+        return "NaN"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class MetricFamily:
+    """Collects the samples of one metric name so HELP/TYPE are written once."""
+
+    def __init__(self, name, metric_type, help_text):
+        self.name = name
+        self.type = metric_type
+        self.help = help_text
+        self.samples = []
+
+    def add(self, value, suffix="", **label_pairs):
+        self.samples.append(f"{self.name}{suffix}{labels(**label_pairs)} {format_number(value)}")
+
+    def render(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"] + self.samples
+
+def render_metrics(sessions):
+    """Exposition text for all sessions."""
+    families = {}
+
+    def family(name, metric_type, help_text):
+        if name not in families:
+            families[name] = MetricFamily(name, metric_type, help_text)
+        return families[name]
+
+    for session in sessions:
+        device = session.ip_address
+        status = dict(session.status)  # one consistent-enough copy; the session keeps writing
+
+        for phase in PHASES:
+            family("nerdqaxe_benchmark_phase", "gauge", "Current benchmark phase (1 for the active one)").add(
+                1 if status["phase"] == phase else 0, device=device, phase=phase)
+        for name, key, help_text in STATUS_GAUGES:
+            family(name, "gauge", help_text).add(status.get(key), device=device)
+        started = status["combo"] - (1 if status["phase"] in ("settling", "measuring") else 0)
+        family("nerdqaxe_benchmark_combos_done", "gauge", "Combos finished or ruled out in the current sweep").add(
+            max(started, 0), device=device)
+        family("nerdqaxe_benchmark_results", "gauge", "Valid results collected").add(len(session.results), device=device)
+        family("nerdqaxe_benchmark_eta_seconds", "gauge", "Estimated seconds until the current sweep finishes").add(
+            session.eta_seconds(), device=device)
+
+        stats = session.client.stats()
+        family("nerdqaxe_benchmark_http_circuit_open", "gauge", "1 while the device's circuit breaker is open").add(
+            stats["circuit"] != "closed", device=device)
+        family("nerdqaxe_benchmark_http_circuit_opened_total", "counter", "Times the circuit breaker opened").add(
+            stats["circuitOpened"], device=device)
+        for endpoint, endpoint_stats in sorted(stats["endpoints"].items()):
+            latency = endpoint_stats["latency"]
+            histogram = family("nerdqaxe_benchmark_http_request_duration_seconds", "histogram",
+                               "Device API request latency")
+            cumulative = 0
+            for bound, count in zip(latency["buckets"] + ["+Inf"], latency["counts"]):
+                cumulative += count
+                le = bound if bound == "+Inf" else format_number(bound / 1000)
+                histogram.add(cumulative, "_bucket", device=device, endpoint=endpoint, le=le)
+            histogram.add(latency["sumMs"] / 1000, "_sum", device=device, endpoint=endpoint)
+            histogram.add(latency["count"], "_count", device=device, endpoint=endpoint)
+            errors = family("nerdqaxe_benchmark_http_errors_total", "counter", "Failed device API requests by kind")
+            for kind, count in sorted(endpoint_stats["errors"].items()):
+                errors.add(count, device=device, endpoint=endpoint, kind=kind)
+            family("nerdqaxe_benchmark_http_retries_total", "counter", "Retried device API requests").add(
+                endpoint_stats["retries"], device=device, endpoint=endpoint)
+
+    family("nerdqaxe_benchmark_scrape_timestamp_seconds", "gauge", "Unix time of this scrape").add(time.time())
+    lines = []
+    for metric in families.values():
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    sessions = ()
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_metrics(self.sessions).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+def start_metrics_server(sessions, port, host="0.0.0.0"):
+    """Serve /metrics for `sessions` from a daemon thread; returns the server (call shutdown() when done)."""
+    handler = type("BoundMetricsHandler", (MetricsHandler,), {"sessions": tuple(sessions)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
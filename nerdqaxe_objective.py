@@ -0,0 +1,133 @@
+# =============================================================
+#                 TARGET OBJECTIVE (--objective)
+# =============================================================
+# Without an objective the tool maps the whole grid and applies the highest
+# hashrate. With one it optimizes a single figure inside an operating
+# envelope:
+#
+#   max-hashrate   highest averageHashRate
+#   min-jth        lowest efficiencyJTH
+#
+# under optional constraints on the measured averages:
+#
+#   power_cap      W, power (J/TH x TH/s) at most this
+#   temp_margin    °C, chip and VR temperature at least this far below their limits
+#   min_hashrate   GH/s, hashrate at least this
+#
+# Power and temperature grow with voltage and frequency, so a result above
+# the cap or inside the margin rules out every point with V' >= V and
+# F' >= F; hashrate falls with frequency (and with voltage once unstable),
+# so a result below min_hashrate rules out V' <= V and F' <= F. Hashrate is
+# also bounded by frequency x cores: frequencies that cannot reach
+# min_hashrate, or (max-hashrate) cannot beat the best feasible result so
+# far, are skipped before they are measured. The grid is walked one voltage
+# column at a time, from the lowest voltage and frequency upwards.
+
+OBJECTIVES = {
+    # name: (result field, maximize)
+    "max-hashrate": ("averageHashRate", True),
+    "min-jth": ("efficiencyJTH", False),
+}
+
+# Reasons a passing result lies outside the envelope (stored with pruned combos)
+POWER_CAP_REASON = "OVER_POWER_CAP"
+TEMP_MARGIN_REASON = "OVER_TEMP_MARGIN"
+VR_TEMP_MARGIN_REASON = "OVER_VR_TEMP_MARGIN"
+MIN_HASHRATE_REASON = "BELOW_MIN_HASHRATE"
+ENVELOPE_ABOVE_REASONS = {POWER_CAP_REASON, TEMP_MARGIN_REASON, VR_TEMP_MARGIN_REASON}
+ENVELOPE_BELOW_REASONS = {MIN_HASHRATE_REASON}
+# Skip reasons of unmeasured combos ruled out by the frequency x cores bound
+UNREACHABLE_HASHRATE_REASON = "MIN_HASHRATE_UNREACHABLE"
+CANNOT_BEAT_BEST_REASON = "CANNOT_BEAT_BEST"
+
+objective_hashrate_headroom = 0.05  # measured hashrate above frequency x cores / 1000 still considered possible
+
+def result_power(result):
+    """Average power of a result entry in W."""
+    return result["efficiencyJTH"] * result["averageHashRate"] / 1000
+
+class Objective:
+    """One optimization target with its envelope; limits are (max temp, max VR temp, max power)."""
+
+    def __init__(self, name, limits, power_cap=None, temp_margin=0.0, min_hashrate=None):
+        self.name = name
+        self.key, self.maximize = OBJECTIVES[name]
+        self.power_cap = power_cap
+        self.temp_margin = temp_margin
+        self.min_hashrate = min_hashrate
+        max_temp, max_vr_temp, max_power = limits
+        self.max_temp = max_temp - temp_margin
+        self.max_vr_temp = max_vr_temp - temp_margin
+        self.max_power = max_power if power_cap is None else min(max_power, power_cap)
+
+    def envelope(self):
+        """Tightened (max temp, max VR temp, max power), the feasibility limits of the model-guided searches."""
+        return self.max_temp, self.max_vr_temp, self.max_power
+
+    def describe(self):
+        parts = [self.name]
+        if self.power_cap is not None:
+            parts.append(f"power <= {self.power_cap:g} W")
+        if self.temp_margin:
+            parts.append(f"chip <= {self.max_temp:g}°C, VR <= {self.max_vr_temp:g}°C")
+        if self.min_hashrate is not None:
+            parts.append(f"hashrate >= {self.min_hashrate:g} GH/s")
+        return ", ".join(parts)
+
+    def violation(self, result):
+        """Reason a measured result lies outside the envelope, or None."""
+        if result_power(result) > self.max_power:
+            return POWER_CAP_REASON
+        if result["averageTemperature"] > self.max_temp:
+            return TEMP_MARGIN_REASON
+        if result.get("averageVRTemp") is not None and result["averageVRTemp"] > self.max_vr_temp:
+            return VR_TEMP_MARGIN_REASON
+        if self.min_hashrate is not None and result["averageHashRate"] < self.min_hashrate:
+            return MIN_HASHRATE_REASON
+        return None
+
+    def value(self, result):
+        return result[self.key]
+
+    def gain(self, result, reference):
+        """Relative improvement of result over reference on the objective (negative if worse)."""
+        difference = result[self.key] - reference[self.key]
+        return (difference if self.maximize else -difference) / abs(reference[self.key])
+
+    def best(self, results):
+        """Best result inside the envelope, or None."""
+        feasible = [r for r in results if self.violation(r) is None]
+        if not feasible:
+            return None
+        pick = max if self.maximize else min
+        return pick(feasible, key=self.value)
+
+    def unreachable(self, point, hashrate_per_mhz, best=None):
+        """Skip reason if the frequency x cores bound rules point out before measuring, else None."""
+        if not hashrate_per_mhz:
+            return None
+        ceiling = point[1] * hashrate_per_mhz * (1 + objective_hashrate_headroom)
+        if self.min_hashrate is not None and ceiling < self.min_hashrate:
+            return UNREACHABLE_HASHRATE_REASON
+        if self.key == "averageHashRate" and best is not None and ceiling <= best["averageHashRate"]:
+            return CANNOT_BEAT_BEST_REASON
+        return None
+
+    def grid_tier(self, point):
+        """Grid priority: lowest voltage first, climbing in frequency.
+
+        Each column runs into its thermal/power or stability limit from below,
+        so a point rarely starts out with the heat of a hotter one, and for
+        max-hashrate the bound lets the next column start near the best so far.
+        """
+        return point
+
+    def to_dict(self):
+        entry = {"name": self.name}
+        if self.power_cap is not None:
+            entry["powerCap"] = self.power_cap
+        if self.temp_margin:
+            entry["tempMargin"] = self.temp_margin
+        if self.min_hashrate is not None:
+            entry["minHashrate"] = self.min_hashrate
+        return entry
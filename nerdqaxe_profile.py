@@ -0,0 +1,140 @@
+# =============================================================
+#                  PER-PHASE TIMING PROFILER
+# =============================================================
+# Splits the device time of a benchmark run into phases:
+#
+#   apply      PATCH of the new settings plus the 2 s grace sleep
+#   settle     restart request and stabilization wait (or the live-apply wait)
+#   measure    the measurement window
+#   retryWait  backoff sleeps between failed HTTP attempts, in any phase
+#   other      everything else: startup, resume loading, journal writes
+#
+# Phases nest and time is charged to the innermost one, so a retry sleep
+# while settling counts as retryWait only. Time is the session clock
+# (device seconds, i.e. scaled by --time-scale); HTTP latency is real time.
+#
+# Every tested combo gets its own breakdown ("timing" in the result or
+# failure entry, with the HTTP requests made for it), and the mean cost of
+# timed combos, including those of earlier runs, drives the ETA and --plan.
+import contextlib
+import threading
+
+PHASES = ("apply", "settle", "measure", "retryWait", "other")
+
+class PhaseProfiler:
+    """Exclusive per-phase timer for one session; only the thread that created it may enter phases."""
+
+    def __init__(self, clock, http=None):
+        self.clock = clock
+        self.owner = threading.get_ident()
+        self.http = http                # () -> (requests, seconds) so far, or None
+        self.stack = ["other"]
+        self.mark = clock()
+        self.totals = dict.fromkeys(PHASES, 0.0)
+        self.combo = None               # phase seconds of the open combo
+        self.combo_start = None
+        self.http_start = None
+        self.aborted_seconds = 0.0      # this run, combos that produced no result
+        self.timed_combos = 0           # every timed combo seen, this and earlier runs
+        self.timed_seconds = 0.0
+        self.timed_phases = dict.fromkeys(PHASES, 0.0)
+
+    def charge(self):
+        """Charge the time since the last mark to the current phase."""
+        now = self.clock()
+        elapsed = now - self.mark
+        self.mark = now
+        phase = self.stack[-1]
+        self.totals[phase] += elapsed
+        if self.combo is not None:
+            self.combo[phase] += elapsed
+
+    def owned(self):
+        """True on the thread that may enter phases (not e.g. a background sampler)."""
+        return threading.get_ident() == self.owner
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        self.charge()
+        self.stack.append(name)
+        try:
+            yield
+        finally:
+            self.charge()
+            self.stack.pop()
+
+    def start_combo(self):
+        self.charge()
+        self.combo = dict.fromkeys(PHASES, 0.0)
+        self.combo_start = self.mark
+        self.http_start = self.http() if self.http is not None else None
+
+    def end_combo(self, passed):
+        """Close the open combo; returns its timing entry."""
+        self.charge()
+        total = self.mark - self.combo_start
+        timing = {phase: round(seconds, 1) for phase, seconds in self.combo.items()}
+        timing["total"] = round(total, 1)
+        if self.http_start is not None:
+            requests, seconds = self.http()
+            timing["httpRequests"] = requests - self.http_start[0]
+            timing["httpSeconds"] = round(seconds - self.http_start[1], 3)
+        if not passed:
+            self.aborted_seconds += total
+        self.combo = None
+        self.record(timing)
+        return timing
+
+    def combo_elapsed(self):
+        """Seconds since the open combo started (0 if none is open); safe from other threads."""
+        start = self.combo_start
+        return self.clock() - start if self.combo is not None and start is not None else 0.0
+
+    def record(self, timing):
+        """Add one combo's timing (also from a resumed results file) to the cost estimate."""
+        self.timed_combos += 1
+        self.timed_seconds += timing["total"]
+        for phase in PHASES:
+            self.timed_phases[phase] += timing.get(phase, 0.0)
+
+    def mean_combo_seconds(self):
+        return self.timed_seconds / self.timed_combos if self.timed_combos else None
+
+    def mean_phase_seconds(self):
+        return {phase: seconds / self.timed_combos for phase, seconds in self.timed_phases.items()} \
+            if self.timed_combos else None
+
+def format_duration(seconds):
+    """Compact duration: 45 s, 12 min, 7.3h."""
+    if seconds is None:
+        return "-"
+    if seconds < 90:
+        return f"{seconds:.0f} s"
+    if seconds < 5400:
+        return f"{seconds / 60:.0f} min"
+    return f"{seconds / 3600:.1f}h"
+
+def combo_profile(results, failures):
+    """Phase totals over every timed result and failure entry of a results file."""
+    passed = [r["timing"] for r in results if "timing" in r]
+    aborted = [f["timing"] for f in failures if "timing" in f]
+    timings = passed + aborted
+    if not timings:
+        return None
+    return {
+        "combos": len(timings),
+        "measured": len(passed),
+        "aborted": len(aborted),
+        "seconds": {phase: round(sum(t.get(phase, 0.0) for t in timings), 1) for phase in PHASES},
+        "totalSeconds": round(sum(t["total"] for t in timings), 1),
+        "abortedSeconds": round(sum(t["total"] for t in aborted), 1),
+        "httpRequests": sum(t.get("httpRequests", 0) for t in timings),
+        "httpSeconds": round(sum(t.get("httpSeconds", 0.0) for t in timings), 3),
+    }
+
+def phase_breakdown(seconds, total):
+    """'measure 76% (20.5h), settle 20% (5.4h), ...' sorted by share."""
+    if total <= 0:
+        return "-"
+    parts = sorted(((s, phase) for phase, s in seconds.items() if s > 0), reverse=True)
+    return ", ".join(f"{phase} {s / total:.0%} ({format_duration(s)})" for s, phase in parts)
@@ -0,0 +1,317 @@
+# =============================================================
+#              OFFLINE REPLAY OF RECORDED TELEMETRY
+# =============================================================
+# Recomputes benchmark results from nerdqaxe_telemetry_<ip>.jsonl files
+# without touching a miner. The reduction mirrors
+# BenchmarkSession.benchmark_iteration() (guards, outlier trimming, warm-up
+# trimming, efficiency, hashrate tolerance), but runs vectorized over all
+# measurement windows at once so parameters can be tuned against many runs.
+import argparse
+import json
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+
+import nerdqaxe_benchmark as nb
+from nerdqaxe_benchmark import GREEN, YELLOW, RED, RESET
+
+# Guard checks in the order benchmark_iteration() applies them
+GUARD_ORDER = [
+    "TEMPERATURE_DATA_FAILURE",
+    "TEMPERATURE_BELOW_5",
+    "CHIP_TEMP_EXCEEDED",
+    "VR_TEMP_EXCEEDED",
+    "INPUT_VOLTAGE_BELOW_MIN",
+    "INPUT_VOLTAGE_ABOVE_MAX",
+    "HASHRATE_POWER_DATA_FAILURE",
+    "POWER_CONSUMPTION_EXCEEDED",
+]
+
+FIELDS = ("hashRate", "temp", "vrTemp", "voltage", "power")
+
+def parse_arguments(argv):
+    parser = argparse.ArgumentParser(prog="nerdqaxe_benchmark.py replay",
+                                     description='Recompute benchmark results from recorded telemetry')
+    parser.add_argument('telemetry_files', nargs='+', help='nerdqaxe_telemetry_<ip>.jsonl files to replay')
+    parser.add_argument('--output-dir', default='.', help='Directory for nerdqaxe_replay_results_<ip>.json (default: .)')
+    parser.add_argument('--trim', type=int, default=nb.hashrate_trim_samples,
+                        help=f'Lowest and highest hashrate samples dropped per window, counted at '
+                             f'{nb.sample_interval}s spacing and scaled to the recorded poll interval (default: 3)')
+    parser.add_argument('--warmup', type=int, default=nb.temperature_warmup_samples,
+                        help='Lowest temperature samples dropped per window, scaled like --trim (default: 6)')
+    parser.add_argument('--tolerance', type=float, default=0.90,
+                        help='Minimum fraction of the expected hashrate (default: 0.90)')
+    parser.add_argument('--max-temp', type=float, default=nb.max_temp)
+    parser.add_argument('--max-vr-temp', type=float, default=nb.max_vr_temp)
+    parser.add_argument('--max-power', type=float, default=nb.max_power)
+    parser.add_argument('--min-input-voltage', type=float, default=nb.min_input_voltage)
+    parser.add_argument('--max-input-voltage', type=float, default=nb.max_input_voltage)
+    return parser.parse_args(argv)
+
+# =============================================================
+#                      LOADING
+# =============================================================
+def new_window(record):
+    info = record["info"]
+    return {
+        "window": record["window"],
+        "coreVoltage": record["coreVoltage"],
+        "frequency": record["frequency"],
+        "cores": (info.get("smallCoreCount") or 0) * (info.get("asicCount") or 0),
+        "pollInterval": record.get("pollInterval", nb.sample_interval),  # absent before the sampler
+        "samples": [],
+    }
+
+def load_windows(filename):
+    """Group the measuring-phase samples of finished sweep windows into NaN-padded arrays.
+
+    Only windows with a terminal record count: completed ones are reduced,
+    aborted ones become failures with the live run's reason. Windows cut
+    short by a stop or a crash, and the autotune daemon's re-tune windows,
+    are left out. Returns (meta, samples) where meta is a list of per-window
+    dicts and samples maps each field in FIELDS to a (windows x max_samples) array.
+    """
+    windows = {}
+    ends = {}
+    with open(filename, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # torn last line after a crash
+            phase = record.get("phase")
+            info = record.get("info") or {}
+            if phase in ("completed", "aborted"):
+                if info.get("kind") == "measuring":
+                    ends[record["window"]] = record
+                continue
+            if phase != "measuring":
+                continue
+            window = windows.get(record["window"])
+            if window is None:
+                window = windows[record["window"]] = new_window(record)
+            window["samples"].append([info.get(field) for field in FIELDS])
+            window["endTs"] = record["ts"]
+
+    meta = []
+    for window_id, end in sorted(ends.items()):
+        reason = end["info"].get("errorReason")
+        if reason == "INTERRUPTED":
+            continue  # a stopped run records no result or failure for the combo
+        window = windows.get(window_id) or new_window(end)  # aborted before its first sample
+        if end["phase"] == "aborted":
+            window["abortReason"] = reason
+        meta.append(window)
+
+    max_samples = max((len(w["samples"]) for w in meta), default=0)
+    samples = {field: np.full((len(meta), max_samples), np.nan) for field in FIELDS}
+    for row, window in enumerate(meta):
+        values = np.array(window.pop("samples"), dtype=float).reshape(-1, len(FIELDS))  # None -> nan
+        for column, field in enumerate(FIELDS):
+            samples[field][row, :len(values)] = values[:, column]
+        window["recorded"] = len(values)
+    return meta, samples
+
+# =============================================================
+#                   VECTORIZED REDUCTION
+# =============================================================
+def first_guard_failure(samples, recorded, args):
+    """Index of the first sample tripping a guard (or -1) and the guard's reason, per window."""
+    temp, vr_temp, voltage = samples["temp"], samples["vrTemp"], samples["voltage"]
+    hash_rate, power = samples["hashRate"], samples["power"]
+    present = np.arange(temp.shape[1])[None, :] < recorded[:, None]
+
+    with np.errstate(invalid="ignore"):
+        checks = np.stack([
+            np.isnan(temp),
+            temp < 5,
+            temp >= args.max_temp,
+            vr_temp >= args.max_vr_temp,
+            voltage < args.min_input_voltage,
+            voltage > args.max_input_voltage,
+            np.isnan(hash_rate) | np.isnan(power),
+            power > args.max_power,
+        ]) & present[None, :, :]
+
+    tripped = checks.any(axis=0)
+    failed = tripped.any(axis=1)
+    first_sample = np.where(failed, tripped.argmax(axis=1), -1)
+    rows = np.arange(len(recorded))
+    first_check = checks[:, rows, np.maximum(first_sample, 0)].argmax(axis=0)
+    return first_sample, first_check
+
+def scaled_samples(count, poll_intervals):
+    """Per-window sample counts covering `count` reference samples, as BenchmarkSession.samples_for()."""
+    if count <= 0:
+        return np.zeros(len(poll_intervals), dtype=int)
+    return np.maximum(np.rint(count * nb.sample_interval / poll_intervals), 1).astype(int)
+
+def lag1_autocorrelation(values, counts):
+    """Lag-1 autocorrelation per row of NaN-padded values, clipped like RunningStats.autocorrelation()."""
+    with np.errstate(invalid="ignore", divide="ignore"), warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        centered = values - np.nanmean(values, axis=1)[:, None]
+        covariance = np.nansum(centered[:, 1:] * centered[:, :-1], axis=1)
+        rho = covariance / np.nansum(centered ** 2, axis=1)
+    return np.where(counts >= 4, np.clip(np.nan_to_num(rho), 0.0, 0.95), 0.0)
+
+def trimmed_mean(values, counts, low, high):
+    """Mean of each row's sorted valid values between positions low and counts - high."""
+    ordered = np.sort(values, axis=1)  # NaN sorts last
+    positions = np.arange(values.shape[1])[None, :]
+    keep = (positions >= low[:, None]) & (positions < (counts - high)[:, None])
+    kept = keep.sum(axis=1)
+    total = np.where(keep, ordered, 0.0).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return total / kept, ordered, kept
+
+def reduce_windows(meta, samples, args):
+    """Vectorized benchmark_iteration() reduction; returns (results, failures)."""
+    if not meta:
+        return [], []
+    recorded = np.array([w["recorded"] for w in meta])
+    first_sample, first_check = first_guard_failure(samples, recorded, args)
+
+    # A failing window only ever kept the samples before the guard tripped
+    usable = np.where(first_sample >= 0, first_sample, recorded)
+    positions = np.arange(samples["hashRate"].shape[1])[None, :]
+    in_window = positions < usable[:, None]
+
+    hash_rate = np.where(in_window, samples["hashRate"], np.nan)
+    temp = np.where(in_window, samples["temp"], np.nan)
+    power = np.where(in_window, samples["power"], np.nan)
+    with np.errstate(invalid="ignore"):
+        vr_temp = np.where(in_window & (samples["vrTemp"] > 0), samples["vrTemp"], np.nan)
+
+    counts = usable
+    poll_intervals = np.array([w["pollInterval"] for w in meta], dtype=float)
+    trim_capacity = scaled_samples(args.trim, poll_intervals)
+    warmup_capacity = scaled_samples(args.warmup, poll_intervals)
+    trim = np.where(counts > 2 * trim_capacity, trim_capacity, 0)
+    average_hashrate, ordered_hashrate, _ = trimmed_mean(hash_rate, counts, trim, trim)
+
+    warmup = np.where(counts > warmup_capacity, warmup_capacity, 0)
+    average_temperature, _, _ = trimmed_mean(temp, counts, warmup, np.zeros_like(counts))
+
+    vr_counts = (~np.isnan(vr_temp)).sum(axis=1)
+    vr_warmup = np.where(vr_counts > warmup_capacity, warmup_capacity, 0)
+    average_vr_temp, _, _ = trimmed_mean(vr_temp, vr_counts, vr_warmup, np.zeros_like(vr_counts))
+
+    with np.errstate(invalid="ignore", divide="ignore"), warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # empty rows of failed windows
+        average_power = np.nansum(power, axis=1) / counts
+        efficiency_jth = average_power / (average_hashrate / 1_000)
+
+        # Tukey-McLaughlin CI of the trimmed mean, widened for autocorrelation, as in window_confidence()
+        rows = np.arange(len(meta))
+        ci_trim = np.where(counts > 2 * trim_capacity + 1, trim_capacity, 0)
+        ci_kept = counts - 2 * ci_trim
+        ci_mean, _, _ = trimmed_mean(hash_rate, counts, ci_trim, ci_trim)
+        low_value = ordered_hashrate[rows, ci_trim]
+        high_value = ordered_hashrate[rows, np.maximum(counts - ci_trim - 1, 0)]
+        winsorized = np.clip(ordered_hashrate, low_value[:, None], high_value[:, None])
+        winsorized = np.where(positions < counts[:, None], winsorized, np.nan)
+        winsorized_var = np.nanvar(winsorized, axis=1, ddof=1)
+        hashrate_rho = lag1_autocorrelation(hash_rate, counts)
+        power_rho = lag1_autocorrelation(power, counts)
+        t_hashrate = np.array([nb.t_quantile(d) for d in np.maximum(ci_kept - 1, 1)])
+        t_power = np.array([nb.t_quantile(d) for d in np.maximum(counts - 1, 1)])
+        hashrate_ci = (2 * t_hashrate * np.sqrt(winsorized_var) / ((ci_kept / counts) * np.sqrt(counts))
+                       * np.sqrt((1 + hashrate_rho) / (1 - hashrate_rho)) / ci_mean)
+        power_ci = (2 * t_power * np.nanstd(power, axis=1, ddof=1) / np.sqrt(counts)
+                    * np.sqrt((1 + power_rho) / (1 - power_rho)) / average_power)
+        efficiency_ci = np.sqrt(hashrate_ci ** 2 + power_ci ** 2)
+
+        # Exact here; the live run reports a streaming (P²) estimate of the same percentile
+        hashrate_p05 = np.nanpercentile(hash_rate, 5, axis=1)
+        max_temperature = np.nanmax(temp, axis=1)
+
+    results, failures = [], []
+    for row, window in enumerate(meta):
+        point = {"coreVoltage": window["coreVoltage"], "frequency": window["frequency"], "window": window["window"]}
+        if first_sample[row] >= 0:
+            failures.append({**point, "errorReason": GUARD_ORDER[first_check[row]], "sampleCount": int(usable[row])})
+            continue
+        if "abortReason" in window:
+            failures.append({**point, "errorReason": window["abortReason"], "sampleCount": int(usable[row])})
+            continue
+        if counts[row] == 0:
+            failures.append({**point, "errorReason": "NO_DATA_COLLECTED", "sampleCount": 0})
+            continue
+        if not average_hashrate[row] > 0:
+            failures.append({**point, "errorReason": "ZERO_HASHRATE", "sampleCount": int(counts[row])})
+            continue
+
+        expected_hashrate = window["frequency"] * (window["cores"] / 1000)
+        result = {
+            "coreVoltage": window["coreVoltage"],
+            "frequency": window["frequency"],
+            "averageHashRate": float(average_hashrate[row]),
+            "averageTemperature": float(average_temperature[row]),
+            "efficiencyJTH": float(efficiency_jth[row]),
+        }
+        if vr_counts[row]:
+            result["averageVRTemp"] = float(average_vr_temp[row])
+        result.update({
+            "sampleCount": int(counts[row]),
+            "pollInterval": window["pollInterval"],
+            "hashrateCIWidth": float(hashrate_ci[row]),
+            "efficiencyCIWidth": float(efficiency_ci[row]),
+            "hashRateP05": float(hashrate_p05[row]),
+            "maxTemperature": float(max_temperature[row]),
+            "hashrateWithinTolerance": bool(average_hashrate[row] >= expected_hashrate * args.tolerance),
+            "window": window["window"],
+        })
+        results.append(result)
+    return results, failures
+
+def latest_per_combo(entries):
+    """Keep only the most recent window for each (V, F)."""
+    latest = {}
+    for entry in sorted(entries, key=lambda e: e["window"]):
+        latest[(entry["coreVoltage"], entry["frequency"])] = entry
+    return sorted(latest.values(), key=lambda x: (x["coreVoltage"], x["frequency"]))
+
+# =============================================================
+#                        ENTRY POINT
+# =============================================================
+def replay_file(filename, args):
+    """Replay one telemetry file and write its results file; returns the output filename."""
+    meta, samples = load_windows(filename)
+    results, failures = reduce_windows(meta, samples, args)
+    results = latest_per_combo(results)
+    tested = {(r["coreVoltage"], r["frequency"]) for r in results}
+    failures = [f for f in latest_per_combo(failures) if (f["coreVoltage"], f["frequency"]) not in tested]
+
+    final_data = nb.build_final_data(results)
+    final_data["failures"] = failures
+    final_data["replay"] = {
+        "source": os.path.basename(filename),
+        "windows": len(meta),
+        "parameters": {key: value for key, value in vars(args).items() if key not in ("telemetry_files", "output_dir")},
+    }
+
+    name = os.path.basename(filename)
+    if name.startswith("nerdqaxe_telemetry_") and name.endswith(".jsonl"):
+        name = name[len("nerdqaxe_telemetry_"):-len(".jsonl")]
+    output = os.path.join(args.output_dir, f"nerdqaxe_replay_results_{name}.json")
+    with open(output, "w") as f:
+        json.dump(final_data, f, indent=4)
+    print(GREEN + f"{filename}: {len(meta)} windows -> {len(results)} results, {len(failures)} failures -> {output}" + RESET)
+    return output
+
+def main(argv):
+    args = parse_arguments(argv)
+    started = time.monotonic()
+    for filename in args.telemetry_files:
+        if not os.path.exists(filename):
+            print(RED + f"Telemetry file not found: {filename}" + RESET)
+            continue
+        replay_file(filename, args)
+    print(YELLOW + f"Replay finished in {time.monotonic() - started:.2f}s" + RESET)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
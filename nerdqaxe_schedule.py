@@ -0,0 +1,155 @@
+# =============================================================
+#              SETTLE-COST-AWARE TEST ORDERING
+# =============================================================
+# Settling after a settings change dominates the idle time of a sweep, and
+# it depends on the transition: a large voltage jump or a swing from a hot
+# to a cold point takes longer to converge than a small step. The expected
+# settle time of a transition a -> b is modelled linearly:
+#
+#   settle = restart + live + per_10mV * |dV| + per_20MHz * |dF|
+#            + heat_up * max(dP, 0) + cool_down * max(-dP, 0)
+#
+# with dP the change of the dynamic power proxy V^2 * F, and "live" used
+# instead of "restart" when the settings are applied without a reboot.
+# Coefficients are fitted by ridge regression towards a prior on the
+# recorded settle durations (settleSeconds with settledFrom in each result).
+# The remaining points are then ordered as an open path from the current
+# settings: nearest neighbour, improved with 2-opt.
+import numpy as np
+
+# Prior coefficients (seconds) and how many observations they are worth
+SETTLE_PRIOR = {
+    "restart": 300.0,
+    "live": 120.0,
+    "per_10mV": 10.0,
+    "per_20MHz": 5.0,
+    "heat_up": 200.0,
+    "cool_down": 200.0,
+}
+settle_prior_weight = 5.0
+settle_min_seconds = 90.0        # no transition is cheaper than the minimum settle time
+
+# Live apply: steps at most this large skip the restart (with --live-apply)
+live_apply_max_voltage_delta = 10
+live_apply_max_frequency_delta = 20
+
+def power_proxy(point):
+    v, f = point
+    return (v / 1000) ** 2 * f / 1000
+
+def is_live_step(a, b):
+    return abs(b[0] - a[0]) <= live_apply_max_voltage_delta and abs(b[1] - a[1]) <= live_apply_max_frequency_delta
+
+def transition_features(a, b, live):
+    """Feature row of the transition a -> b, in SETTLE_PRIOR order."""
+    d_power = power_proxy(b) - power_proxy(a)
+    return [
+        0.0 if live else 1.0,
+        1.0 if live else 0.0,
+        abs(b[0] - a[0]) / 10,
+        abs(b[1] - a[1]) / 20,
+        max(d_power, 0.0),
+        max(-d_power, 0.0),
+    ]
+
+def transitions_from_results(results):
+    """(from, to, live, settle seconds) for every result that recorded its transition."""
+    return [
+        (tuple(r["settledFrom"]), (r["coreVoltage"], r["frequency"]), r.get("liveApplied", False), r["settleSeconds"])
+        for r in results if "settledFrom" in r and "settleSeconds" in r
+    ]
+
+class TransitionCostModel:
+    """Expected settle seconds of a transition between two V/F points."""
+
+    def __init__(self, live_apply=False):
+        self.live_apply = live_apply
+        self.coef = np.array(list(SETTLE_PRIOR.values()))
+        self.observations = 0
+
+    def fit(self, transitions):
+        """Ridge regression of recorded settle times towards the prior."""
+        self.observations = len(transitions)
+        if not transitions:
+            return self
+        features = np.array([transition_features(a, b, live) for a, b, live, _ in transitions])
+        settle = np.array([seconds for *_, seconds in transitions], dtype=float)
+        prior = np.array(list(SETTLE_PRIOR.values()))
+        gram = features.T @ features + settle_prior_weight * np.eye(len(prior))
+        self.coef = np.maximum(np.linalg.solve(gram, features.T @ settle + settle_prior_weight * prior), 0.0)
+        return self
+
+    def cost(self, a, b):
+        live = self.live_apply and is_live_step(a, b)
+        return max(float(np.dot(transition_features(a, b, live), self.coef)), settle_min_seconds)
+
+    def matrix(self, points):
+        """Cost matrix between all points (asymmetric: heating and cooling differ)."""
+        grid = np.asarray(points, dtype=float)
+        d_voltage = np.abs(grid[None, :, 0] - grid[:, None, 0])
+        d_frequency = np.abs(grid[None, :, 1] - grid[:, None, 1])
+        proxy = (grid[:, 0] / 1000) ** 2 * grid[:, 1] / 1000
+        d_power = proxy[None, :] - proxy[:, None]
+        live = np.zeros_like(d_voltage, dtype=bool)
+        if self.live_apply:
+            live = (d_voltage <= live_apply_max_voltage_delta) & (d_frequency <= live_apply_max_frequency_delta)
+        restart, live_cost, per_10mv, per_20mhz, heat_up, cool_down = self.coef
+        costs = (np.where(live, live_cost, restart) + per_10mv * d_voltage / 10 + per_20mhz * d_frequency / 20
+                 + heat_up * np.maximum(d_power, 0) + cool_down * np.maximum(-d_power, 0))
+        costs = np.maximum(costs, settle_min_seconds)
+        np.fill_diagonal(costs, 0.0)
+        return costs
+
+def two_opt(costs, order):
+    """Improve an open path (order[0] fixed) by segment reversals until no move helps."""
+    order = list(order)
+    n = len(order)
+    improved = True
+    while improved:
+        improved = False
+        forward = np.concatenate([[0.0], np.cumsum([costs[order[k], order[k + 1]] for k in range(n - 1)])])
+        backward = np.concatenate([[0.0], np.cumsum([costs[order[k + 1], order[k]] for k in range(n - 1)])])
+        for i in range(1, n - 1):
+            for j in range(i + 1, n):
+                # Reverse order[i..j]: edges (i-1, i) and (j, j+1) are replaced
+                before = costs[order[i - 1], order[i]] + (forward[j] - forward[i])
+                after = costs[order[i - 1], order[j]] + (backward[j] - backward[i])
+                if j + 1 < n:
+                    before += costs[order[j], order[j + 1]]
+                    after += costs[order[i], order[j + 1]]
+                if after < before - 1e-9:
+                    order[i:j + 1] = reversed(order[i:j + 1])
+                    improved = True
+                    break
+            if improved:
+                break
+    return order
+
+def plan_path(start, points, model):
+    """Order points as a path from start that minimizes total expected settle time."""
+    points = list(points)
+    if len(points) < 2:
+        return points
+    nodes = [start] + points
+    costs = model.matrix(nodes)
+
+    # Nearest neighbour from the current settings
+    order = [0]
+    remaining = set(range(1, len(nodes)))
+    while remaining:
+        last = order[-1]
+        nearest = min(remaining, key=lambda k: (costs[last, k], k))
+        order.append(nearest)
+        remaining.remove(nearest)
+
+    order = two_opt(costs, order)
+    return [nodes[k] for k in order[1:]]
+
+def planned_seconds(start, points, model):
+    """Expected settle seconds of walking points in the given order from start."""
+    total = 0.0
+    current = start
+    for point in points:
+        total += model.cost(current, point)
+        current = point
+    return total
@@ -0,0 +1,567 @@
+# =============================================================
+#                  V/F SEARCH & GRID PRUNING
+# =============================================================
+# Chip/VR temperature and power draw grow with both core voltage and
+# frequency, so a thermal or power failure at (V, F) dominates every point
+# with V' >= V and F' >= F. An instability failure (no hashrate) at (V, F)
+# dominates every point with V' <= V and F' >= F: less voltage or more
+# frequency will not make the ASIC stable again. Passing results outside an
+# --objective envelope bound the grid the same way (see nerdqaxe_objective).
+import math
+
+import numpy as np
+
+from nerdqaxe_objective import ENVELOPE_ABOVE_REASONS, ENVELOPE_BELOW_REASONS
+
+# Failure reasons that bound the grid monotonically
+THERMAL_POWER_REASONS = {"CHIP_TEMP_EXCEEDED", "VR_TEMP_EXCEEDED", "POWER_CONSUMPTION_EXCEEDED",
+                         "PREDICTED_CHIP_TEMP_EXCEEDED", "PREDICTED_VR_TEMP_EXCEEDED", "PREDICTED_POWER_EXCEEDED"}
+INSTABILITY_REASONS = {"ZERO_HASHRATE", "HASHRATE_COLLAPSE"}
+
+# Reasons that mean the limit was (or would be) reached at that point
+CHIP_TEMP_REASONS = {"CHIP_TEMP_EXCEEDED", "PREDICTED_CHIP_TEMP_EXCEEDED"}
+VR_TEMP_REASONS = {"VR_TEMP_EXCEEDED", "PREDICTED_VR_TEMP_EXCEEDED"}
+POWER_REASONS = {"POWER_CONSUMPTION_EXCEEDED", "PREDICTED_POWER_EXCEEDED"}
+
+def dominates(failure_point, reason, point):
+    """True if a failure with `reason` at failure_point implies point fails as well."""
+    fail_v, fail_f = failure_point
+    v, f = point
+    if reason in THERMAL_POWER_REASONS or reason in ENVELOPE_ABOVE_REASONS:
+        return v >= fail_v and f >= fail_f
+    if reason in INSTABILITY_REASONS:
+        return v <= fail_v and f >= fail_f
+    if reason in ENVELOPE_BELOW_REASONS:
+        return v <= fail_v and f <= fail_f
+    return False
+
+class GridPruner:
+    """Tracks monotonic failures and the points they rule out, with the reason for each."""
+
+    def __init__(self):
+        self.failures = {}  # (V, F) -> error reason
+        self.origins = {}   # (V, F) -> where a failure not measured on this unit comes from (e.g. "fleet")
+        self.pruned = {}    # (V, F) -> "REASON@VmV/FMHz"
+        self.pruned_by = {} # (V, F) -> failure point that pruned it
+
+    def label(self, point):
+        origin = self.origins.get(point)
+        return f"{self.failures[point]}@{point[0]}mV/{point[1]}MHz" + (f" ({origin})" if origin else "")
+
+    def record_failure(self, point, reason, candidates, origin=None):
+        """Register a failure and return the candidates it newly prunes."""
+        if not any(reason in reasons for reasons in
+                   (THERMAL_POWER_REASONS, INSTABILITY_REASONS, ENVELOPE_ABOVE_REASONS, ENVELOPE_BELOW_REASONS)):
+            return []
+        self.failures[point] = reason
+        if origin is None:
+            self.origins.pop(point, None)
+        else:
+            self.origins[point] = origin
+        for candidate, source in self.pruned_by.items():
+            if source == point:
+                self.pruned[candidate] = self.label(point)  # e.g. a fleet failure confirmed on this unit
+        newly_pruned = []
+        for candidate in candidates:
+            if candidate != point and candidate not in self.pruned and dominates(point, reason, candidate):
+                self.pruned[candidate] = self.label(point)
+                self.pruned_by[candidate] = point
+                newly_pruned.append(candidate)
+        return newly_pruned
+
+    def retract(self, point):
+        """Forget the failure at point (it did not reproduce); returns the points no other failure rules out."""
+        if self.failures.pop(point, None) is None:
+            return []
+        self.origins.pop(point, None)
+        freed = []
+        for candidate in [c for c, source in self.pruned_by.items() if source == point]:
+            del self.pruned[candidate], self.pruned_by[candidate]
+            other = next((failure for failure, reason in self.failures.items()
+                          if failure != candidate and dominates(failure, reason, candidate)), None)
+            if other is None:
+                freed.append(candidate)
+            else:
+                self.pruned[candidate] = self.label(other)
+                self.pruned_by[candidate] = other
+        return freed
+
+    def exclude(self, point, reason):
+        """Rule out a single untested point that no failure dominates (e.g. an objective bound)."""
+        self.pruned[point] = reason
+
+    def is_pruned(self, point):
+        if point in self.pruned:
+            return True
+        return any(dominates(failure, reason, point) for failure, reason in self.failures.items() if failure != point)
+
+    def is_near_boundary(self, point, voltage_step, frequency_step):
+        """True if a direct grid neighbour of point is pruned or failed (likely marginal)."""
+        v, f = point
+        neighbours = [(v + voltage_step, f), (v, f + frequency_step), (v - voltage_step, f + frequency_step)]
+        return any(n in self.pruned or n in self.failures for n in neighbours)
+
+    def summary(self):
+        """Pruned points as result-file entries."""
+        return [
+            {"coreVoltage": v, "frequency": f, "skipped": True, "skipReason": reason}
+            for (v, f), reason in sorted(self.pruned.items())
+        ]
+
+# =============================================================
+#                 CACHED FAILURE RETRY POLICY
+# =============================================================
+# Failed combos are stored with their reason, sample count, time and the
+# ambient temperature given with --ambient. On resume each one is either
+# skipped (and, for monotonic reasons, seeds the pruner again) or retried:
+#   "never"    the failure does not depend on conditions (instability)
+#   "ambient"  retry only if ambient is known to have dropped since
+#   <seconds>  transient failure, retried once it is older than the TTL
+failure_retry_policy = {
+    "CHIP_TEMP_EXCEEDED": "ambient",
+    "VR_TEMP_EXCEEDED": "ambient",
+    "POWER_CONSUMPTION_EXCEEDED": "ambient",
+    "PREDICTED_CHIP_TEMP_EXCEEDED": "ambient",
+    "PREDICTED_VR_TEMP_EXCEEDED": "ambient",
+    "PREDICTED_POWER_EXCEEDED": "ambient",
+    "ZERO_HASHRATE": "never",
+    "HASHRATE_COLLAPSE": "never",
+    "INPUT_VOLTAGE_BELOW_MIN": 6 * 3600,
+    "INPUT_VOLTAGE_ABOVE_MAX": 6 * 3600,
+}
+transient_failure_ttl = 3600     # seconds; any reason not listed above
+ambient_retry_delta = 2.0        # °C ambient must have dropped to retry a thermal/power failure
+
+def retry_decision(failure, now, ambient):
+    """(retry, explanation) for a cached failure under the per-reason retry policy."""
+    reason = failure["errorReason"]
+    policy = failure_retry_policy.get(reason, transient_failure_ttl)
+    if policy == "never":
+        return False, f"{reason} does not depend on conditions"
+    if policy == "ambient":
+        recorded = failure.get("ambient")
+        if ambient is None or recorded is None:
+            return False, f"{reason}, ambient unknown"
+        if recorded - ambient >= ambient_retry_delta:
+            return True, f"{reason}, ambient dropped {recorded - ambient:.1f}°C"
+        return False, f"{reason}, ambient has not dropped {ambient_retry_delta:g}°C"
+    age = now - failure.get("timestamp", 0)
+    if age >= policy:
+        return True, f"{reason} is {age / 3600:.1f}h old"
+    return False, f"{reason} is younger than {policy / 3600:g}h"
+
+class GridSearch:
+    """Walks the V/F grid in sort_key order, dropping points ruled out by the pruner.
+
+    With a planner(start, points) the points of each priority tier are
+    ordered by it instead (e.g. to minimize settle time), starting from the
+    point tested last.
+    """
+
+    def __init__(self, grid, sort_key, tested, pruner, voltage_step, frequency_step, planner=None, start=None):
+        self.sort_key = sort_key
+        self.pruner = pruner
+        self.voltage_step = voltage_step
+        self.frequency_step = frequency_step
+        self.planner = planner
+        self.current = start
+        self.pending = [p for p in grid if p not in tested and not pruner.is_pruned(p)]
+        self.reorder()
+
+    def reorder(self):
+        """Test safe points first; points next to the failure boundary go to the back of their tier."""
+        def tier(point):
+            bias, _ = self.sort_key(point)
+            return (bias, self.pruner.is_near_boundary(point, self.voltage_step, self.frequency_step))
+
+        if self.planner is None or self.current is None:
+            self.pending.sort(key=lambda point: (*tier(point), self.sort_key(point)[1]))
+            return
+        ordered = []
+        start = self.current
+        for key in sorted({tier(p) for p in self.pending}):
+            path = self.planner(start, [p for p in self.pending if tier(p) == key])
+            ordered.extend(path)
+            start = path[-1] if path else start
+        self.pending = ordered
+
+    def next_point(self):
+        if not self.pending:
+            return None
+        self.current = self.pending.pop(0)
+        return self.current
+
+    def observe(self, point, result, error_reason):
+        """Feed back the outcome of a tested point; returns the points pruned by it."""
+        if error_reason is None:
+            return []
+        newly_pruned = self.pruner.record_failure(point, error_reason, self.pending)
+        if newly_pruned:
+            pruned = set(newly_pruned)
+            self.pending = [p for p in self.pending if p not in pruned]
+            self.reorder()
+        return newly_pruned
+
+    def restore(self, points):
+        """Queue points again whose pruning was retracted."""
+        self.pending.extend(p for p in points if p not in self.pending)
+        self.reorder()
+
+    def discard(self, points):
+        """Drop points the pruner excluded outside observe()."""
+        dropped = set(points)
+        self.pending = [p for p in self.pending if p not in dropped]
+
+# =============================================================
+#              MODEL-GUIDED ADAPTIVE SEARCH
+# =============================================================
+# Adaptive search settings
+adaptive_initial_points = 8      # space-filling points measured before the model is trusted
+adaptive_top_n = 8               # improvement is measured against the current N-th best
+adaptive_ridge = 1e-3            # regularization of the quadratic fit
+
+def quadratic_features(points, center, scale):
+    """Full quadratic basis [1, x, y, x^2, y^2, xy] in normalized V/F coordinates."""
+    xy = (np.asarray(points, dtype=float) - center) / scale
+    x, y = xy[:, 0], xy[:, 1]
+    return np.column_stack([np.ones(len(xy)), x, y, x * x, y * y, x * y])
+
+def normal_cdf(z):
+    return 0.5 * (1.0 + np.vectorize(math.erf)(z / math.sqrt(2.0)))
+
+def normal_pdf(z):
+    return np.exp(-0.5 * z * z) / math.sqrt(2.0 * math.pi)
+
+class ResponseSurface:
+    """Quadratic response surface over (V, F) with ridge regression and prediction uncertainty."""
+
+    def __init__(self, points, values, center, scale):
+        self.center = center
+        self.scale = scale
+        features = quadratic_features(points, center, scale)
+        values = np.asarray(values, dtype=float)
+        gram = features.T @ features + adaptive_ridge * np.eye(features.shape[1])
+        self.gram_inv = np.linalg.inv(gram)
+        self.coef = self.gram_inv @ features.T @ values
+        residuals = values - features @ self.coef
+        dof = len(values) - features.shape[1]
+        if dof > 0:
+            self.sigma = max(float(np.sqrt(residuals @ residuals / dof)), 1e-9)
+        else:
+            # Too few points for a residual estimate: assume 5% noise around the mean
+            self.sigma = 0.05 * max(abs(float(values.mean())), 1e-9)
+
+    def predict(self, points):
+        """Predicted mean and standard deviation at each point."""
+        features = quadratic_features(points, self.center, self.scale)
+        mean = features @ self.coef
+        variance = np.einsum("ij,jk,ik->i", features, self.gram_inv, features) * self.sigma ** 2
+        return mean, np.sqrt(variance + self.sigma ** 2 * 1e-4)
+
+def expected_improvement(mean, std, threshold, maximize=True):
+    """Expected improvement of a normal prediction over threshold."""
+    gain = mean - threshold if maximize else threshold - mean
+    z = gain / std
+    return gain * normal_cdf(z) + std * normal_pdf(z)
+
+class AdaptiveSearch:
+    """Chooses the next (V, F) by expected improvement on the top-N hashrate and J/TH lists.
+
+    Hashrate, J/TH, chip/VR temperature and power are each modelled with a
+    quadratic response surface. Candidates are scored by the larger relative
+    expected improvement of the two objectives, weighted by the probability
+    of staying within the temperature, VR and power limits. The search stops
+    once no candidate promises more than ei_threshold relative improvement.
+
+    With an Objective only its figure is scored, against the best result
+    inside its envelope, and feasibility uses the tightened envelope limits
+    (and the probability of reaching its minimum hashrate).
+    """
+
+    def __init__(self, grid, results, tested, pruner, initial_point, limits, ei_threshold=0.002,
+                 max_points=None, failed=None, seed_points=(), objective=None):
+        self.grid = list(grid)
+        self.objective = objective
+        self.pruner = pruner
+        self.tested = set(tested)
+        self.initial_point = initial_point
+        self.max_temp, self.max_vr_temp, self.max_power = limits
+        self.ei_threshold = ei_threshold
+        self.max_points = max_points
+        self.observations = [dict(r) for r in results]
+        self.failed = dict(failed or {})    # (V, F) -> error reason
+        self.seed_points = list(seed_points) # tried before space filling (e.g. the fleet's best points)
+        self.measured = 0
+        self.last_acquisition = None
+
+        grid_array = np.asarray(self.grid, dtype=float)
+        self.center = grid_array.mean(axis=0)
+        self.scale = np.maximum(np.ptp(grid_array, axis=0) / 2, 1.0)
+
+    @property
+    def pending(self):
+        return [p for p in self.grid if p not in self.tested and p not in self.failed and not self.pruner.is_pruned(p)]
+
+    def next_point(self):
+        candidates = self.pending
+        if not candidates:
+            return None
+        if self.max_points is not None and self.measured >= self.max_points:
+            return None
+
+        if len(self.observations) < adaptive_initial_points:
+            return self.space_filling_point(candidates)
+
+        scores = self.acquisition(candidates)
+        best = int(np.argmax(scores))
+        self.last_acquisition = float(scores[best])
+        if self.last_acquisition < self.ei_threshold:
+            return None
+        return candidates[best]
+
+    def space_filling_point(self, candidates):
+        """Initial design: the user's start point, any seed points, then the candidate farthest from everything tried."""
+        if self.initial_point in candidates and not self.tested and not self.failed:
+            return self.initial_point
+        for point in self.seed_points:
+            if point in candidates:
+                return point
+        tried = list(self.tested) + list(self.failed)
+        if not tried:
+            return candidates[0]
+        cand = (np.asarray(candidates, dtype=float) - self.center) / self.scale
+        seen = (np.asarray(tried, dtype=float) - self.center) / self.scale
+        distances = np.min(np.linalg.norm(cand[:, None, :] - seen[None, :, :], axis=2), axis=1)
+        return candidates[int(np.argmax(distances))]
+
+    def fit(self, key, extra=()):
+        """Response surface for one result field, plus (point, value) pseudo-observations."""
+        points = [(r["coreVoltage"], r["frequency"]) for r in self.observations if r.get(key) is not None]
+        values = [r[key] for r in self.observations if r.get(key) is not None]
+        for point, value in extra:
+            points.append(point)
+            values.append(value)
+        if len(points) < 3:
+            return None
+        return ResponseSurface(points, values, self.center, self.scale)
+
+    def improvement_bars(self):
+        """Hashrate and J/TH a candidate has to beat: the current N-th best of each."""
+        if self.objective is not None:
+            best = self.objective.best(self.observations)
+            if best is not None:
+                return (best["averageHashRate"], best["efficiencyJTH"])
+        hash_rates = sorted((r["averageHashRate"] for r in self.observations), reverse=True)
+        efficiencies = sorted(r["efficiencyJTH"] for r in self.observations)
+        return (hash_rates[min(adaptive_top_n, len(hash_rates)) - 1],
+                efficiencies[min(adaptive_top_n, len(efficiencies)) - 1])
+
+    def acquisition(self, candidates):
+        """Relative expected improvement on either top-N list, times probability of feasibility."""
+        for r in self.observations:
+            r.setdefault("power", r["efficiencyJTH"] * r["averageHashRate"] / 1000)
+
+        # Failures at the limits tell the models the limit was reached there
+        temp_extra = [(p, self.max_temp) for p, reason in self.failed.items() if reason in CHIP_TEMP_REASONS]
+        vr_extra = [(p, self.max_vr_temp) for p, reason in self.failed.items() if reason in VR_TEMP_REASONS]
+        power_extra = [(p, self.max_power) for p, reason in self.failed.items() if reason in POWER_REASONS]
+
+        hashrate_model = self.fit("averageHashRate")
+        efficiency_model = self.fit("efficiencyJTH")
+        hashrate_bar, efficiency_bar = self.improvement_bars()
+
+        hashrate_mean, hashrate_std = hashrate_model.predict(candidates)
+        hashrate_score = expected_improvement(hashrate_mean, hashrate_std, hashrate_bar) / abs(hashrate_bar)
+        mean, std = efficiency_model.predict(candidates)
+        efficiency_score = expected_improvement(mean, std, efficiency_bar, maximize=False) / abs(efficiency_bar)
+        limits = (self.max_temp, self.max_vr_temp, self.max_power)
+        if self.objective is None:
+            score = np.maximum(hashrate_score, efficiency_score)
+        else:
+            score = hashrate_score if self.objective.key == "averageHashRate" else efficiency_score
+            limits = self.objective.envelope()
+            if self.objective.min_hashrate is not None:
+                score = score * (1 - normal_cdf((self.objective.min_hashrate - hashrate_mean) / hashrate_std))
+
+        for key, extra, limit in zip(("averageTemperature", "averageVRTemp", "power"),
+                                     (temp_extra, vr_extra, power_extra), limits):
+            model = self.fit(key, extra)
+            if model is not None:
+                mean, std = model.predict(candidates)
+                score = score * normal_cdf((limit - mean) / std)
+        return score
+
+    def observe(self, point, result, error_reason):
+        """Feed back the outcome of a tested point; returns the points pruned by it."""
+        self.measured += 1
+        if result is not None:
+            self.tested.add(point)
+            self.observations.append(dict(result))
+            # A passing result outside the objective's envelope still bounds the grid
+            return self.pruner.record_failure(point, error_reason, self.pending) if error_reason else []
+        self.failed[point] = error_reason
+        return self.pruner.record_failure(point, error_reason, self.pending)
+
+    def restore(self, points):
+        """Nothing to do: pending is derived from the pruner on every call."""
+
+    def discard(self, points):
+        """Nothing to do: pending is derived from the pruner on every call."""
+
+# =============================================================
+#                LOCAL REFINEMENT (--fine)
+# =============================================================
+# Pattern search around the incumbents of both objectives, the highest
+# hashrate and the lowest J/TH. Candidates are the deduplicated union of the
+# incumbents' neighbours (8 directions) at their current step, measured in
+# order of expected gain over the incumbent beyond measurement noise (the
+# response surfaces of the adaptive search). A result that beats an
+# incumbent by more than the noise moves it there and its remaining old
+# neighbours are dropped; once no neighbour at a step improves, the step is
+# halved, and below the finest step that incumbent is done.
+refine_steps = ((10, 20), (5, 10))   # (mV, MHz) pattern steps, coarsest first
+refine_noise_floor = 0.005           # relative difference always treated as measurement noise
+refine_model_window = (30, 75)       # (mV, MHz) around an incumbent; results within it fit the local models
+
+# (result field, CI width field, maximize)
+REFINE_OBJECTIVES = (("averageHashRate", "hashrateCIWidth", True), ("efficiencyJTH", "efficiencyCIWidth", False))
+
+def relative_noise(a, b, ci_key):
+    """Relative 95% half-width of the difference between two results (stored CI widths are full widths)."""
+    return max(math.hypot(a.get(ci_key, 0) / 2, b.get(ci_key, 0) / 2), refine_noise_floor)
+
+def improves(result, incumbent, key, ci_key, maximize):
+    """True if result beats incumbent on key by more than the measurement noise."""
+    gain = (result[key] - incumbent[key]) / abs(incumbent[key])
+    return (gain if maximize else -gain) > relative_noise(result, incumbent, ci_key)
+
+class LocalRefinement(AdaptiveSearch):
+    """Pattern search with shrinking steps around the best hashrate and the best J/TH result.
+
+    grid is the coarse grid; it sets the bounds and the model normalization.
+    With an Objective there is one incumbent, the best result inside its
+    envelope (none if no result satisfies it). seeds are estimates of
+    untested combos (e.g. a sharded model map): they count as observations
+    and may become incumbents, and a seed incumbent is measured first; its
+    measurement then replaces the estimate.
+    """
+
+    def __init__(self, grid, results, tested, pruner, limits, failed=None, objective=None, seeds=()):
+        # Estimates never override what this unit measured or ruled out itself
+        seeds = [s for s in seeds if (s["coreVoltage"], s["frequency"]) not in tested
+                 and (s["coreVoltage"], s["frequency"]) not in (failed or {})
+                 and not pruner.is_pruned((s["coreVoltage"], s["frequency"]))]
+        super().__init__(grid, list(results) + list(seeds), tested, pruner, None, limits, failed=failed,
+                         objective=objective)
+        self.low = (min(v for v, _ in self.grid), min(f for _, f in self.grid))
+        self.high = (max(v for v, _ in self.grid), max(f for _, f in self.grid))
+        self.seeds = {(s["coreVoltage"], s["frequency"]) for s in seeds}
+        self.incumbents = {}
+        self.steps = {}     # objective -> index into refine_steps
+        for key, _, maximize in REFINE_OBJECTIVES:
+            if objective is None or key == objective.key:
+                best = self.best_known(key, maximize)
+                if best is not None:
+                    self.incumbents[key] = best
+                    self.steps[key] = 0
+        self.initial = dict(self.incumbents)
+
+    def reachable_seed(self, point):
+        return point in self.seeds and point not in self.failed and not self.pruner.is_pruned(point)
+
+    def best_known(self, key, maximize):
+        """Best result or still reachable seed on key, inside the objective's envelope if there is one."""
+        candidates = [r for r in self.observations
+                      if (not r.get("modelEstimate") or self.reachable_seed((r["coreVoltage"], r["frequency"])))
+                      and (self.objective is None or self.objective.violation(r) is None)]
+        if not candidates:
+            return None
+        pick = max if maximize else min
+        return pick(candidates, key=lambda r: r[key])
+
+    @property
+    def pending(self):
+        return sorted({p for key in self.active() for p in self.neighbours(key)})
+
+    def active(self):
+        return [key for key in self.incumbents if self.steps[key] < len(refine_steps)]
+
+    def neighbours(self, key, step=None):
+        """Untested, not ruled out neighbours of an incumbent at its current (or the given) step."""
+        incumbent = self.incumbents[key]
+        v, f = incumbent["coreVoltage"], incumbent["frequency"]
+        dv, df = refine_steps[self.steps[key] if step is None else step]
+        points = [(v + a * dv, f + b * df) for a in (-1, 0, 1) for b in (-1, 0, 1)]  # the centre if it is a seed
+        return [p for p in points
+                if self.low[0] <= p[0] <= self.high[0] and self.low[1] <= p[1] <= self.high[1]
+                and p not in self.tested and p not in self.failed and not self.pruner.is_pruned(p)]
+
+    def planned_points(self):
+        """The combos measured if no incumbent moves: every neighbourhood from the current step down."""
+        return sorted({p for key in self.active()
+                       for step in range(self.steps[key], len(refine_steps)) for p in self.neighbours(key, step)})
+
+    def fit(self, key, extra=()):
+        """Response surface over the results near the incumbents (all results if too few are near)."""
+        near = [r for r in self.observations if any(
+            abs(r["coreVoltage"] - i["coreVoltage"]) <= refine_model_window[0]
+            and abs(r["frequency"] - i["frequency"]) <= refine_model_window[1] for i in self.incumbents.values())]
+        if len(near) < adaptive_initial_points:
+            return super().fit(key, extra)
+        everything, self.observations = self.observations, near
+        try:
+            return super().fit(key, extra)
+        finally:
+            self.observations = everything
+
+    def improvement_bars(self):
+        """The incumbents, plus the noise a gain has to exceed."""
+        bars = []
+        for key, ci_key, maximize in REFINE_OBJECTIVES:
+            # Under an objective the other figure is not scored; the incumbent's own value stands in
+            incumbent = self.incumbents.get(key) or self.incumbents[self.objective.key]
+            noise = relative_noise(incumbent, incumbent, ci_key)
+            bars.append(incumbent[key] * (1 + noise if maximize else 1 - noise))
+        return tuple(bars)
+
+    def next_point(self):
+        while True:
+            neighbourhoods = {key: self.neighbours(key) for key in self.active()}
+            if not neighbourhoods:
+                return None
+            used_up = [key for key, points in neighbourhoods.items() if not points]
+            if used_up:
+                for key in used_up:
+                    self.steps[key] += 1
+                continue
+            candidates = sorted({p for points in neighbourhoods.values() for p in points})
+            for key in neighbourhoods:
+                centre = (self.incumbents[key]["coreVoltage"], self.incumbents[key]["frequency"])
+                if centre in self.seeds and centre in candidates:
+                    self.last_acquisition = None  # an estimated incumbent is measured before its neighbours
+                    return centre
+            if len(self.observations) < adaptive_initial_points:
+                self.last_acquisition = None  # too few results for a model: plain order
+                return candidates[0]
+            scores = self.acquisition(candidates)
+            best = int(np.argmax(scores))
+            self.last_acquisition = float(scores[best])
+            return candidates[best]
+
+    def observe(self, point, result, error_reason):
+        """Feed back the outcome; a gain beyond noise moves the incumbent (at the same step)."""
+        if point in self.seeds:
+            self.seeds.discard(point)
+            self.observations = [r for r in self.observations
+                                 if not (r.get("modelEstimate") and (r["coreVoltage"], r["frequency"]) == point)]
+        newly_pruned = super().observe(point, result, error_reason)
+        for key, ci_key, maximize in REFINE_OBJECTIVES:
+            if key not in self.incumbents:
+                continue
+            incumbent = self.incumbents[key]
+            if incumbent.get("modelEstimate") and not self.reachable_seed((incumbent["coreVoltage"], incumbent["frequency"])):
+                # Measured, failed or ruled out here: the estimate gives way to what this unit knows
+                self.incumbents[key] = self.best_known(key, maximize) or incumbent
+            elif result is not None and error_reason is None and improves(result, incumbent, key, ci_key, maximize):
+                self.incumbents[key] = result  # outside the envelope a result cannot become an incumbent
+        return newly_pruned
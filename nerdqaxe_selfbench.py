@@ -0,0 +1,304 @@
+# =============================================================
+#            SCHEDULING EFFICIENCY SELF-BENCHMARK
+# =============================================================
+# Drives the complete benchmark flow against in-process simulated devices
+# and reports what a sweep costs and how good its answer is, per search
+# strategy and grid size. Every scenario runs three stages on one unit:
+#
+#   sweep   grid/adaptive loop, interrupted after N results (Ctrl+C path,
+#           reset_to_best_setting)
+#   resume  restart with the saved results file and finish the sweep
+#   fine    fine_tune_top_performers (local refinement), then reset_to_best_setting
+#
+# Reported per stage and in total: simulated device-hours, the share of that
+# time spent settling, measuring and idle (applying settings, restarts,
+# retries), restarts, HTTP request count, errors and client-side latency
+# percentiles (from the device clients' histograms). The final top-8 lists are scored against the simulator's
+# noise-free steady state. Run it before and after any change to timing or
+# search logic to show whether a full sweep got cheaper.
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import nerdqaxe_benchmark as nb
+from nerdqaxe_benchmark import BenchmarkSession, GREEN, YELLOW, RED, RESET
+from nerdqaxe_client import LatencyHistogram
+from nerdqaxe_simulator import DEFAULT_MODEL, start_simulators
+
+# Grid presets: BenchmarkConfig overrides of the grid bounds
+GRID_PRESETS = {
+    "small": {"min_allowed_voltage": 1150, "max_allowed_voltage": 1200,
+              "min_allowed_frequency": 600, "max_allowed_frequency": 750},
+    "full": {},
+}
+
+STAGES = ("sweep", "resume", "fine")
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Measure the benchmark tool\'s own scheduling efficiency on simulated devices')
+    parser.add_argument('--strategies', default='grid,adaptive',
+                        help='Comma-separated search strategies to compare (default: grid,adaptive)')
+    parser.add_argument('--grids', default='small,full',
+                        help=f'Comma-separated grid presets: {", ".join(GRID_PRESETS)} (default: small,full)')
+    parser.add_argument('--accel', type=float, default=2000.0,
+                        help='Simulated seconds per wall-clock second (default: 2000)')
+    parser.add_argument('--seed', type=int, default=0, help='Simulator seed; the same seed gives the same unit (default: 0)')
+    parser.add_argument('--interrupt-after', type=int,
+                        help='Results collected before the sweep stage is interrupted (default: a quarter of the grid)')
+    parser.add_argument('--early-stop', action='store_true', help='Run the benchmark with --early-stop')
+    parser.add_argument('--no-predict', action='store_true', help='Run the benchmark with --no-predict')
+    parser.add_argument('--poll-interval', type=float, default=nb.poll_interval,
+                        help=f'Measurement poll interval passed to the benchmark (default: {nb.poll_interval})')
+    parser.add_argument('--order', choices=['distance', 'settle'], default='settle',
+                        help='Grid test order passed to the benchmark (default: settle)')
+    parser.add_argument('--live-apply', action='store_true',
+                        help='Simulate firmware that applies settings without a restart and run the benchmark with --live-apply')
+    parser.add_argument('--sim', action='append', default=[], metavar='KEY=VALUE',
+                        help='Override a simulator model parameter, e.g. --sim ambient=32 --sim chip_time_constant=400')
+    parser.add_argument('--output', default='nerdqaxe_selfbench_results.json',
+                        help='JSON report file (default: nerdqaxe_selfbench_results.json)')
+    args = parser.parse_args()
+
+    args.strategies = [s.strip() for s in args.strategies.split(",") if s.strip()]
+    args.grids = [g.strip() for g in args.grids.split(",") if g.strip()]
+    for strategy in args.strategies:
+        if strategy not in ("grid", "adaptive"):
+            parser.error(f"unknown strategy '{strategy}'")
+    for grid in args.grids:
+        if grid not in GRID_PRESETS:
+            parser.error(f"unknown grid preset '{grid}'")
+    if args.accel <= 0:
+        parser.error("--accel must be greater than zero")
+    overrides = {}
+    for item in args.sim:
+        key, _, value = item.partition("=")
+        if key not in DEFAULT_MODEL:
+            parser.error(f"unknown simulator parameter '{key}'")
+        try:
+            overrides[key] = float(value)
+        except ValueError:
+            parser.error(f"invalid value for {key}: '{value}'")
+    args.sim = overrides
+    return args
+
+# =============================================================
+#                     INSTRUMENTATION
+# =============================================================
+class InstrumentedSession(BenchmarkSession):
+    """BenchmarkSession that records its total device time and can interrupt itself.
+
+    The per-phase split comes from the session's own PhaseProfiler.
+    """
+
+    def __init__(self, ip_address, config=None, interrupt_after=None, **options):
+        super().__init__(ip_address, config, **options)
+        self.interrupt_after = interrupt_after
+        self.device_seconds = 0.0
+
+    def save_result(self, result):
+        super().save_result(result)
+        if self.interrupt_after is not None and len(self.results) >= self.interrupt_after:
+            self.request_stop()  # same path as Ctrl+C
+
+    def run(self):
+        start = self.clock()
+        try:
+            super().run()
+        finally:
+            self.device_seconds = self.clock() - start
+
+def grid_points(config):
+    return [
+        (v, f)
+        for v in range(config.min_allowed_voltage, config.max_allowed_voltage + 1, config.voltage_step)
+        for f in range(config.min_allowed_frequency, config.max_allowed_frequency + 1, config.grid_frequency_step())
+    ]
+
+# =============================================================
+#                        METRICS
+# =============================================================
+def latency_metrics(histogram):
+    return {f"p{q}": round(histogram.percentile(q), 2) if histogram.count else None for q in (50, 90, 99)}
+
+def client_errors(stats):
+    """Error counts by kind over all endpoints of one client."""
+    errors = {}
+    for endpoint in stats["endpoints"].values():
+        for kind, n in endpoint["errors"].items():
+            errors[kind] = errors.get(kind, 0) + n
+    return errors
+
+def stage_metrics(session, restarts):
+    """Time split, restarts and HTTP statistics of one stage."""
+    total = session.device_seconds
+    session.profiler.charge()
+    settling = session.profiler.totals["settle"]
+    measuring = session.profiler.totals["measure"]
+    return {
+        "deviceHours": total / 3600,
+        "settleFraction": settling / total if total else 0.0,
+        "measureFraction": measuring / total if total else 0.0,
+        "idleFraction": max(total - settling - measuring, 0.0) / total if total else 0.0,
+        "restarts": restarts,
+        "httpRequests": session.client.latency().count,
+        "httpErrors": client_errors(session.client.stats()),
+        "latencyMs": latency_metrics(session.client.latency()),
+        "results": len(session.results),
+        "pruned": len(session.pruner.pruned),
+    }
+
+def ground_truth(device, points, config):
+    """Noise-free steady state of every point that stays within the benchmark's limits."""
+    truth = {}
+    for point in points:
+        state = device.steady_state(*point)
+        if (state["hashRate"] > 0 and state["temp"] < config.max_temp and state["vrTemp"] < config.max_vr_temp
+                and state["power"] <= config.max_power
+                and config.min_input_voltage <= state["voltage"] <= config.max_input_voltage):
+            truth[point] = state
+    return truth
+
+def list_closeness(found, truth, key, maximize):
+    """Overlap with the true top 8 and the true-value regret of the reported #1."""
+    found_points = [(r["coreVoltage"], r["frequency"]) for r in found]
+    true_top = sorted(truth, key=lambda p: truth[p][key], reverse=maximize)[:8]
+    if not found_points or not true_top:
+        return {"overlap": 0, "regret": None}
+    best = truth[true_top[0]][key]
+    reported = truth.get(found_points[0], {}).get(key)
+    if reported is None:
+        regret = None  # reported #1 is infeasible in truth
+    else:
+        regret = (best - reported) / best if maximize else (reported - best) / best
+    return {"overlap": len(set(found_points) & set(true_top)), "regret": regret}
+
+# =============================================================
+#                        SCENARIOS
+# =============================================================
+def run_stage(address, device, config, interrupt_after=None):
+    """Run one BenchmarkSession against the simulator and collect its metrics."""
+    restarts_before = device.stats["restarts"]
+    with open(os.devnull, "w") as out:
+        session = InstrumentedSession(address, config, interrupt_after=interrupt_after, out=out)
+        session.run()
+    return session, stage_metrics(session, device.stats["restarts"] - restarts_before)
+
+def run_scenario(strategy, grid_name, args):
+    """sweep -> resume -> fine on one fresh simulated unit."""
+    address, device, server = start_simulators(1, base_port=0, seed=args.seed, accel=args.accel,
+                                               live_apply=args.live_apply, **args.sim)[0]
+    started = time.monotonic()
+    try:
+        config = nb.BenchmarkConfig(search=strategy, early_stop=args.early_stop, predict=not args.no_predict,
+                                    order=args.order, live_apply=args.live_apply, poll_interval=args.poll_interval,
+                                    time_scale=args.accel, **GRID_PRESETS[grid_name])
+        grid = grid_points(config)
+        interrupt_after = args.interrupt_after or max(len(grid) // 4, 1)
+
+        stages = {}
+        latency = LatencyHistogram()
+        for name, stage_config, stop_after in (("sweep", config, interrupt_after),
+                                               ("resume", config.replace(resume=True), None),
+                                               ("fine", config.replace(fine=True), None)):
+            session, stages[name] = run_stage(address, device, stage_config, stop_after)
+            latency.merge(session.client.latency())
+
+        measured = {(r["coreVoltage"], r["frequency"]) for r in session.results}
+        truth = ground_truth(device, set(grid) | measured, config)
+        top_hashrate, top_efficient = nb.rank_results(session.results)
+    finally:
+        server.shutdown()
+
+    return {
+        "strategy": strategy,
+        "grid": grid_name,
+        "gridSize": len(grid),
+        "interruptAfter": interrupt_after,
+        "wallSeconds": round(time.monotonic() - started, 1),
+        "stages": stages,
+        "total": stage_metrics_total(stages, latency, device.stats["restarts"]),
+        "closeness": {
+            "hashrate": list_closeness(top_hashrate, truth, "hashRate", maximize=True),
+            "efficiency": list_closeness(top_efficient, truth, "efficiencyJTH", maximize=False),
+        },
+    }
+
+def stage_metrics_total(stages, latency, restarts):
+    """Device-time weighted totals over all stages."""
+    seconds = {name: s["deviceHours"] * 3600 for name, s in stages.items()}
+    total = sum(seconds.values())
+    def weighted(key):
+        return sum(stages[name][key] * seconds[name] for name in stages) / total if total else 0.0
+    return {
+        "deviceHours": total / 3600,
+        "settleFraction": weighted("settleFraction"),
+        "measureFraction": weighted("measureFraction"),
+        "idleFraction": weighted("idleFraction"),
+        "restarts": restarts,
+        "httpRequests": latency.count,
+        "httpErrors": {kind: sum(s["httpErrors"].get(kind, 0) for s in stages.values())
+                       for kind in sorted({kind for s in stages.values() for kind in s["httpErrors"]})},
+        "latencyMs": latency_metrics(latency),
+        "results": stages["fine"]["results"],
+    }
+
+# =============================================================
+#                        REPORT
+# =============================================================
+def format_regret(value):
+    return "infeas." if value is None else f"{value:.1%}"
+
+def print_report(reports):
+    header = (f"{'Strategy':<9} {'Grid':<6} {'Stage':<7} {'Dev-h':>6} {'Settle':>7} {'Measure':>8} {'Idle':>6} "
+              f"{'Restarts':>8} {'HTTP':>6} {'p50 ms':>7} {'p99 ms':>7} {'Results':>7}")
+    print(header)
+    print("-" * len(header))
+    for report in reports:
+        rows = [(name, report["stages"][name]) for name in STAGES] + [("total", report["total"])]
+        for name, m in rows:
+            color = GREEN if name == "total" else ""
+            print(color +
+                  f"{report['strategy']:<9} {report['grid']:<6} {name:<7} {m['deviceHours']:>6.1f} "
+                  f"{m['settleFraction']:>7.0%} {m['measureFraction']:>8.0%} {m['idleFraction']:>6.0%} "
+                  f"{m['restarts']:>8} {m['httpRequests']:>6} {m['latencyMs']['p50'] or 0:>7.2f} "
+                  f"{m['latencyMs']['p99'] or 0:>7.2f} {m['results']:>7}" + RESET)
+        hashrate, efficiency = report["closeness"]["hashrate"], report["closeness"]["efficiency"]
+        print(YELLOW + f"  ground truth: top-8 hashrate overlap {hashrate['overlap']}/8, #1 regret "
+                       f"{format_regret(hashrate['regret'])} | top-8 J/TH overlap {efficiency['overlap']}/8, "
+                       f"#1 regret {format_regret(efficiency['regret'])} | {report['wallSeconds']:.0f}s wall" + RESET)
+
+def main():
+    args = parse_arguments()
+    output = os.path.abspath(args.output)
+    reports = []
+    # Sessions write results and telemetry to the working directory; keep them out of the user's
+    with tempfile.TemporaryDirectory(prefix="nerdqaxe_selfbench_") as workdir:
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            for grid_name in args.grids:
+                for strategy in args.strategies:
+                    print(YELLOW + f"Running {strategy} search on the {grid_name} grid..." + RESET, flush=True)
+                    for filename in os.listdir(workdir):
+                        os.remove(filename)
+                    reports.append(run_scenario(strategy, grid_name, args))
+        except KeyboardInterrupt:
+            print(RED + "Self-benchmark interrupted." + RESET)
+        finally:
+            os.chdir(cwd)
+
+    if not reports:
+        sys.exit(1)
+    print()
+    print_report(reports)
+    with open(output, "w") as f:
+        json.dump({"accel": args.accel, "seed": args.seed, "earlyStop": args.early_stop, "predict": not args.no_predict,
+                   "order": args.order, "liveApply": args.live_apply,
+                   "pollInterval": args.poll_interval, "simulator": args.sim, "scenarios": reports}, f, indent=4)
+    print(GREEN + f"\nReport saved to {output}" + RESET)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,458 @@
+# =============================================================
+#          SHARDED MODEL CHARACTERIZATION (--fleet --shard)
+# =============================================================
+# Splits one V/F grid across a fleet of identical units (same model,
+# asicCount and smallCoreCount), so a new model is mapped in about 1/N of
+# the time of sweeping every unit:
+#
+#   1. Every unit first measures the same few calibration combos: the
+#      lowest frequency at both ends of the voltage range and the initial
+#      pair.
+#   2. The rest of the grid is split into one contiguous run of voltage
+#      columns per unit, each walked from low to high frequency. A unit
+#      that runs out of work steals the upper half of the longest queue
+#      left, so no unit idles while another still has a backlog.
+#   3. A failure on any unit rules out the combos it dominates for all of
+#      them: the model map is as conservative as the weakest unit in each
+#      region (per-unit fine-tuning looks beyond it).
+#
+# Afterwards the combos every unit passed give each unit's offsets against
+# the median unit (hashrate and J/TH ratios, chip and VR temperature
+# differences); a unit whose calibration combos do not agree on one offset
+# is flagged. Every result is normalized with its unit's offsets and the
+# shards are merged into one map, nerdqaxe_model_results_<model>.json.
+# With --fine each unit refines around that map translated back to its own
+# offsets, measuring the map's best combos first.
+import collections
+import math
+import re
+import statistics
+import threading
+import time
+
+from nerdqaxe_benchmark import GREEN, YELLOW, RED, RESET, build_final_data
+from nerdqaxe_journal import write_atomic
+from nerdqaxe_profile import format_duration
+from nerdqaxe_search import GridPruner, retry_decision
+from nerdqaxe_store import describe_identity, device_identity
+
+shard_ratio_tolerance = 0.02     # hashrate / J/TH: max relative spread of a unit's offset across calibration combos
+shard_temp_tolerance = 1.5       # °C: max spread of a unit's chip / VR temperature offset across calibration combos
+
+# (result field, offset name, ratio rather than difference)
+NORMALIZED_FIELDS = (("averageHashRate", "hashrateFactor", True), ("efficiencyJTH", "efficiencyFactor", True),
+                     ("averageTemperature", "tempOffset", False), ("averageVRTemp", "vrTempOffset", False))
+
+def point_of(entry):
+    return entry["coreVoltage"], entry["frequency"]
+
+def model_results_filename(identity):
+    slug = re.sub(r"[^A-Za-z0-9.-]+", "_", f"{identity['model']}_x{identity['asic_count']}_{identity['small_core_count']}")
+    return f"nerdqaxe_model_results_{slug}.json"
+
+def calibration_points(grid, initial):
+    """Combos every unit measures: the lowest frequency at the lowest and highest voltage, and the initial pair."""
+    low_frequency = min(f for _, f in grid)
+    voltages = [v for v, _ in grid]
+    points = {(min(voltages), low_frequency), (max(voltages), low_frequency)}
+    if initial in grid:
+        points.add(initial)
+    return sorted(points)
+
+def load_unit_data(session):
+    """(results, failures) of a unit's results file and journal, read without touching the session."""
+    if not session.journal.exists():
+        return [], []
+    snapshot, records = session.journal.load()
+    results = list(snapshot.get("all_results", [])) + [r["entry"] for r in records if r["type"] == "result"]
+    tested = {point_of(r) for r in results}
+    failures = {}
+    for entry in snapshot.get("failures", []) + [r["entry"] for r in records if r["type"] == "failure"]:
+        if point_of(entry) not in tested:
+            failures[point_of(entry)] = entry  # the latest one per combo
+    return results, [failures[point] for point in sorted(failures)]
+
+def unit_offsets(unit_results, calibration=()):
+    """Offsets of each unit against the median unit at the calibration combos every unit passed.
+
+    unit_results maps a unit (IP) to its results. Without any of the
+    calibration combos passed on every unit, all combos they share are used
+    (fine-tuning combos near the stability edge make that less reliable).
+    Ratios and differences are averaged over those combos; the residual is
+    the largest deviation from that average, i.e. how far one constant
+    offset is off somewhere.
+    """
+    by_unit = {ip: {point_of(r): r for r in results} for ip, results in unit_results.items()}
+    shared = sorted(set.intersection(*(set(points) for points in by_unit.values()))) if by_unit else []
+    shared = [p for p in shared if p in calibration] or shared
+    offsets = {}
+    for ip, points in by_unit.items():
+        entry = {"calibrationCombos": len(shared), "residual": {}}
+        consistent = True
+        for field, name, ratio in NORMALIZED_FIELDS:
+            deltas = []
+            for point in shared:
+                values = [by_unit[unit][point].get(field) for unit in by_unit]
+                if None in values:
+                    continue
+                reference = statistics.median(values)
+                own = points[point][field]
+                deltas.append(own / reference if ratio else own - reference)
+            if not deltas:
+                entry[name] = 1.0 if ratio else 0.0
+                continue
+            entry[name] = statistics.fmean(deltas)
+            residual = max(abs(delta - entry[name]) for delta in deltas)
+            entry["residual"][name] = residual
+            if residual > (shard_ratio_tolerance if ratio else shard_temp_tolerance):
+                consistent = False
+        entry["consistent"] = consistent
+        offsets[ip] = entry
+    return offsets, shared
+
+def normalize(result, offset):
+    """A unit's result expressed for the median unit."""
+    entry = dict(result)
+    for field, name, ratio in NORMALIZED_FIELDS:
+        if entry.get(field) is not None:
+            entry[field] = entry[field] / offset[name] if ratio else entry[field] - offset[name]
+    return entry
+
+def denormalize(entry, offset):
+    """A model map entry translated to one unit: its expected result there."""
+    estimate = {"coreVoltage": entry["coreVoltage"], "frequency": entry["frequency"], "modelEstimate": True}
+    for field, name, ratio in NORMALIZED_FIELDS:
+        if entry.get(field) is not None:
+            estimate[field] = entry[field] * offset[name] if ratio else entry[field] + offset[name]
+    return estimate
+
+def merge_model(unit_results, offsets):
+    """One normalized entry per combo; combos measured on several units are averaged."""
+    measured = collections.defaultdict(list)
+    for ip, results in unit_results.items():
+        for result in results:
+            measured[point_of(result)].append((ip, normalize(result, offsets[ip])))
+    merged = []
+    for (v, f), entries in sorted(measured.items()):
+        entry = {"coreVoltage": v, "frequency": f}
+        for field, _, _ in NORMALIZED_FIELDS:
+            values = [normalized[field] for _, normalized in entries if normalized.get(field) is not None]
+            if values:
+                entry[field] = round(statistics.fmean(values), 3)
+        entry["measuredOn"] = [ip for ip, _ in entries]
+        merged.append(entry)
+    return merged
+
+class SharedPruner(GridPruner):
+    """The GridPruner of every unit in a sharded sweep: each read and change holds the queue's lock."""
+
+    def __init__(self):
+        super().__init__()
+        self.lock = threading.RLock()
+
+    def record_failure(self, point, reason, candidates, origin=None):
+        with self.lock:
+            return super().record_failure(point, reason, candidates, origin)
+
+    def retract(self, point):
+        with self.lock:
+            return super().retract(point)
+
+    def exclude(self, point, reason):
+        with self.lock:
+            super().exclude(point, reason)
+
+    def is_pruned(self, point):
+        with self.lock:
+            return super().is_pruned(point)
+
+    def is_near_boundary(self, point, voltage_step, frequency_step):
+        with self.lock:
+            return super().is_near_boundary(point, voltage_step, frequency_step)
+
+    def summary(self):
+        with self.lock:
+            return super().summary()
+
+class ShardQueue:
+    """Work-stealing queue over one grid: a deque per unit, failures pruned from all of them. Thread-safe."""
+
+    def __init__(self, points, units, pruner):
+        self.lock = pruner.lock  # one lock for the queues and the SharedPruner
+        self.pruner = pruner
+        points = sorted(p for p in points if not pruner.is_pruned(p))
+        size = math.ceil(len(points) / units) if points else 0
+        self.queues = [collections.deque(points[i * size:(i + 1) * size]) for i in range(units)]
+        self.steals = 0
+
+    def remaining(self):
+        """A sorted snapshot of every queued combo, taken under the lock."""
+        with self.lock:
+            return sorted(p for queue in self.queues for p in queue)
+
+    def share(self, unit):
+        """An even share of what is left, as this unit's expected remaining work (stealing balances it)."""
+        with self.lock:
+            return self.remaining()[unit::len(self.queues)]
+
+    def take(self, unit):
+        """The next combo of its own queue; an empty one first steals the upper half of the longest queue."""
+        with self.lock:
+            own = self.queues[unit]
+            if not own:
+                victim = max(self.queues, key=len)
+                if not victim:
+                    return None
+                stolen = [victim.pop() for _ in range((len(victim) + 1) // 2)]
+                own.extend(reversed(stolen))
+                self.steals += 1
+            return own.popleft()
+
+    def record_failure(self, point, reason):
+        """Prune what a failure on any unit dominates from every queue; returns the pruned combos."""
+        with self.lock:
+            newly_pruned = self.pruner.record_failure(point, reason, self.remaining())
+            self.drop(newly_pruned)
+            return newly_pruned
+
+    def adopt(self, pruner):
+        """Take over what a unit's own pruner ruled out before it joined (known failures, exclusions)."""
+        with self.lock:
+            for point, reason in pruner.failures.items():
+                self.pruner.record_failure(point, reason, [], origin=pruner.origins.get(point))
+            for point, label in pruner.pruned.items():
+                if point not in self.pruner.pruned:
+                    self.pruner.pruned[point] = label
+                    if point in pruner.pruned_by:
+                        self.pruner.pruned_by[point] = pruner.pruned_by[point]
+            self.drop([p for p in self.remaining() if self.pruner.is_pruned(p)])
+
+    def drop(self, points):
+        dropped = set(points)
+        if dropped:
+            self.queues = [collections.deque(p for p in queue if p not in dropped) for queue in self.queues]
+
+    def restore(self, unit, points):
+        with self.lock:
+            queued = set(self.remaining())
+            self.queues[unit] = collections.deque(sorted(set(self.queues[unit]) | (set(points) - queued)))
+
+    def discard(self, points):
+        with self.lock:
+            self.drop(points)
+
+class ShardSearch:
+    """One unit's part of a sharded sweep (search strategy contract): its calibration combos, then the shared queue."""
+
+    def __init__(self, queue, unit, calibration):
+        self.queue = queue
+        self.unit = unit
+        self.calibration = list(calibration)
+        self.total = len(self.pending)  # progress total of this unit instead of the grid size
+        self.measured = 0
+        self.last_acquisition = None
+
+    @property
+    def pending(self):
+        return self.calibration + self.queue.share(self.unit)
+
+    def next_point(self):
+        if self.calibration:
+            return self.calibration.pop(0)
+        return self.queue.take(self.unit)
+
+    def observe(self, point, result, error_reason):
+        self.measured += 1
+        if error_reason is None:
+            return []
+        return self.queue.record_failure(point, error_reason)
+
+    def restore(self, points):
+        self.queue.restore(self.unit, points)
+
+    def discard(self, points):
+        self.queue.discard(points)
+
+class ShardCoordinator:
+    """Turns a fleet of identical units into one sharded sweep, or with --fine seeds each unit from the model map."""
+
+    def __init__(self, sessions):
+        if len(sessions) < 2:
+            raise ValueError(RED + "Error: --shard needs at least two devices." + RESET)
+        self.sessions = sessions
+        self.config = sessions[0].config
+        if self.config.target() is not None or self.config.warm_start:
+            # Both prune per unit against that unit's own results; the model map needs one shared boundary
+            raise ValueError(RED + "Error: --shard maps the whole grid and cannot be combined with an objective "
+                                   "or --warm-start." + RESET)
+        self.units = {session.ip_address: i for i, session in enumerate(sessions)}
+        self.identity = None
+        self.identities = {}
+        self.queue = None
+        self.pruner = None
+        self.calibration = []
+        self.unit_data = {session.ip_address: load_unit_data(session) for session in sessions}
+
+    def check_identity(self):
+        """Every unit must report the same model, ASIC count and core count."""
+        for session in self.sessions:
+            info = session.get_system_info()
+            if info is None:
+                raise ValueError(RED + f"Error: {session.ip_address} did not respond; cannot check it is identical." + RESET)
+            self.identities[session.ip_address] = device_identity(info, session.ip_address)
+        models = collections.defaultdict(list)
+        for ip, identity in self.identities.items():
+            models[describe_identity(identity)].append(ip)
+        if len(models) > 1:
+            listing = "; ".join(f"{model}: {', '.join(ips)}" for model, ips in sorted(models.items()))
+            raise ValueError(RED + f"Error: --shard needs identical units, found {listing}." + RESET)
+        self.identity = self.identities[self.sessions[0].ip_address]
+
+    def start(self):
+        """Prepare the sessions before they run: the shared queue, or the seeds for --fine."""
+        if self.config.fine:
+            self.seed_fine_tuning()
+        else:
+            tested, ruled_out = self.build_queue()
+            shared = len(self.queue.remaining())
+            print(GREEN + f"Sharded sweep of one {describe_identity(self.identity)} grid across {len(self.sessions)} "
+                          f"units: {len(self.calibration)} calibration combos on every unit, {shared} shared combos "
+                          f"(~{math.ceil(shared / len(self.sessions))} per unit), {tested} already tested, "
+                          f"{ruled_out} skipped or ruled out." + RESET)
+            for session in self.sessions:
+                session.config.search = self.strategy
+
+    def calibration_combos(self):
+        return calibration_points(self.sessions[0].build_grid(), (self.config.initial_voltage, self.config.initial_frequency))
+
+    # ---------------- sweep ----------------
+    def build_queue(self):
+        """Calibration combos, and the shared queue of everything no unit has tested or ruled out yet."""
+        grid = self.sessions[0].build_grid()
+        self.calibration = self.calibration_combos()
+        self.pruner = SharedPruner()
+        tested = {point_of(r) for results, _ in self.unit_data.values() for r in results}
+        now = time.time()
+        skipped = {}
+        for _, failures in self.unit_data.values():
+            for failure in failures:
+                retry = self.config.retry_failures or retry_decision(failure, now, self.config.ambient)[0]
+                if not retry and point_of(failure) not in tested:
+                    skipped[point_of(failure)] = failure["errorReason"]
+        candidates = [p for p in grid if p not in tested and p not in skipped and p not in self.calibration]
+        for point, reason in sorted(skipped.items()):
+            self.pruner.record_failure(point, reason, candidates)
+        self.queue = ShardQueue(candidates, len(self.sessions), self.pruner)
+        return len(tested), len(skipped) + len(self.pruner.pruned)
+
+    def strategy(self, session, grid, sort_key):
+        """Search strategy of every sharded session; they all share one pruner."""
+        unit = self.units[session.ip_address]
+        self.queue.adopt(session.pruner)
+        session.pruner = self.pruner
+        calibration = [p for p in self.calibration
+                       if p not in session.tested_combinations and p not in session.skipped_failures]
+        search = ShardSearch(self.queue, unit, calibration)
+        session.log(f"Shard {unit + 1}/{len(self.sessions)}: {len(calibration)} calibration combos, then ~"
+                    f"{len(search.pending) - len(calibration)} of {len(self.queue.remaining())} shared combos "
+                    f"(idle units steal work).", GREEN)
+        return search
+
+    # ---------------- model map ----------------
+    def seed_fine_tuning(self):
+        """Give every unit the model map, translated to its own offsets, as estimates to refine from."""
+        unit_results = {ip: results for ip, (results, _) in self.unit_data.items()}
+        missing = [ip for ip, results in unit_results.items() if not results]
+        if missing:
+            print(YELLOW + f"No results yet for {', '.join(missing)}; run the sharded sweep first." + RESET)
+            unit_results = {ip: results for ip, results in unit_results.items() if results}
+        if len(unit_results) < 2:
+            print(YELLOW + "Too few units with results for a model map; refining from each unit's own results." + RESET)
+            return
+        offsets, shared = unit_offsets(unit_results, self.calibration_combos())
+        merged = merge_model(unit_results, offsets)
+        for session in self.sessions:
+            if session.ip_address not in offsets:
+                continue
+            own = {point_of(r) for r in unit_results[session.ip_address]}
+            session.seed_results = [denormalize(entry, offsets[session.ip_address])
+                                    for entry in merged if point_of(entry) not in own]
+        print(GREEN + f"Model map of {len(merged)} combos ({len(shared)} calibration combos) seeds the refinement "
+                      f"of {len(offsets)} units." + RESET)
+
+    def finish(self):
+        """Merge every unit's results into the model map, save it and print the per-unit offsets."""
+        self.unit_data = {session.ip_address: load_unit_data(session) for session in self.sessions}
+        unit_results = {ip: results for ip, (results, _) in self.unit_data.items() if results}
+        if len(unit_results) < 2:
+            print(YELLOW + "Too few units with results to merge a model map." + RESET)
+            return None
+        offsets, shared = unit_offsets(unit_results, self.calibration_combos())
+        merged = merge_model(unit_results, offsets)
+
+        identity = self.identity or next(iter(self.identities.values()), None)
+        data = {
+            "model": {"model": identity["model"], "asicModel": identity["asic_model"],
+                      "asicCount": identity["asic_count"], "smallCoreCount": identity["small_core_count"]},
+            "units": [{"ip": ip, "unit": self.identities[ip]["unit"], "results": len(results),
+                       **{name: round(value, 4) if isinstance(value, float) else value
+                          for name, value in offsets[ip].items() if name != "residual"},
+                       "residual": {name: round(value, 4) for name, value in offsets[ip]["residual"].items()}}
+                      for ip, results in unit_results.items()],
+            "calibration": [list(point) for point in shared],
+            **build_final_data(merged),
+        }
+        failures = [{**failure, "unit": ip} for ip, (_, unit_failures) in self.unit_data.items()
+                    for failure in unit_failures]
+        if failures:
+            data["failures"] = sorted(failures, key=point_of)
+        if self.queue is not None:
+            data["steals"] = self.queue.steals
+
+        filename = model_results_filename(identity)
+        try:
+            write_atomic(filename, data)
+        except OSError as e:
+            print(RED + f"Error saving model map to {filename}: {e}" + RESET)
+            return None
+
+        print(GREEN + f"\nModel map of {describe_identity(identity)}: {len(merged)} combos from {len(unit_results)} units"
+                      + (f" ({self.queue.steals} work steals)" if self.queue is not None else "")
+                      + f", saved to {filename}" + RESET)
+        print(GREEN + f"Unit offsets against the median unit ({len(shared)} calibration combos):" + RESET)
+        for ip, offset in offsets.items():
+            residual = offset["residual"]
+            color = GREEN if offset["consistent"] else YELLOW
+            note = "" if offset["consistent"] else "  offsets disagree across calibration combos; check this unit"
+            print(color + f"  {ip:<21} hashrate x{offset['hashrateFactor']:.3f}, J/TH x{offset['efficiencyFactor']:.3f}, "
+                          f"chip {offset['tempOffset']:+.1f}°C, VR {offset['vrTempOffset']:+.1f}°C | residual "
+                          f"{max(residual.get('hashrateFactor', 0), residual.get('efficiencyFactor', 0)):.1%}, "
+                          f"{max(residual.get('tempOffset', 0), residual.get('vrTempOffset', 0)):.1f}°C{note}" + RESET)
+        for label, entries in (("hashrate", data["top_performers"]), ("J/TH", data["most_efficient"])):
+            if entries:
+                best = entries[0]
+                print(GREEN + f"Best {label} of the model: {best['coreVoltage']} mV @ {best['frequency']} MHz -> "
+                              f"{best['averageHashRate']:.1f} GH/s, {best['efficiencyJTH']:.2f} J/TH, "
+                              f"{best['averageTemperature']:.1f}°C" + RESET)
+        return filename
+
+    # ---------------- plan ----------------
+    def plan(self):
+        """--plan: calibration on every unit plus an even share of the queue, or the seeded refinements. Device-free."""
+        if self.config.fine:
+            self.seed_fine_tuning()
+            totals = [session.plan() for session in self.sessions]
+            return max((t for t in totals if t is not None), default=None)
+        for session in self.sessions:
+            session.prepare()
+            session.load_resume()
+        self.build_queue()
+        per_combo = statistics.fmean(session.estimated_combo_seconds() for session in self.sessions)
+        calibration = max(len([p for p in self.calibration if p not in session.tested_combinations])
+                          for session in self.sessions)
+        combos = calibration + math.ceil(len(self.queue.remaining()) / len(self.sessions))
+        total = combos * per_combo
+        print(GREEN + f"Sharded plan: {len(self.calibration)} calibration and {len(self.queue.remaining())} shared "
+                      f"combos across {len(self.sessions)} units, ~{combos} per unit at ~{format_duration(per_combo)} "
+                      f"each: ~{format_duration(total)} until the model map is complete (upper bound)." + RESET)
+        return total
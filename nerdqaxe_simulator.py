@@ -0,0 +1,339 @@
+# =============================================================
+#                 NERDQAXE DEVICE SIMULATOR
+# =============================================================
+# Serves the subset of the NerdQAxe HTTP API the benchmark uses:
+#
+#   GET   /api/system/info     telemetry snapshot
+#   PATCH /api/system          store coreVoltage / frequency
+#   POST  /api/system/restart  reboot and start hashing with stored settings
+#   GET   /sim/stats           simulator counters (requests, restarts, sim time, ambient)
+#
+# Physics (per unit, with small seeded unit-to-unit variation):
+#   - hashrate = frequency * cores / 1000, degrading above a V/F stability
+#     boundary f_max(V) and collapsing to zero far beyond it; the reported
+#     value is a firmware-style moving average that ramps up after a reboot
+#   - power = static + dynamic * V^2 * F + leakage growing with chip temperature
+#   - chip and VR temperature approach ambient + R_th * power with first-order
+#     time constants
+#   - input voltage droops with supply current
+#   - ambient can swing sinusoidally (day/night) around its base value
+#
+# Time runs `accel` times faster than wall clock, so a benchmark started with
+# the same --time-scale finishes its 600 s / 1200 s waits in seconds.
+import argparse
+import json
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_MODEL = {
+    "small_core_count": 2040,
+    "asic_count": 4,
+    "ambient": 25.0,            # °C
+    "ambient_swing": 0.0,       # °C amplitude of the day/night ambient cycle
+    "ambient_period": 86400.0,  # s, length of one ambient cycle
+    "f_max_base": 610.0,        # MHz stability limit at 1100 mV
+    "f_max_slope": 2.5,         # MHz per mV
+    "collapse_width": 120.0,    # MHz above f_max where hashrate reaches zero
+    "static_power": 8.0,        # W
+    "dynamic_power": 0.088,     # W per (V^2 * MHz)
+    "leakage_power": 0.08,      # W per °C above ambient
+    "idle_power": 5.0,          # W while booting
+    "chip_thermal_resistance": 0.45,  # °C per W
+    "vr_thermal_resistance": 0.50,    # °C per W
+    "chip_time_constant": 90.0,       # s
+    "vr_time_constant": 180.0,        # s
+    "hashrate_time_constant": 60.0,   # s, firmware averaging
+    "hashrate_noise": 0.02,           # relative, per reading
+    "temp_noise": 0.25,               # °C, per reading
+    "supply_voltage": 11950.0,        # mV, unloaded
+    "supply_resistance": 35.0,        # mV per A
+    "boot_time": 20.0,                # s offline after a restart
+}
+
+# Per-unit variation (relative standard deviation, or absolute MHz for f_max_base)
+UNIT_VARIATION = {
+    "f_max_base": 15.0,
+    "dynamic_power": 0.03,
+    "chip_thermal_resistance": 0.05,
+    "vr_thermal_resistance": 0.05,
+}
+
+class SimulatedDevice:
+    """State and physical model of one simulated NerdQAxe."""
+
+    def __init__(self, accel=1.0, seed=None, error_rate=0.0, live_apply=False, **overrides):
+        rng = random.Random(seed)
+        self.model = dict(DEFAULT_MODEL)
+        self.model.update(overrides)
+        for key, spread in UNIT_VARIATION.items():
+            if key == "f_max_base":
+                self.model[key] += rng.gauss(0, spread)
+            else:
+                self.model[key] *= 1 + rng.gauss(0, spread)
+        self.rng = random.Random(rng.random())
+        # Locally administered MAC address, stable per seed (identifies the unit in the fleet store)
+        mac_rng = random.Random(None if seed is None else f"mac-{seed}")
+        self.mac_address = "02:00:00:" + ":".join(f"{mac_rng.randrange(256):02x}" for _ in range(3))
+        self.accel = accel
+        self.error_rate = error_rate
+        self.live_apply = live_apply
+        self.lock = threading.Lock()
+
+        self.real_epoch = time.monotonic()
+        self.last_update = 0.0
+        self.core_voltage = 1150
+        self.frequency = 600
+        self.pending = {"coreVoltage": self.core_voltage, "frequency": self.frequency}
+        self.boot_until = 0.0
+        self.chip_temp = self.model["ambient"] + 10
+        self.vr_temp = self.model["ambient"] + 10
+        self.hashrate = 0.0
+        self.current_power = self.model["idle_power"]
+        self.stats = {"requests": 0, "restarts": 0, "patches": 0, "errors_injected": 0}
+
+    # ---------------------------------------------------------
+    #                    PHYSICAL MODEL
+    # ---------------------------------------------------------
+    @property
+    def cores(self):
+        return self.model["small_core_count"] * self.model["asic_count"]
+
+    def sim_time(self):
+        """Simulated seconds since start."""
+        return (time.monotonic() - self.real_epoch) * self.accel
+
+    def stability(self, core_voltage, frequency):
+        """Fraction of the ideal hashrate delivered at (V, F)."""
+        f_max = self.model["f_max_base"] + self.model["f_max_slope"] * (core_voltage - 1100)
+        if frequency <= f_max:
+            return 1.0
+        return max(0.0, 1.0 - ((frequency - f_max) / self.model["collapse_width"]) ** 1.5)
+
+    def ambient(self, now=None):
+        """Ambient temperature at simulated time now (default: the current time)."""
+        m = self.model
+        if not m["ambient_swing"]:
+            return m["ambient"]
+        now = self.sim_time() if now is None else now
+        return m["ambient"] + m["ambient_swing"] * math.sin(2 * math.pi * now / m["ambient_period"])
+
+    def power(self, core_voltage, frequency, chip_temp, ambient):
+        volts = core_voltage / 1000
+        return (self.model["static_power"] + self.model["dynamic_power"] * volts ** 2 * frequency
+                + self.model["leakage_power"] * max(chip_temp - ambient, 0))
+
+    def steady_state(self, core_voltage, frequency):
+        """Converged hashrate, power and temperatures at (V, F) at the current ambient (noise-free ground truth)."""
+        m = self.model
+        ambient = self.ambient()
+        chip_temp = ambient
+        for _ in range(50):  # leakage feedback converges quickly
+            power = self.power(core_voltage, frequency, chip_temp, ambient)
+            chip_temp = ambient + m["chip_thermal_resistance"] * power
+        hashrate = frequency * self.cores / 1000 * self.stability(core_voltage, frequency)
+        return {
+            "hashRate": hashrate,
+            "power": power,
+            "temp": chip_temp,
+            "vrTemp": ambient + m["vr_thermal_resistance"] * power,
+            "voltage": m["supply_voltage"] - m["supply_resistance"] * power / 12,
+            "efficiencyJTH": power / (hashrate / 1000) if hashrate > 0 else None,
+        }
+
+    def advance(self):
+        """Integrate the model from the last update to the current simulated time."""
+        now = self.sim_time()
+        dt = now - self.last_update
+        self.last_update = now
+        if dt <= 0:
+            return now
+        m = self.model
+        ambient = self.ambient(now)
+        booting = now < self.boot_until
+        if booting:
+            power = m["idle_power"]
+            target_hashrate = 0.0
+        else:
+            power = self.power(self.core_voltage, self.frequency, self.chip_temp, ambient)
+            target_hashrate = self.frequency * self.cores / 1000 * self.stability(self.core_voltage, self.frequency)
+
+        self.chip_temp += (ambient + m["chip_thermal_resistance"] * power - self.chip_temp) * (1 - math.exp(-dt / m["chip_time_constant"]))
+        self.vr_temp += (ambient + m["vr_thermal_resistance"] * power - self.vr_temp) * (1 - math.exp(-dt / m["vr_time_constant"]))
+        self.hashrate += (target_hashrate - self.hashrate) * (1 - math.exp(-dt / m["hashrate_time_constant"]))
+        self.current_power = power
+        return now
+
+    # ---------------------------------------------------------
+    #                      API HANDLERS
+    # ---------------------------------------------------------
+    def info(self):
+        with self.lock:
+            now = self.advance()
+            if now < self.boot_until:
+                return None
+            m = self.model
+            power = self.current_power
+            return {
+                "hostname": "nerdqaxe-sim",
+                "macAddr": self.mac_address,
+                "deviceModel": "NerdQAxe++",
+                "ASICModel": "BM1370",
+                "version": "simulator",
+                "smallCoreCount": m["small_core_count"],
+                "asicCount": m["asic_count"],
+                "coreVoltage": self.core_voltage,
+                "coreVoltageActual": self.core_voltage - 5,
+                "frequency": self.frequency,
+                "hashRate": max(self.hashrate * (1 + self.rng.gauss(0, m["hashrate_noise"])), 0.0),
+                "temp": round(self.chip_temp + self.rng.gauss(0, m["temp_noise"]), 2),
+                "vrTemp": round(self.vr_temp + self.rng.gauss(0, m["temp_noise"]), 2),
+                "power": power * (1 + self.rng.gauss(0, 0.005)),
+                "voltage": m["supply_voltage"] - m["supply_resistance"] * power / 12 + self.rng.gauss(0, 5),
+                "current": power / 12 * 1000,
+                "uptimeSeconds": int(now - self.boot_until),
+            }
+
+    def patch(self, settings):
+        with self.lock:
+            self.advance()
+            self.stats["patches"] += 1
+            for key in ("coreVoltage", "frequency"):
+                if key in settings:
+                    self.pending[key] = int(settings[key])
+            if self.live_apply:
+                self.core_voltage = self.pending["coreVoltage"]
+                self.frequency = self.pending["frequency"]
+
+    def restart(self):
+        with self.lock:
+            now = self.advance()
+            self.stats["restarts"] += 1
+            self.core_voltage = self.pending["coreVoltage"]
+            self.frequency = self.pending["frequency"]
+            self.boot_until = now + self.model["boot_time"]
+            self.hashrate = 0.0
+
+    def inject_error(self):
+        if self.error_rate and self.rng.random() < self.error_rate:
+            self.stats["errors_injected"] += 1
+            return True
+        return False
+
+class SimulatorHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without TCP_NODELAY a
+    # keep-alive client waits for its delayed ACK (~40 ms) on every response
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        try:
+            return json.loads(self.rfile.read(length))
+        except ValueError:
+            return None
+
+    def handle_api(self, action):
+        device = self.server.device
+        device.stats["requests"] += 1
+        if device.inject_error():
+            self.send_json(503, {"error": "injected failure"})
+            return
+        action(device)
+
+    def do_GET(self):
+        if self.path == "/api/system/info":
+            def action(device):
+                info = device.info()
+                if info is None:
+                    self.send_json(503, {"error": "device is restarting"})
+                else:
+                    self.send_json(200, info)
+            self.handle_api(action)
+        elif self.path == "/sim/stats":
+            device = self.server.device
+            self.send_json(200, {**device.stats, "simSeconds": device.sim_time(), "ambient": round(device.ambient(), 2)})
+        else:
+            self.send_json(404, {"error": "not found"})
+
+    def do_PATCH(self):
+        if self.path != "/api/system":
+            self.send_json(404, {"error": "not found"})
+            return
+        settings = self.read_json()
+        if settings is None:
+            self.send_json(400, {"error": "invalid JSON"})
+            return
+        self.handle_api(lambda device: (device.patch(settings), self.send_json(200, {})))
+
+    def do_POST(self):
+        if self.path != "/api/system/restart":
+            self.send_json(404, {"error": "not found"})
+            return
+        self.read_json()
+        self.handle_api(lambda device: (device.restart(), self.send_json(200, {})))
+
+def start_simulators(count=1, base_port=8081, host="127.0.0.1", seed=0, **device_options):
+    """Start `count` simulated devices on consecutive ports in background threads.
+
+    Returns a list of (address, device, server) tuples; call server.shutdown() to stop.
+    """
+    instances = []
+    for i in range(count):
+        device = SimulatedDevice(seed=None if seed is None else seed + i, **device_options)
+        server = ThreadingHTTPServer((host, base_port + i), SimulatorHandler)
+        server.daemon_threads = True
+        server.device = device
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        instances.append((f"{host}:{server.server_address[1]}", device, server))
+    return instances
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='NerdQAxe HTTP API simulator for hardware-free benchmark runs')
+    parser.add_argument('--count', type=int, default=1, help='Number of simulated devices (default: 1)')
+    parser.add_argument('--base-port', type=int, default=8081, help='Port of the first device (default: 8081)')
+    parser.add_argument('--host', default='127.0.0.1', help='Bind address (default: 127.0.0.1)')
+    parser.add_argument('--accel', type=float, default=100.0,
+                        help='Simulated seconds per wall-clock second; match with the benchmark --time-scale (default: 100)')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for unit-to-unit variation and noise (default: 0)')
+    parser.add_argument('--ambient', type=float, default=DEFAULT_MODEL["ambient"], help='Ambient temperature in °C')
+    parser.add_argument('--ambient-swing', type=float, default=0.0,
+                        help='Amplitude in °C of a sinusoidal day/night ambient cycle (default: 0)')
+    parser.add_argument('--ambient-period', type=float, default=24.0,
+                        help='Length of the ambient cycle in simulated hours (default: 24)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of API requests answered with HTTP 503')
+    parser.add_argument('--live-apply', action='store_true', help='Apply PATCHed settings without a restart')
+    return parser.parse_args()
+
+def main():
+    args = parse_arguments()
+    instances = start_simulators(args.count, args.base_port, args.host, args.seed, accel=args.accel,
+                                 error_rate=args.error_rate, live_apply=args.live_apply, ambient=args.ambient,
+                                 ambient_swing=args.ambient_swing, ambient_period=args.ambient_period * 3600)
+    for address, device, _ in instances:
+        print(f"Simulated NerdQAxe on {address} (stability limit {device.model['f_max_base']:.0f} MHz @ 1100 mV)")
+    print(f"Time acceleration: {args.accel:g}x. Press Ctrl+C to stop.")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        for _, _, server in instances:
+            server.shutdown()
+
+if __name__ == "__main__":
+    main()
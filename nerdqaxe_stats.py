@@ -0,0 +1,177 @@
+# =============================================================
+#               STREAMING WINDOW STATISTICS
+# =============================================================
+# O(1)-memory estimators for the measurement window, fed one sample at a
+# time by the background sampler:
+#
+#   RunningStats   Welford mean/variance, min/max and lag-1 autocorrelation
+#                  (samples polled faster than the device updates its
+#                  readings are correlated; the effective sample count
+#                  keeps confidence intervals honest)
+#   P2Quantile     Jain & Chlamtac P² estimate of one quantile (5 markers)
+#   TrimmedStats   exact trimmed mean and winsorized variance, keeping only
+#                  the k + 1 lowest and highest values in bounded heaps
+import heapq
+import math
+
+class RunningStats:
+    """Welford mean/variance with min, max and lag-1 autocorrelation."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+        self.last = None
+        self.lag_sum = 0.0      # sum of (x[t] - shift) * (x[t-1] - shift)
+        self.shift = None       # first value, keeps the lag sums well conditioned
+        self.shifted_sum = 0.0
+        self.first = None
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.minimum = min(self.minimum, value)
+        self.maximum = max(self.maximum, value)
+        if self.shift is None:
+            self.shift = self.first = value
+        shifted = value - self.shift
+        if self.last is not None:
+            self.lag_sum += shifted * (self.last - self.shift)
+        self.shifted_sum += shifted
+        self.last = value
+
+    @property
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+    def autocorrelation(self):
+        """Lag-1 autocorrelation, clipped to [0, 0.95]; 0 with too few samples or no variance."""
+        if self.count < 4 or self.m2 <= 0:
+            return 0.0
+        # sum (x[t] - m)(x[t-1] - m) from the shifted sums; m is the mean of the shifted values
+        m = self.mean - self.shift
+        head = self.shifted_sum - (self.last - self.shift)     # x[0..n-2]
+        tail = self.shifted_sum - (self.first - self.shift)    # x[1..n-1]
+        covariance = self.lag_sum - m * (head + tail) + (self.count - 1) * m * m
+        return min(max(covariance / self.m2, 0.0), 0.95)
+
+    def effective_count(self):
+        """Number of independent samples the window is worth (AR(1) approximation)."""
+        rho = self.autocorrelation()
+        return self.count * (1 - rho) / (1 + rho)
+
+class P2Quantile:
+    """Streaming estimate of the q-quantile with five markers (P² algorithm)."""
+
+    def __init__(self, q):
+        self.q = q
+        self.heights = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2 * q, 1 + 4 * q, 3 + 2 * q, 5]
+        self.increments = [0, q / 2, q, (1 + q) / 2, 1]
+        self.count = 0
+
+    def add(self, value):
+        self.count += 1
+        if len(self.heights) < 5:
+            self.heights.append(value)
+            self.heights.sort()
+            return
+        h, n = self.heights, self.positions
+        if value < h[0]:
+            h[0] = value
+            k = 0
+        elif value >= h[4]:
+            h[4] = value
+            k = 3
+        else:
+            k = next(i for i in range(4) if h[i] <= value < h[i + 1])
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        # Move the three middle markers towards their desired positions
+        for i in (1, 2, 3):
+            d = self.desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                step = 1 if d > 0 else -1
+                parabolic = h[i] + step / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + step) * (h[i + 1] - h[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - step) * (h[i] - h[i - 1]) / (n[i] - n[i - 1]))
+                if h[i - 1] < parabolic < h[i + 1]:
+                    h[i] = parabolic
+                else:
+                    h[i] += step * (h[i + step] - h[i]) / (n[i + step] - n[i])
+                n[i] += step
+
+    def value(self):
+        if not self.heights:
+            return None
+        if self.count <= 5:
+            # Exact for the first samples: same index rule as sorted(values)[int(q * n)]
+            return self.heights[min(int(self.q * len(self.heights)), len(self.heights) - 1)]
+        return self.heights[2]
+
+class TrimmedStats:
+    """Exact trimmed mean / winsorized variance dropping up to `capacity` values at each end."""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.lowest = []    # max-heap (negated) of the capacity + 1 smallest values
+        self.highest = []   # min-heap of the capacity + 1 largest values
+        self.count = 0
+        self.shift = None
+        self.total = 0.0    # sums of shifted values
+        self.total_squares = 0.0
+
+    def add(self, value):
+        self.count += 1
+        if self.shift is None:
+            self.shift = value
+        shifted = value - self.shift
+        self.total += shifted
+        self.total_squares += shifted * shifted
+        keep = self.capacity + 1
+        if len(self.lowest) < keep:
+            heapq.heappush(self.lowest, -value)
+        elif value < -self.lowest[0]:
+            heapq.heapreplace(self.lowest, -value)
+        if len(self.highest) < keep:
+            heapq.heappush(self.highest, value)
+        elif value > self.highest[0]:
+            heapq.heapreplace(self.highest, value)
+
+    def extremes(self, low, high):
+        """The `low` smallest and `high` largest values, each sorted from the outside in."""
+        return sorted(-v for v in self.lowest)[:low], sorted(self.highest, reverse=True)[:high]
+
+    def trimmed_mean(self, low, high):
+        """Mean without the `low` smallest and `high` largest values (low, high <= capacity)."""
+        kept = self.count - low - high
+        if kept <= 0:
+            return None
+        smallest, largest = self.extremes(low, high)
+        trimmed = self.total - sum(v - self.shift for v in smallest) - sum(v - self.shift for v in largest)
+        return self.shift + trimmed / kept
+
+    def winsorized_variance(self, trim):
+        """Sample variance after replacing the `trim` values at each end by their nearest kept neighbour."""
+        n = self.count
+        if n < 2:
+            return 0.0
+        smallest, largest = self.extremes(trim + 1, trim + 1)
+        low_clip, high_clip = smallest[trim] - self.shift, largest[trim] - self.shift
+        total = (self.total - sum(v - self.shift for v in smallest[:trim]) + trim * low_clip
+                 - sum(v - self.shift for v in largest[:trim]) + trim * high_clip)
+        squares = (self.total_squares - sum((v - self.shift) ** 2 for v in smallest[:trim]) + trim * low_clip ** 2
+                   - sum((v - self.shift) ** 2 for v in largest[:trim]) + trim * high_clip ** 2)
+        return max((squares - total * total / n) / (n - 1), 0.0)
@@ -0,0 +1,308 @@
+# =============================================================
+#                 FLEET RESULT STORE (SQLITE)
+# =============================================================
+# An optional SQLite database (--store) that collects the results and
+# failures of every run on every unit, next to the per-device journals
+# (which stay the source of truth for resume). Rows are keyed by the device
+# identity reported by /api/system/info:
+#
+#   devices   unit (MAC address), model, asicCount, smallCoreCount, firmware
+#   runs      one benchmark run of one device: start time, ambient, options
+#   results   (V, F), hashrate, temperatures, J/TH, power, ambient, time
+#   failures  (V, F), error reason, ambient, time
+#
+# A firmware update gives a unit a new device row, so results of different
+# firmware are never mixed up. Indexes on J/TH, hashrate and (device, V, F)
+# keep fleet-wide queries in the millisecond range, e.g.
+#
+#   python nerdqaxe_benchmark.py store best --max-power 90
+#
+# Each session opens its own connection; WAL mode lets fleet sessions write
+# concurrently while queries read.
+import argparse
+import json
+import sqlite3
+import sys
+import time
+
+default_store_filename = "nerdqaxe_benchmark.sqlite3"
+store_busy_timeout = 30          # seconds a writer waits for another session's transaction
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS devices (
+    id INTEGER PRIMARY KEY,
+    unit TEXT NOT NULL,
+    ip TEXT,
+    hostname TEXT,
+    model TEXT NOT NULL,
+    asic_model TEXT,
+    asic_count INTEGER NOT NULL,
+    small_core_count INTEGER NOT NULL,
+    firmware TEXT NOT NULL,
+    last_seen REAL,
+    UNIQUE (unit, model, asic_count, small_core_count, firmware)
+);
+CREATE INDEX IF NOT EXISTS devices_identity ON devices (model, asic_count, small_core_count, firmware);
+
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    device_id INTEGER NOT NULL REFERENCES devices (id),
+    started REAL NOT NULL,
+    ambient REAL,
+    options TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_device ON runs (device_id, started);
+
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    device_id INTEGER NOT NULL REFERENCES devices (id),
+    core_voltage INTEGER NOT NULL,
+    frequency INTEGER NOT NULL,
+    hashrate REAL NOT NULL,
+    temperature REAL,
+    vr_temp REAL,
+    efficiency REAL NOT NULL,
+    power REAL NOT NULL,
+    ambient REAL,
+    timestamp REAL NOT NULL,
+    data TEXT
+);
+CREATE INDEX IF NOT EXISTS results_point ON results (device_id, core_voltage, frequency);
+CREATE INDEX IF NOT EXISTS results_efficiency ON results (efficiency, power);
+CREATE INDEX IF NOT EXISTS results_hashrate ON results (hashrate, power);
+
+CREATE TABLE IF NOT EXISTS failures (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    device_id INTEGER NOT NULL REFERENCES devices (id),
+    core_voltage INTEGER NOT NULL,
+    frequency INTEGER NOT NULL,
+    reason TEXT NOT NULL,
+    ambient REAL,
+    timestamp REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS failures_point ON failures (device_id, core_voltage, frequency);
+"""
+
+# Result fields with their own column; everything else goes to the JSON "data" column
+RESULT_COLUMNS = {"coreVoltage", "frequency", "averageHashRate", "averageTemperature", "averageVRTemp",
+                  "efficiencyJTH"}
+
+def device_identity(info, ip_address):
+    """Identity columns of a device from its /api/system/info snapshot."""
+    hostname = info.get("hostname")
+    return {
+        # The MAC address survives DHCP changes; without one the unit is its hostname at this IP
+        "unit": info.get("macAddr") or f"{hostname or 'unknown'}@{ip_address}",
+        "ip": ip_address,
+        "hostname": hostname,
+        "model": info.get("deviceModel") or info.get("ASICModel") or "unknown",
+        "asic_model": info.get("ASICModel"),
+        "asic_count": int(info.get("asicCount") or 0),
+        "small_core_count": int(info.get("smallCoreCount") or 0),
+        "firmware": info.get("version") or "unknown",
+    }
+
+def describe_identity(identity):
+    return f"{identity['model']} x{identity['asic_count']} ({identity['small_core_count']} cores/ASIC)"
+
+class ResultStore:
+    """One connection to the fleet database; create it in the thread that uses it."""
+
+    def __init__(self, filename=default_store_filename):
+        self.filename = filename
+        self.db = sqlite3.connect(filename, timeout=store_busy_timeout)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        with self.db:
+            self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    # ---------------- writes ----------------
+    def register_device(self, identity):
+        """Insert or refresh the device row for this identity; returns its id."""
+        key = (identity["unit"], identity["model"], identity["asic_count"], identity["small_core_count"],
+               identity["firmware"])
+        with self.db:
+            self.db.execute(
+                "INSERT OR IGNORE INTO devices (unit, model, asic_count, small_core_count, firmware) "
+                "VALUES (?, ?, ?, ?, ?)", key)
+            self.db.execute(
+                "UPDATE devices SET ip = ?, hostname = ?, asic_model = ?, last_seen = ? "
+                "WHERE unit = ? AND model = ? AND asic_count = ? AND small_core_count = ? AND firmware = ?",
+                (identity["ip"], identity["hostname"], identity["asic_model"], time.time()) + key)
+        return self.db.execute(
+            "SELECT id FROM devices WHERE unit = ? AND model = ? AND asic_count = ? AND small_core_count = ? "
+            "AND firmware = ?", key).fetchone()["id"]
+
+    def start_run(self, device_id, ambient=None, options=None):
+        with self.db:
+            cursor = self.db.execute("INSERT INTO runs (device_id, started, ambient, options) VALUES (?, ?, ?, ?)",
+                                     (device_id, time.time(), ambient, json.dumps(options or {})))
+        return cursor.lastrowid
+
+    def add_result(self, run_id, device_id, result, ambient=None):
+        hashrate = result["averageHashRate"]
+        efficiency = result["efficiencyJTH"]
+        extra = {key: value for key, value in result.items() if key not in RESULT_COLUMNS}
+        with self.db:
+            self.db.execute(
+                "INSERT INTO results (run_id, device_id, core_voltage, frequency, hashrate, temperature, vr_temp, "
+                "efficiency, power, ambient, timestamp, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (run_id, device_id, result["coreVoltage"], result["frequency"], hashrate,
+                 result.get("averageTemperature"), result.get("averageVRTemp"), efficiency,
+                 efficiency * hashrate / 1000, ambient, time.time(), json.dumps(extra)))
+
+    def add_failure(self, run_id, device_id, failure):
+        with self.db:
+            self.db.execute(
+                "INSERT INTO failures (run_id, device_id, core_voltage, frequency, reason, ambient, timestamp) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (run_id, device_id, failure["coreVoltage"], failure["frequency"], failure["errorReason"],
+                 failure.get("ambient"), failure.get("timestamp", time.time())))
+
+    # ---------------- queries ----------------
+    def best(self, by="efficiency", max_power=None, model=None, per_unit=False, limit=10):
+        """Best results across all units (lowest J/TH or highest hashrate), optionally under a power cap."""
+        order = "r.efficiency ASC" if by == "efficiency" else "r.hashrate DESC"
+        where, params = [], []
+        if max_power is not None:
+            where.append("r.power <= ?")
+            params.append(max_power)
+        if model is not None:
+            where.append("d.model = ?")
+            params.append(model)
+        select = ("d.unit, d.ip, d.model, d.firmware, r.core_voltage, r.frequency, r.hashrate, r.efficiency, "
+                  "r.power, r.temperature, r.vr_temp, r.ambient, r.timestamp")
+        clause = f"WHERE {' AND '.join(where)}" if where else ""
+        if per_unit:
+            # SQLite returns the other columns from the row holding the MIN/MAX
+            best = "MIN(r.efficiency)" if by == "efficiency" else "MAX(r.hashrate)"
+            sql = (f"SELECT {select}, {best} FROM results r JOIN devices d ON d.id = r.device_id {clause} "
+                   f"GROUP BY d.unit ORDER BY {order.replace('r.', '')} LIMIT ?")
+        else:
+            sql = f"SELECT {select} FROM results r JOIN devices d ON d.id = r.device_id {clause} ORDER BY {order} LIMIT ?"
+        return [dict(row) for row in self.db.execute(sql, params + [limit])]
+
+    def devices(self):
+        """All device rows with their result/failure counts."""
+        return [dict(row) for row in self.db.execute(
+            "SELECT d.*, (SELECT COUNT(*) FROM results r WHERE r.device_id = d.id) AS results, "
+            "(SELECT COUNT(*) FROM failures f WHERE f.device_id = d.id) AS failures "
+            "FROM devices d ORDER BY d.model, d.unit, d.firmware")]
+
+    def unit_results(self, model=None):
+        """Per unit, its latest identity's results averaged per (V, F), in the results-file format.
+
+        Returns {unit: {"ip": ip, "lastSeen": ts, "results": [{"coreVoltage", "frequency", "averageHashRate",
+        "efficiencyJTH", "averageTemperature"}, ...]}}.
+        """
+        where, params = "", ()
+        if model is not None:
+            where, params = "AND d.model = ?", (model,)
+        units = {}
+        for row in self.db.execute(
+                "SELECT d.unit, d.ip, d.last_seen, r.core_voltage, r.frequency, AVG(r.hashrate) AS hashrate, "
+                "SUM(r.power) / SUM(r.hashrate) * 1000 AS efficiency, MAX(r.temperature) AS temperature "
+                "FROM results r JOIN devices d ON d.id = r.device_id "
+                "WHERE d.last_seen = (SELECT MAX(last_seen) FROM devices l WHERE l.unit = d.unit) " + where +
+                " GROUP BY d.unit, r.core_voltage, r.frequency ORDER BY d.unit", params):
+            unit = units.setdefault(row["unit"], {"ip": row["ip"], "lastSeen": row["last_seen"], "results": []})
+            unit["results"].append({"coreVoltage": row["core_voltage"], "frequency": row["frequency"],
+                                    "averageHashRate": row["hashrate"], "efficiencyJTH": row["efficiency"],
+                                    "averageTemperature": row["temperature"]})
+        return units
+
+    def unit_failures(self, model=None):
+        """Per unit, the failures of its latest identity: {unit: [{"coreVoltage", "frequency", "errorReason"}, ...]}."""
+        where, params = "", ()
+        if model is not None:
+            where, params = "AND d.model = ?", (model,)
+        units = {}
+        for row in self.db.execute(
+                "SELECT DISTINCT d.unit, f.core_voltage, f.frequency, f.reason "
+                "FROM failures f JOIN devices d ON d.id = f.device_id "
+                "WHERE d.last_seen = (SELECT MAX(last_seen) FROM devices l WHERE l.unit = d.unit) " + where +
+                " ORDER BY d.unit, f.core_voltage, f.frequency", params):
+            units.setdefault(row["unit"], []).append({"coreVoltage": row["core_voltage"], "frequency": row["frequency"],
+                                                      "errorReason": row["reason"]})
+        return units
+
+    def fleet_points(self, identity):
+        """What other units of the same model and core configuration recorded, per (V, F).
+
+        Returns ({(V, F): {"passed": units, "hashrate": mean, "efficiency": mean, "failures": [(unit, failure)]}},
+        number of units). Failures are in the journal's format (errorReason, ambient, timestamp) and only
+        listed for units that never passed that point.
+        """
+        match = "d.model = ? AND d.asic_count = ? AND d.small_core_count = ? AND d.unit != ?"
+        params = (identity["model"], identity["asic_count"], identity["small_core_count"], identity["unit"])
+        points = {}
+        for row in self.db.execute(
+                "SELECT r.core_voltage, r.frequency, COUNT(DISTINCT d.unit) AS passed, AVG(r.hashrate) AS hashrate, "
+                f"AVG(r.efficiency) AS efficiency FROM results r JOIN devices d ON d.id = r.device_id WHERE {match} "
+                "GROUP BY r.core_voltage, r.frequency", params):
+            points[(row["core_voltage"], row["frequency"])] = {
+                "passed": row["passed"], "hashrate": row["hashrate"], "efficiency": row["efficiency"], "failures": []}
+        for row in self.db.execute(
+                "SELECT f.core_voltage, f.frequency, d.unit, f.reason, f.ambient, f.timestamp FROM failures f "
+                f"JOIN devices d ON d.id = f.device_id WHERE {match} AND NOT EXISTS ("
+                "SELECT 1 FROM results r JOIN devices u ON u.id = r.device_id WHERE u.unit = d.unit "
+                "AND r.core_voltage = f.core_voltage AND r.frequency = f.frequency)", params):
+            entry = points.setdefault((row["core_voltage"], row["frequency"]),
+                                      {"passed": 0, "hashrate": None, "efficiency": None, "failures": []})
+            entry["failures"].append(
+                (row["unit"], {"errorReason": row["reason"], "ambient": row["ambient"], "timestamp": row["timestamp"]}))
+        units = self.db.execute(
+            f"SELECT COUNT(DISTINCT d.unit) FROM devices d WHERE {match} AND (EXISTS "
+            "(SELECT 1 FROM results r WHERE r.device_id = d.id) OR EXISTS (SELECT 1 FROM failures f WHERE f.device_id = d.id))",
+            params).fetchone()[0]
+        return points, units
+
+# =============================================================
+#                       QUERY COMMAND
+# =============================================================
+def parse_arguments(argv):
+    parser = argparse.ArgumentParser(prog="nerdqaxe_benchmark.py store",
+                                     description='Query the fleet result store written with --store')
+    parser.add_argument('--db', default=default_store_filename, help=f'Database file (default: {default_store_filename})')
+    commands = parser.add_subparsers(dest='command', required=True)
+    best = commands.add_parser('best', help='Best results across all units')
+    best.add_argument('--by', choices=['efficiency', 'hashrate'], default='efficiency',
+                      help='Rank by lowest J/TH or highest hashrate (default: efficiency)')
+    best.add_argument('--max-power', type=float, help='Only results at or below this power (W)')
+    best.add_argument('--model', help='Only this device model')
+    best.add_argument('--per-unit', action='store_true', help='Best result of each unit instead of overall')
+    best.add_argument('--limit', type=int, default=10, help='Rows to show (default: 10)')
+    commands.add_parser('devices', help='Units, identities and how much data each has')
+    return parser.parse_args(argv)
+
+def main(argv):
+    from nerdqaxe_benchmark import GREEN, YELLOW, RESET
+
+    args = parse_arguments(argv)
+    store = ResultStore(args.db)
+    started = time.perf_counter()
+    if args.command == "devices":
+        rows = store.devices()
+        elapsed = time.perf_counter() - started
+        for row in rows:
+            print(f"{row['unit']:<20} {row['ip'] or '-':<16} {row['model']} x{row['asic_count']} "
+                  f"({row['small_core_count']} cores/ASIC) fw {row['firmware']} | "
+                  f"{row['results']} results, {row['failures']} failures")
+    else:
+        rows = store.best(args.by, args.max_power, args.model, args.per_unit, args.limit)
+        elapsed = time.perf_counter() - started
+        for rank, row in enumerate(rows, 1):
+            print(f"{rank:>3}. {row['unit']:<20} {row['model']} fw {row['firmware']} | "
+                  f"{row['core_voltage']} mV @ {row['frequency']} MHz | {row['hashrate']:.1f} GH/s | "
+                  f"{row['efficiency']:.2f} J/TH | {row['power']:.1f} W | {row['temperature']:.1f}°C")
+    store.close()
+    print((GREEN if rows else YELLOW) + f"{len(rows)} rows in {elapsed * 1000:.1f} ms" + RESET)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
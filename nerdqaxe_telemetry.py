@@ -0,0 +1,60 @@
+# =============================================================
+#                  RAW TELEMETRY STREAMING
+# =============================================================
+# Every /api/system/info snapshot polled during a benchmark is appended to a
+# per-device JSON Lines file, one record per line:
+#
+#   {"ts": 1718000000.12, "window": 1718000000000, "phase": "measuring",
+#    "coreVoltage": 1150, "frequency": 600, "info": {...snapshot...}}
+#
+# "window" identifies one tested combo (settling and measuring share it),
+# "phase" is "settling" or "measuring" ("retuning" for the autotune daemon's
+# windows, "monitoring" between them). Measuring and retuning records also
+# carry "pollInterval", the sampler spacing in seconds. Every measurement
+# window ends with a "completed" or "aborted" record whose info holds the
+# window's "kind" (its phase) and, when aborted, its "errorReason"
+# ("INTERRUPTED" on a stop). The file is only ever appended to.
+import json
+import time
+
+telemetry_flush_every = 20        # records buffered before a flush
+telemetry_flush_interval = 30     # seconds between flushes at most
+
+def telemetry_filename(ip_address):
+    return f"nerdqaxe_telemetry_{ip_address}.jsonl"
+
+class TelemetryWriter:
+    """Buffered append-only writer for raw telemetry snapshots."""
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.file = open(filename, "a", encoding="utf-8", buffering=1 << 16)
+        self.pending = 0
+        self.last_flush = time.monotonic()
+
+    def write(self, info, phase, core_voltage, frequency, window, poll_interval=None):
+        record = {
+            "ts": round(time.time(), 3),
+            "window": window,
+            "phase": phase,
+            "coreVoltage": core_voltage,
+            "frequency": frequency,
+        }
+        if poll_interval is not None:
+            record["pollInterval"] = poll_interval
+        record["info"] = info
+        self.file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self.pending += 1
+        if self.pending >= telemetry_flush_every or time.monotonic() - self.last_flush >= telemetry_flush_interval:
+            self.flush()
+
+    def flush(self):
+        if self.file.closed:
+            return
+        self.file.flush()
+        self.pending = 0
+        self.last_flush = time.monotonic()
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()